@@ -8,7 +8,7 @@ from pydantic import BaseModel
 from app.services.connector_service import ConnectorService
 from app.repositories.target_repository import TargetSystemRepository
 from app.core.database import get_db
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 
 router = APIRouter(prefix="/connectors", tags=["connectors"])
@@ -55,7 +55,7 @@ class HealthCheckResponse(BaseModel):
     connection_details: Dict[str, Dict[str, Any]]
 
 
-def get_connector_service(db: AsyncSession = Depends(get_db)) -> ConnectorService:
+def get_connector_service(db: Session = Depends(get_db)) -> ConnectorService:
     """Dependency to get connector service"""
     target_repository = TargetSystemRepository(db)
     return ConnectorService(target_repository)
@@ -2,8 +2,8 @@
 Simulation control API endpoints
 """
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, Query
+from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.simulation_service import EnhancedSimulationService
 from app.models.simulation import SimulationStatus
@@ -14,7 +14,7 @@ router = APIRouter()
 @router.post("/{project_id}/start")
 async def start_simulation(
     project_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: Session = Depends(get_db)
 ):
     """Start simulation for a project"""
     service = EnhancedSimulationService(db)
@@ -30,7 +30,7 @@ async def start_simulation(
 @router.post("/{project_id}/stop")
 async def stop_simulation(
     project_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: Session = Depends(get_db)
 ):
     """Stop simulation for a project"""
     service = EnhancedSimulationService(db)
@@ -46,28 +46,30 @@ async def stop_simulation(
 @router.get("/{project_id}/status", response_model=SimulationStatus)
 async def get_simulation_status(
     project_id: str,
-    db: AsyncSession = Depends(get_db)
+    include_devices: bool = Query(True, description="Include per-device statuses"),
+    db: Session = Depends(get_db)
 ):
     """Get simulation status for a project"""
     service = EnhancedSimulationService(db)
-    status = await service.get_project_simulation_status(project_id)
+    status = await service.get_project_simulation_status(project_id, include_devices)
     return status
 
 
 @router.get("/status", response_model=List[SimulationStatus])
 async def get_all_simulations_status(
-    db: AsyncSession = Depends(get_db)
+    include_devices: bool = Query(True, description="Include per-device statuses"),
+    db: Session = Depends(get_db)
 ):
     """Get status of all running simulations"""
     service = EnhancedSimulationService(db)
-    statuses = await service.get_all_simulations_status()
+    statuses = await service.get_all_simulations_status(include_devices)
     return statuses
 
 
 @router.get("/{project_id}/validate")
 async def validate_project_for_simulation(
     project_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: Session = Depends(get_db)
 ):
     """Validate if a project is ready for simulation"""
     service = EnhancedSimulationService(db)
@@ -75,10 +77,22 @@ async def validate_project_for_simulation(
     return validation
 
 
+@router.post("/{project_id}/devices/test")
+async def test_project_devices(
+    project_id: str,
+    max_concurrent: int = Query(8, ge=1, le=64, description="Maximum device tests running at once"),
+    db: Session = Depends(get_db)
+):
+    """Test configuration for all enabled devices of a project"""
+    service = EnhancedSimulationService(db)
+    results = await service.test_project_devices(project_id, max_concurrent)
+    return results
+
+
 @router.post("/devices/{device_id}/test")
 async def test_device_configuration(
     device_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: Session = Depends(get_db)
 ):
     """Test configuration for a specific device"""
     service = EnhancedSimulationService(db)
@@ -90,15 +104,15 @@ async def test_device_configuration(
 async def test_connector_configuration(
     target_type: str,
     config: dict,
-    db: AsyncSession = Depends(get_db)
+    db: Session = Depends(get_db)
 ):
     """Test a connector configuration using the factory"""
     try:
-        from app.simulation.connectors import ConnectorFactory, TargetType
+        from app.simulation.connectors import ConnectorFactory, resolve_target_type
         
         # Validate target type
         try:
-            target_enum = TargetType(target_type.lower())
+            target_enum = resolve_target_type(target_type)
         except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -167,9 +181,9 @@ async def get_supported_connector_types():
 async def get_connector_config_schema(target_type: str):
     """Get configuration schema for a connector type"""
     try:
-        from app.simulation.connectors import ConnectorFactory, TargetType
+        from app.simulation.connectors import ConnectorFactory, resolve_target_type
         
-        target_enum = TargetType(target_type.lower())
+        target_enum = resolve_target_type(target_type)
         schema = ConnectorFactory.get_config_schema(target_enum)
         
         return {
@@ -187,7 +201,7 @@ async def get_connector_config_schema(target_type: str):
 
 @router.post("/emergency-stop")
 async def emergency_stop_all_simulations(
-    db: AsyncSession = Depends(get_db)
+    db: Session = Depends(get_db)
 ):
     """Emergency stop all running simulations"""
     service = EnhancedSimulationService(db)
@@ -1,7 +1,7 @@
 """
 Application configuration settings
 """
-from typing import List, Union
+from typing import List, Literal, Union
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
@@ -20,6 +20,11 @@ class Settings(BaseSettings):
     max_devices_per_project: int = 1000
     max_concurrent_projects: int = 10
     
+    # Simulation logs: lowest event level emitted, and message_sent sampling
+    simulation_log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "DEBUG"
+    simulation_log_sample_rate: int = 10
+    simulation_log_min_interval: float = 5.0
+    
     # Performance
     connection_pool_size: int = 100
     request_timeout: int = 30
@@ -31,6 +36,13 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in v.split(',')]
         return v
     
+    @field_validator('simulation_log_level', mode='before')
+    @classmethod
+    def normalize_simulation_log_level(cls, v):
+        if isinstance(v, str):
+            return v.strip().upper()
+        return v
+    
     class Config:
         env_file = ".env"
 
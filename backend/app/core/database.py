@@ -2,7 +2,7 @@
 Database configuration and session management
 """
 import os
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.engine import Engine
@@ -49,6 +49,22 @@ def get_db():
         db.close()
 
 
+def warm_up_pool():
+    """Open the pool's connections at startup so early requests skip connection setup"""
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    connections = []
+    try:
+        for _ in range(size):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        # Closing returns the connections to the pool, still open
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
 def create_tables():
     """Create all tables (for development/testing)"""
     Base.metadata.create_all(bind=engine)
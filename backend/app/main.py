@@ -5,11 +5,13 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import time
 from app.core.config import settings
-from app.core.database import create_tables
+from app.core.database import create_tables, warm_up_pool
 from app.api.v1 import projects, devices, payloads, targets, simulation, connectors
 from app.api.middleware import ErrorHandlingMiddleware
+from app.simulation.connectors.http_connector import close_shared_connector
 from app.utils.logger import app_logger
 
 
@@ -26,10 +28,18 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         app_logger.error(f"Error creating database tables: {e}")
     
+    # Pre-open pooled database connections
+    try:
+        warmed = await asyncio.to_thread(warm_up_pool)
+        app_logger.info(f"Database connection pool warmed with {warmed} connections")
+    except Exception as e:
+        app_logger.error(f"Error warming database connection pool: {e}")
+    
     yield
     
     # Shutdown
     app_logger.info("Shutting down IoT Device Simulator API...")
+    await close_shared_connector()
 
 
 app = FastAPI(
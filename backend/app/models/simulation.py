@@ -28,6 +28,7 @@ class SimulationStatus(BaseModel):
     total_devices: int
     messages_sent: int
     started_at: Optional[datetime] = None
+    uptime_seconds: Optional[float] = None
     last_activity: Optional[datetime] = None
     devices: List[DeviceStatus] = []
     errors: List[SimulationError] = []
@@ -2,7 +2,7 @@
 Target System Pydantic models for API validation
 """
 from pydantic import BaseModel, Field, validator, model_validator
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Literal, Optional, Union
 from datetime import datetime
 from enum import Enum
 from urllib.parse import urlparse
@@ -165,6 +165,7 @@ class MQTTConfig(BaseModel):
     password: Optional[str] = Field(None, description="MQTT password")
     use_tls: bool = Field(default=False, description="Use TLS encryption")
     qos: int = Field(default=0, ge=0, le=2, description="Quality of Service level")
+    max_inflight: int = Field(default=64, ge=1, le=10000, description="Maximum publishes awaiting acknowledgement at once")
 
 
 class HTTPConfig(BaseModel):
@@ -173,6 +174,8 @@ class HTTPConfig(BaseModel):
     method: str = Field(default="POST", description="HTTP method")
     headers: Dict[str, str] = Field(default_factory=dict, description="HTTP headers")
     timeout: int = Field(default=30, ge=1, le=300, description="Request timeout in seconds")
+    max_inflight: int = Field(default=64, ge=1, le=10000, description="Maximum concurrent requests; matches the shared pool's per-host limit")
+    compression: Optional[Literal['gzip', 'zstd']] = Field(None, description="Content-Encoding for request bodies above 1 KB (resilient connector)")
     
     @validator('method')
     def validate_method(cls, v):
@@ -195,6 +198,14 @@ class KafkaConfig(BaseModel):
     key_field: Optional[str] = Field(None, description="Field from payload to use as message key")
     key_static: Optional[str] = Field(None, description="Static key for all messages")
     
+    # Producer batching and delivery
+    linger_ms: int = Field(default=50, ge=0, le=60000, description="Milliseconds to wait for more messages before sending a batch")
+    max_batch_size: int = Field(default=131072, ge=1024, description="Maximum producer batch size in bytes")
+    compression_type: Optional[Literal['gzip', 'snappy', 'lz4', 'zstd']] = Field(default='lz4', description="Batch compression codec")
+    acks: Union[Literal[0, 1], Literal['all']] = Field(default=1, description="Broker acknowledgements required per batch")
+    serialization: Literal['json', 'msgpack'] = Field(default='json', description="Message value format; msgpack is smaller but consumers must decode it")
+    max_inflight: int = Field(default=1000, ge=1, le=10000, description="Maximum sends waiting on the producer at once")
+    
     @model_validator(mode='after')
     def validate_key_options(self):
         # Only one key option should be specified
@@ -208,6 +219,11 @@ class WebSocketConfig(BaseModel):
     url: str = Field(..., description="WebSocket URL")
     headers: Dict[str, str] = Field(default_factory=dict, description="WebSocket headers")
     ping_interval: int = Field(default=20, ge=1, le=300, description="Ping interval in seconds")
+    max_batch_messages: int = Field(default=1, ge=1, le=10000, description="Queued messages coalesced into one newline-delimited frame; 1 sends one message per frame")
+    max_batch_bytes: int = Field(default=65536, ge=1024, description="Maximum size of a coalesced frame in bytes")
+    max_queue: int = Field(default=1024, ge=1, le=100000, description="Messages queued for the writer before further sends are dropped")
+    shared_connection: bool = Field(default=False, description="Share one connection with other connectors using the same URL and headers")
+    compression: Literal['deflate', 'none'] = Field(default='none', description="Per-message compression; deflate only pays off for large, repetitive payloads")
     
     @validator('url')
     def validate_url(cls, v):
@@ -231,6 +247,7 @@ class PubSubConfig(BaseModel):
     provider: str = Field(..., description="Pub/Sub provider (gcp, aws, azure)")
     topic: str = Field(..., description="Topic name")
     credentials: Dict[str, Any] = Field(..., description="Provider-specific credentials")
+    max_inflight: int = Field(default=1000, ge=1, le=10000, description="Maximum publishes in flight at once")
     
     @validator('provider')
     def validate_provider(cls, v):
@@ -1,7 +1,7 @@
 """
 Base repository with common CRUD operations
 """
-from typing import Generic, TypeVar, Type, List, Optional, Dict, Any, Union
+from typing import Generic, TypeVar, Type, List, Optional, Dict, Any, Union, Iterable, FrozenSet
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import and_, or_, desc, asc
@@ -27,6 +27,20 @@ class BaseRepository(Generic[T]):
             self.logger.error(f"Error getting {self.model.__name__} by ID {id}: {e}")
             return None
     
+    async def get_by_ids(self, ids: Iterable[str]) -> Dict[str, T]:
+        """Get entities by a set of IDs in a single query, keyed by ID"""
+        ids = list(ids)
+        if not ids:
+            return {}
+        try:
+            return {
+                entity.id: entity
+                for entity in self.db.query(self.model).filter(self.model.id.in_(ids)).all()
+            }
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error getting {self.model.__name__} by IDs: {e}")
+            return {}
+    
     async def get_all(self, skip: int = 0, limit: int = 100) -> List[T]:
         """Get all entities with pagination"""
         try:
@@ -138,6 +152,18 @@ class BaseRepository(Generic[T]):
             self.logger.error(f"Error checking existence of {self.model.__name__} {id}: {e}")
             return False
     
+    async def exists_many(self, ids: Iterable[str]) -> FrozenSet[str]:
+        """Return the subset of the given IDs that exist, using a single query"""
+        ids = set(ids)
+        if not ids:
+            return frozenset()
+        try:
+            rows = self.db.query(self.model.id).filter(self.model.id.in_(ids)).all()
+            return frozenset(row[0] for row in rows)
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error checking existence of {self.model.__name__} IDs: {e}")
+            return frozenset()
+    
     async def bulk_create(self, data_list: List[Dict[str, Any]]) -> List[T]:
         """Create multiple entities in bulk"""
         try:
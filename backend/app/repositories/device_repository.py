@@ -1,10 +1,10 @@
 """
 Device repository for data access
 """
-from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Set, Tuple
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, update
 from app.repositories.base_repository import BaseRepository
 from app.schemas.database import Device, Payload, TargetSystem
 
@@ -13,28 +13,42 @@ class DeviceRepository(BaseRepository[Device]):
     def __init__(self, db: Session):
         super().__init__(db, Device)
     
-    async def get_by_project_id(self, project_id: str, skip: int = 0, limit: int = 100) -> List[Device]:
-        """Get all devices for a project with pagination"""
+    async def get_by_project_id(
+        self, project_id: str, skip: int = 0, limit: int = 100, load_relations: bool = False
+    ) -> List[Device]:
+        """Get all devices for a project with pagination
+        
+        With load_relations, payloads and target systems are eager-loaded with one
+        extra IN query per relationship instead of one query per device.
+        """
         try:
-            return (
-                self.db.query(Device)
-                .filter(Device.project_id == project_id)
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
+            query = self.db.query(Device).filter(Device.project_id == project_id)
+            if load_relations:
+                query = query.options(
+                    selectinload(Device.payload),
+                    selectinload(Device.target_system)
+                )
+            return query.offset(skip).limit(limit).all()
         except SQLAlchemyError as e:
             self.logger.error(f"Error getting devices for project {project_id}: {e}")
             return []
     
-    async def get_enabled_by_project_id(self, project_id: str) -> List[Device]:
-        """Get all enabled devices for a project"""
+    async def get_enabled_by_project_id(self, project_id: str, load_relations: bool = False) -> List[Device]:
+        """Get all enabled devices for a project
+        
+        The filter is served by the (project_id, is_enabled) index. With
+        load_relations, payloads and target systems are eager-loaded.
+        """
         try:
-            return (
-                self.db.query(Device)
-                .filter(and_(Device.project_id == project_id, Device.is_enabled == True))
-                .all()
+            query = self.db.query(Device).filter(
+                and_(Device.project_id == project_id, Device.is_enabled.is_(True))
             )
+            if load_relations:
+                query = query.options(
+                    selectinload(Device.payload),
+                    selectinload(Device.target_system)
+                )
+            return query.all()
         except SQLAlchemyError as e:
             self.logger.error(f"Error getting enabled devices for project {project_id}: {e}")
             return []
@@ -71,6 +85,26 @@ class DeviceRepository(BaseRepository[Device]):
             self.logger.error(f"Error getting devices with relations for project {project_id}: {e}")
             return []
     
+    async def get_project_devices_with_refs(
+        self, project_id: str
+    ) -> List[Tuple[Device, Optional[str], Optional[str]]]:
+        """Get devices for a project with the IDs of their existing payload and target system
+        
+        Uses a single outer-joined query; the payload or target ID is None when the
+        device has no reference or the referenced row no longer exists.
+        """
+        try:
+            return (
+                self.db.query(Device, Payload.id, TargetSystem.id)
+                .outerjoin(Payload, Device.payload_id == Payload.id)
+                .outerjoin(TargetSystem, Device.target_system_id == TargetSystem.id)
+                .filter(Device.project_id == project_id)
+                .all()
+            )
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error getting devices with references for project {project_id}: {e}")
+            return []
+    
     async def count_by_project_id(self, project_id: str) -> int:
         """Count devices in a project"""
         try:
@@ -136,15 +170,32 @@ class DeviceRepository(BaseRepository[Device]):
             self.logger.error(f"Error searching devices by name in project {project_id}: {e}")
             return []
     
+    async def get_project_ids(self, device_ids: List[str]) -> Set[str]:
+        """Get the IDs of the projects owning the given devices"""
+        if not device_ids:
+            return set()
+        
+        try:
+            rows = self.db.query(Device.project_id).filter(Device.id.in_(device_ids)).distinct()
+            return {project_id for (project_id,) in rows}
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error getting project IDs of devices: {e}")
+            return set()
+    
     async def bulk_update_enabled_status(self, device_ids: List[str], is_enabled: bool) -> int:
-        """Bulk update enabled status for multiple devices"""
+        """Bulk update enabled status for multiple devices with a single UPDATE statement"""
+        if not device_ids:
+            return 0
+        
         try:
-            updated_count = (
-                self.db.query(Device)
-                .filter(Device.id.in_(device_ids))
-                .update({"is_enabled": is_enabled}, synchronize_session=False)
+            result = self.db.execute(
+                update(Device)
+                .where(Device.id.in_(device_ids))
+                .values(is_enabled=is_enabled)
+                .execution_options(synchronize_session=False)
             )
             self.db.commit()
+            updated_count = result.rowcount
             self.logger.info(f"Bulk updated {updated_count} devices enabled status to {is_enabled}")
             return updated_count
         except SQLAlchemyError as e:
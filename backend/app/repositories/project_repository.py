@@ -1,12 +1,13 @@
 """
 Project repository for data access
 """
-from typing import Optional, List
+from datetime import datetime, timezone
+from typing import Iterable, Optional, List, Dict
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func
+from sqlalchemy import func, literal, select, union_all, update
 from app.repositories.base_repository import BaseRepository
-from app.schemas.database import Project, Device
+from app.schemas.database import Project, Device, Payload, TargetSystem
 
 
 class ProjectRepository(BaseRepository[Project]):
@@ -26,6 +27,28 @@ class ProjectRepository(BaseRepository[Project]):
             self.logger.error(f"Error getting project with devices {project_id}: {e}")
             return None
     
+    async def touch(self, project_ids: Iterable[str]) -> None:
+        """Bump updated_at on projects whose devices changed
+        
+        Set from Python rather than the database clock so two changes within
+        the same second still produce different values.
+        """
+        project_ids = list(project_ids)
+        if not project_ids:
+            return
+        
+        try:
+            self.db.execute(
+                update(Project)
+                .where(Project.id.in_(project_ids))
+                .values(updated_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            self.logger.error(f"Error touching projects {project_ids}: {e}")
+    
     async def get_by_name(self, name: str) -> Optional[Project]:
         """Get project by name"""
         try:
@@ -96,4 +119,35 @@ class ProjectRepository(BaseRepository[Project]):
             return query.first() is not None
         except SQLAlchemyError as e:
             self.logger.error(f"Error checking if project name exists {name}: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    async def validate_refs(
+        self,
+        project_id: Optional[str],
+        payload_id: Optional[str] = None,
+        target_id: Optional[str] = None
+    ) -> Dict[str, bool]:
+        """Check which of the given device references exist, in a single query"""
+        refs = {'project': False, 'payload': False, 'target_system': False}
+        lookups = [
+            (kind, model, ref_id)
+            for kind, model, ref_id in (
+                ('project', Project, project_id),
+                ('payload', Payload, payload_id),
+                ('target_system', TargetSystem, target_id),
+            )
+            if ref_id
+        ]
+        if not lookups:
+            return refs
+        
+        try:
+            query = union_all(*(
+                select(literal(kind)).where(model.id == ref_id)
+                for kind, model, ref_id in lookups
+            ))
+            for (kind,) in self.db.execute(query):
+                refs[kind] = True
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error validating device references: {e}")
+        return refs
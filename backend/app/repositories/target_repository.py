@@ -1,9 +1,10 @@
 """
 Target System repository for data access
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import func
 from app.repositories.base_repository import BaseRepository
 from app.schemas.database import TargetSystem
 from app.models.target import TargetType
@@ -74,6 +75,19 @@ class TargetSystemRepository(BaseRepository[TargetSystem]):
             self.logger.error(f"Error counting target systems by type {target_type}: {e}")
             return 0
     
+    async def count_grouped_by_type(self) -> Dict[TargetType, int]:
+        """Count target systems per type in a single query"""
+        try:
+            rows = (
+                self.db.query(TargetSystem.type, func.count(TargetSystem.id))
+                .group_by(TargetSystem.type)
+                .all()
+            )
+            return {TargetType(target_type): count for target_type, count in rows}
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error counting target systems by type: {e}")
+            return {}
+    
     async def name_exists(self, name: str, exclude_id: Optional[str] = None) -> bool:
         """Check if target system name already exists"""
         try:
@@ -2,9 +2,10 @@
 Service for managing target system connectors
 """
 from typing import Dict, Any, List
-from app.simulation.connectors import ConnectorFactory, TargetConnector
+from app.simulation.connectors import ConnectorFactory, TargetConnector, resolve_target_type
 from app.models.target import TargetType
 from app.repositories.target_repository import TargetSystemRepository
+from app.utils.logger import app_logger
 
 
 class ConnectorService:
@@ -32,11 +33,20 @@ class ConnectorService:
         if not target_system:
             raise ValueError(f"Target system not found: {target_system_id}")
         
-        # Create connector using factory
-        target_type = TargetType(target_system.type)
-        connector = ConnectorFactory.create_connector(target_type, target_system.config)
+        return self.create_connector_for_target(target_system)
+    
+    def create_connector_for_target(self, target_system) -> TargetConnector:
+        """
+        Create a connector for an already loaded target system
         
-        return connector
+        Args:
+            target_system: Target system entity
+            
+        Returns:
+            TargetConnector instance
+        """
+        target_type = TargetType(target_system.type)
+        return ConnectorFactory.create_connector(target_type, target_system.config)
     
     async def get_or_create_connector(self, target_system_id: str) -> TargetConnector:
         """
@@ -74,7 +84,7 @@ class ConnectorService:
             connector = await self.get_or_create_connector(target_system_id)
             return await connector.connect()
         except Exception as e:
-            print(f"Failed to connect to target {target_system_id}: {e}")
+            app_logger.warning("Failed to connect to target %s: %s", target_system_id, e)
             return False
     
     async def send_to_target(self, target_system_id: str, payload: Dict[str, Any]) -> bool:
@@ -92,7 +102,7 @@ class ConnectorService:
             connector = await self.get_or_create_connector(target_system_id)
             return await connector.send(payload)
         except Exception as e:
-            print(f"Failed to send to target {target_system_id}: {e}")
+            app_logger.warning("Failed to send to target %s: %s", target_system_id, e)
             return False
     
     async def disconnect_target(self, target_system_id: str):
@@ -107,7 +117,7 @@ class ConnectorService:
             try:
                 await connector.disconnect()
             except Exception as e:
-                print(f"Error disconnecting from target {target_system_id}: {e}")
+                app_logger.warning("Error disconnecting from target %s: %s", target_system_id, e)
             finally:
                 del self._active_connectors[target_system_id]
     
@@ -188,7 +198,7 @@ class ConnectorService:
             Configuration schema dictionary
         """
         try:
-            target_enum = TargetType(target_type.lower())
+            target_enum = resolve_target_type(target_type)
             return ConnectorFactory.get_config_schema(target_enum)
         except ValueError:
             return {}
@@ -207,7 +217,7 @@ class ConnectorService:
         Raises:
             ValueError: If configuration is invalid
         """
-        target_enum = TargetType(target_type.lower())
+        target_enum = resolve_target_type(target_type)
         return ConnectorFactory.validate_config(target_enum, config)
     
     def get_active_connections(self) -> List[str]:
@@ -0,0 +1,53 @@
+"""
+Shared error handling for service methods
+"""
+import copy
+import functools
+import inspect
+import reprlib
+from typing import Any, Callable
+from sqlalchemy.exc import SQLAlchemyError
+
+
+def handle_service_errors(default: Any = None) -> Callable:
+    """
+    Decorator for async service methods that turns expected failures into a fallback value
+    
+    Only database errors and value errors are handled here; they are logged with
+    their traceback and the method returns a copy of ``default``. Anything else
+    propagates to the API error handling middleware.
+    
+    Only ID arguments (``*_id`` / ``*_ids``) make it into the log: the rest can
+    carry user code or target credentials.
+    
+    Args:
+        default: Value returned when the wrapped method fails
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            try:
+                return await func(self, *args, **kwargs)
+            except (SQLAlchemyError, ValueError):
+                self.logger.exception(
+                    "Error in %s.%s (%s)",
+                    type(self).__name__, func.__name__, _describe_ids(signature, (self, *args), kwargs)
+                )
+                return copy.copy(default)
+        return wrapper
+    return decorator
+
+
+def _describe_ids(signature: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    """Format the ID arguments of a call, with long values shortened"""
+    try:
+        arguments = signature.bind_partial(*args, **kwargs).arguments
+    except TypeError:
+        return ""
+    return ", ".join(
+        f"{name}={reprlib.repr(value)}"
+        for name, value in arguments.items()
+        if name.endswith(('_id', '_ids'))
+    )
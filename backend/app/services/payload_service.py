@@ -6,137 +6,129 @@ from sqlalchemy.orm import Session
 from app.repositories.payload_repository import PayloadRepository
 from app.repositories.device_repository import DeviceRepository
 from app.models.payload import PayloadCreate, PayloadResponse, PayloadUpdate, PayloadType
+from app.schemas.database import Payload
+from app.simulation.payload_generators.json_builder import JsonBuilderGenerator
+from app.simulation.payload_generators.python_runner import PythonCodeGenerator
+from app.utils.cache import VersionedLRUCache
+from app.services.error_handling import handle_service_errors
 from app.utils.logger import app_logger
 
 
+# Serialized responses for hot read endpoints, keyed by (id, created_at).
+# Payload rows carry no updated_at, so writes go through invalidate(), which
+# only clears this process; the TTL bounds how long other workers keep
+# serving a payload's old response.
+PAYLOAD_CACHE_TTL = 60.0
+_payload_response_cache = VersionedLRUCache(maxsize=2048, ttl=PAYLOAD_CACHE_TTL)
+
+
+def _serialize_payload(payload: Payload) -> PayloadResponse:
+    """Build (or reuse) the API response model for a payload row"""
+    return _payload_response_cache.get_or_create(
+        payload.id, payload.created_at, lambda: PayloadResponse.from_orm(payload)
+    )
+
+
 class PayloadService:
     def __init__(self, db: Session):
         self.repository = PayloadRepository(db)
         self.device_repository = DeviceRepository(db)
         self.logger = app_logger
     
+    @handle_service_errors(default=[])
     async def get_all_payloads(self, skip: int = 0, limit: int = 100) -> List[PayloadResponse]:
         """Get all payloads with pagination"""
-        try:
-            payloads = await self.repository.get_all(skip, limit)
-            return [PayloadResponse.from_orm(payload) for payload in payloads]
-        except Exception as e:
-            self.logger.error(f"Error getting all payloads: {e}")
-            return []
+        payloads = await self.repository.get_all(skip, limit)
+        return [_serialize_payload(payload) for payload in payloads]
     
+    @handle_service_errors()
     async def get_payload_by_id(self, payload_id: str) -> Optional[PayloadResponse]:
         """Get payload by ID"""
-        try:
-            payload = await self.repository.get_by_id(payload_id)
-            if payload:
-                return PayloadResponse.from_orm(payload)
-            return None
-        except Exception as e:
-            self.logger.error(f"Error getting payload {payload_id}: {e}")
-            return None
+        payload = await self.repository.get_by_id(payload_id)
+        if payload:
+            return _serialize_payload(payload)
+        return None
     
+    @handle_service_errors()
     async def create_payload(self, payload_data: PayloadCreate) -> Optional[PayloadResponse]:
         """Create a new payload"""
-        try:
-            # Check if name already exists
-            if await self.repository.name_exists(payload_data.name):
-                self.logger.warning(f"Payload name already exists: {payload_data.name}")
-                return None
-            
-            payload = await self.repository.create(payload_data.dict())
-            if payload:
-                self.logger.info(f"Created payload: {payload.name}")
-                return PayloadResponse.from_orm(payload)
-            return None
-        except Exception as e:
-            self.logger.error(f"Error creating payload: {e}")
+        # Check if name already exists
+        if await self.repository.name_exists(payload_data.name):
+            self.logger.warning(f"Payload name already exists: {payload_data.name}")
             return None
+        
+        payload = await self.repository.create(payload_data.dict())
+        if payload:
+            self.logger.info(f"Created payload: {payload.name}")
+            return _serialize_payload(payload)
+        return None
     
+    @handle_service_errors()
     async def update_payload(self, payload_id: str, payload_data: PayloadUpdate) -> Optional[PayloadResponse]:
         """Update a payload"""
-        try:
-            # Filter out None values
-            update_data = {k: v for k, v in payload_data.dict().items() if v is not None}
-            if not update_data:
-                return await self.get_payload_by_id(payload_id)
-            
-            # Check if new name already exists (if name is being updated)
-            if 'name' in update_data:
-                if await self.repository.name_exists(update_data['name'], exclude_id=payload_id):
-                    self.logger.warning(f"Payload name already exists: {update_data['name']}")
-                    return None
-            
-            payload = await self.repository.update(payload_id, update_data)
-            if payload:
-                self.logger.info(f"Updated payload: {payload_id}")
-                return PayloadResponse.from_orm(payload)
-            return None
-        except Exception as e:
-            self.logger.error(f"Error updating payload {payload_id}: {e}")
-            return None
+        # Filter out None values
+        update_data = {k: v for k, v in payload_data.dict().items() if v is not None}
+        if not update_data:
+            return await self.get_payload_by_id(payload_id)
+        
+        # Check if new name already exists (if name is being updated)
+        if 'name' in update_data:
+            if await self.repository.name_exists(update_data['name'], exclude_id=payload_id):
+                self.logger.warning(f"Payload name already exists: {update_data['name']}")
+                return None
+        
+        payload = await self.repository.update(payload_id, update_data)
+        if payload:
+            _payload_response_cache.invalidate(payload_id)
+            self.logger.info(f"Updated payload: {payload_id}")
+            return _serialize_payload(payload)
+        return None
     
+    @handle_service_errors(default=False)
     async def delete_payload(self, payload_id: str) -> bool:
         """Delete a payload"""
-        try:
-            success = await self.repository.delete(payload_id)
-            if success:
-                self.logger.info(f"Deleted payload: {payload_id}")
-            return success
-        except Exception as e:
-            self.logger.error(f"Error deleting payload {payload_id}: {e}")
-            return False
+        success = await self.repository.delete(payload_id)
+        if success:
+            _payload_response_cache.invalidate(payload_id)
+            self.logger.info(f"Deleted payload: {payload_id}")
+        return success
     
+    @handle_service_errors(default=[])
     async def get_payloads_by_type(self, payload_type: PayloadType, skip: int = 0, limit: int = 100) -> List[PayloadResponse]:
         """Get payloads by type"""
-        try:
-            payloads = await self.repository.get_by_type(payload_type, skip, limit)
-            return [PayloadResponse.from_orm(payload) for payload in payloads]
-        except Exception as e:
-            self.logger.error(f"Error getting payloads by type {payload_type}: {e}")
-            return []
+        payloads = await self.repository.get_by_type(payload_type, skip, limit)
+        return [_serialize_payload(payload) for payload in payloads]
     
+    @handle_service_errors(default=[])
     async def search_payloads(self, search_term: str, skip: int = 0, limit: int = 100) -> List[PayloadResponse]:
         """Search payloads by name"""
-        try:
-            payloads = await self.repository.search_by_name(search_term, skip, limit)
-            return [PayloadResponse.from_orm(payload) for payload in payloads]
-        except Exception as e:
-            self.logger.error(f"Error searching payloads: {e}")
-            return []
+        payloads = await self.repository.search_by_name(search_term, skip, limit)
+        return [_serialize_payload(payload) for payload in payloads]
     
+    @handle_service_errors(default=[])
     async def get_recent_payloads(self, limit: int = 10) -> List[PayloadResponse]:
         """Get most recently created payloads"""
-        try:
-            payloads = await self.repository.get_recent_payloads(limit)
-            return [PayloadResponse.from_orm(payload) for payload in payloads]
-        except Exception as e:
-            self.logger.error(f"Error getting recent payloads: {e}")
-            return []
+        payloads = await self.repository.get_recent_payloads(limit)
+        return [_serialize_payload(payload) for payload in payloads]
     
+    @handle_service_errors(default={})
     async def get_payload_stats(self) -> Dict[str, int]:
         """Get payload statistics by type"""
-        try:
-            stats = {}
-            for payload_type in PayloadType:
-                count = await self.repository.count_by_type(payload_type)
-                stats[payload_type.value] = count
-            
-            total = await self.repository.get_count()
-            stats['total'] = total
-            
-            return stats
-        except Exception as e:
-            self.logger.error(f"Error getting payload stats: {e}")
-            return {}
+        stats = {}
+        for payload_type in PayloadType:
+            count = await self.repository.count_by_type(payload_type)
+            stats[payload_type.value] = count
+        
+        total = await self.repository.get_count()
+        stats['total'] = total
+        
+        return stats
     
+    @handle_service_errors(default=False)
     async def is_payload_in_use(self, payload_id: str) -> bool:
         """Check if payload is being used by any devices"""
-        try:
-            devices = await self.device_repository.get_by_payload_id(payload_id)
-            return len(devices) > 0
-        except Exception as e:
-            self.logger.error(f"Error checking if payload is in use {payload_id}: {e}")
-            return False
+        devices = await self.device_repository.get_by_payload_id(payload_id)
+        return len(devices) > 0
     
     async def test_payload_generation(self, payload_id: str, test_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Test payload generation"""
@@ -145,10 +137,6 @@ class PayloadService:
             if not payload:
                 raise ValueError("Payload not found")
             
-            # Import payload generators
-            from app.simulation.payload_generators.json_builder import JsonBuilderGenerator
-            from app.simulation.payload_generators.python_runner import PythonCodeGenerator
-            
             if payload.type == PayloadType.VISUAL:
                 if not payload.schema:
                     raise ValueError("Visual payload missing schema")
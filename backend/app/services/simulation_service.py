@@ -1,25 +1,28 @@
 """
 Enhanced simulation service using connector factory
 """
+import asyncio
 from typing import Dict, List, Optional
-from datetime import datetime
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.repositories.project_repository import ProjectRepository
 from app.repositories.device_repository import DeviceRepository
 from app.repositories.payload_repository import PayloadRepository
 from app.repositories.target_repository import TargetSystemRepository
 from app.services.connector_service import ConnectorService
+from app.simulation.connectors import TargetConnector
 from app.simulation.engine import SimulationEngine, SimulationProject
 from app.simulation.device_simulator import DeviceSimulator
 from app.simulation.payload_generators import PayloadGeneratorFactory
 from app.models.simulation import SimulationStatus, SimulationLogEntry
+from app.utils.logger import app_logger
 
 
 class EnhancedSimulationService:
     """Enhanced simulation service with connector factory integration"""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: Session):
         self.db = db
         self.project_repository = ProjectRepository(db)
         self.device_repository = DeviceRepository(db)
@@ -27,6 +30,7 @@ class EnhancedSimulationService:
         self.target_repository = TargetSystemRepository(db)
         self.connector_service = ConnectorService(self.target_repository)
         self.engine = SimulationEngine.get_instance()
+        self.logger = app_logger
     
     async def start_project_simulation(self, project_id: str) -> bool:
         """
@@ -48,63 +52,118 @@ class EnhancedSimulationService:
             if not project:
                 raise ValueError(f"Project not found: {project_id}")
             
-            devices = await self.device_repository.get_by_project_id(project_id)
+            devices = await self.device_repository.get_enabled_by_project_id(project_id, load_relations=True)
             if not devices:
-                raise ValueError(f"No devices found for project: {project_id}")
+                raise ValueError(f"No enabled devices found for project: {project_id}")
             
             # Create simulation project
             sim_project = SimulationProject(project_id)
-            sim_project.started_at = datetime.utcnow()
+            sim_project.mark_started()
             
-            # Create device simulators
+            # Create device simulators; devices sharing a target share its connector
+            connectors: Dict[str, TargetConnector] = {}
             for device in devices:
-                if not device.is_enabled:
-                    continue
-                
-                try:
-                    # Create payload generator
-                    payload = await self.payload_repository.get_by_id(device.payload_id)
-                    if not payload:
-                        print(f"Payload not found for device {device.id}, skipping")
-                        continue
-                    
-                    payload_generator = PayloadGeneratorFactory.create_generator(
-                        payload.type, payload.config
-                    )
-                    
-                    # Create target connector using connector service
-                    connector = await self.connector_service.create_connector(device.target_system_id)
-                    
-                    # Create device simulator
-                    device_simulator = DeviceSimulator(
-                        device_config=device,
-                        payload_generator=payload_generator,
-                        target_connector=connector,
-                        log_callback=lambda log_entry: sim_project.notify_observers(log_entry)
-                    )
-                    
-                    sim_project.device_simulators.append(device_simulator)
-                    
-                except Exception as e:
-                    print(f"Error creating simulator for device {device.id}: {e}")
-                    continue
+                simulator = self._build_device_simulator(
+                    device, device.payload, device.target_system, sim_project, connectors
+                )
+                if simulator is not None:
+                    sim_project.device_simulators.append(simulator)
             
             if not sim_project.device_simulators:
                 raise ValueError("No valid device simulators could be created")
             
+            # Open each shared connector once instead of once per device
+            used_connectors = {id(s.connector): s.connector for s in sim_project.device_simulators}
+            opened = await asyncio.gather(
+                *(self._open_connector(connector) for connector in used_connectors.values()),
+                return_exceptions=True
+            )
+            connected = {
+                connector_id
+                for connector_id, result in zip(used_connectors, opened)
+                if result is True
+            }
+            for simulator in sim_project.device_simulators:
+                simulator.is_connected = id(simulator.connector) in connected
+            
             # Start simulation
             await sim_project.start_all_devices()
             self.engine.running_projects[project_id] = sim_project
             
-            # Update project status in database
-            await self.project_repository.update(project_id, {"is_running": True})
-            
             return True
             
         except Exception as e:
-            print(f"Error starting simulation for project {project_id}: {e}")
+            self.logger.exception(f"Error starting simulation for project {project_id}: {e}")
             return False
     
+    def _build_device_simulator(
+        self,
+        device,
+        payload,
+        target_system,
+        sim_project: SimulationProject,
+        connectors: Dict[str, TargetConnector]
+    ) -> Optional[DeviceSimulator]:
+        """
+        Build the simulator for a single device
+        
+        Args:
+            device: Device row to simulate
+            payload: Payload assigned to the device, if found
+            target_system: Target system assigned to the device, if found
+            sim_project: Simulation project that receives the device logs
+            connectors: Connectors already created for this project, by target system ID
+            
+        Returns:
+            DeviceSimulator instance, or None if the device cannot be simulated
+        """
+        try:
+            if not payload:
+                self.logger.warning(f"Payload not found for device {device.id}, skipping")
+                return None
+            if not target_system:
+                raise ValueError(f"Target system not found: {device.target_system_id}")
+            
+            # Create payload generator
+            payload_generator = PayloadGeneratorFactory.create_generator(
+                payload.type, payload.config
+            )
+            
+            # Reuse the project's connector for this target, creating it on first use
+            connector = connectors.get(target_system.id)
+            if connector is None:
+                connector = self.connector_service.create_connector_for_target(target_system)
+                connectors[target_system.id] = connector
+            
+            # Create device simulator
+            return DeviceSimulator(
+                device_config=device,
+                payload_generator=payload_generator,
+                target_connector=connector,
+                log_callback=sim_project.notify_observers,
+                shared_connector=True,
+                message_callback=sim_project.record_message_sent,
+                log_level=settings.simulation_log_level,
+                log_sample_rate=settings.simulation_log_sample_rate,
+                log_min_interval=settings.simulation_log_min_interval
+            )
+        except Exception as e:
+            # A misconfigured device is skipped without affecting the others
+            self.logger.exception(f"Error creating simulator for device {device.id}: {e}")
+            return None
+    
+    async def _open_connector(self, connector: TargetConnector) -> bool:
+        """Connect a shared connector, starting auto-reconnection where supported"""
+        if connector.has_auto_reconnect:
+            await connector.start_auto_reconnect()
+        return await connector.connect()
+    
+    async def _close_connector(self, connector: TargetConnector):
+        """Disconnect a shared connector, stopping auto-reconnection where supported"""
+        if connector.has_auto_reconnect:
+            await connector.stop_auto_reconnect()
+        await connector.disconnect()
+    
     async def stop_project_simulation(self, project_id: str) -> bool:
         """
         Stop simulation for a project
@@ -122,44 +181,43 @@ class EnhancedSimulationService:
             sim_project = self.engine.running_projects[project_id]
             await sim_project.stop_all_devices()
             
-            # Disconnect all connectors for this project
-            for simulator in sim_project.device_simulators:
-                try:
-                    await simulator.connector.disconnect()
-                except:
-                    pass  # Ignore disconnect errors
+            # Disconnect each connector used by this project once, concurrently
+            connectors = list({id(s.connector): s.connector for s in sim_project.device_simulators}.values())
+            results = await asyncio.gather(
+                *(self._close_connector(connector) for connector in connectors),
+                return_exceptions=True
+            )
+            for connector, result in zip(connectors, results):
+                if isinstance(result, Exception):
+                    self.logger.warning(f"Error disconnecting {connector.__class__.__name__}: {result}")
             
             del self.engine.running_projects[project_id]
             
-            # Update project status in database
-            await self.project_repository.update(project_id, {"is_running": False})
-            
             return True
             
         except Exception as e:
-            print(f"Error stopping simulation for project {project_id}: {e}")
+            self.logger.exception(f"Error stopping simulation for project {project_id}: {e}")
             return False
     
-    async def get_project_simulation_status(self, project_id: str) -> SimulationStatus:
+    async def get_project_simulation_status(
+        self, project_id: str, include_devices: bool = True
+    ) -> SimulationStatus:
         """
         Get detailed simulation status for a project
         
         Args:
             project_id: ID of the project
+            include_devices: Whether to collect per-device statuses and errors
             
         Returns:
             SimulationStatus object with current status
         """
         if project_id not in self.engine.running_projects:
-            # Get project info from database
-            project = await self.project_repository.get_by_id(project_id)
-            devices = await self.device_repository.get_by_project_id(project_id)
-            
             return SimulationStatus(
                 project_id=project_id,
                 is_running=False,
                 active_devices=0,
-                total_devices=len([d for d in devices if d.is_enabled]) if devices else 0,
+                total_devices=await self.device_repository.count_enabled_by_project_id(project_id),
                 messages_sent=0,
                 devices=[],
                 errors=[]
@@ -169,46 +227,48 @@ class EnhancedSimulationService:
         
         # Collect device statuses
         device_statuses = []
-        total_messages = 0
         errors = []
         
-        for simulator in sim_project.device_simulators:
-            status = simulator.get_status()
-            device_statuses.append(status)
-            total_messages += status.get('messages_sent', 0)
-            
-            if status.get('error'):
-                errors.append({
-                    'device_id': status['device_id'],
-                    'device_name': status['device_name'],
-                    'error': status['error']
-                })
+        if include_devices:
+            for simulator in sim_project.device_simulators:
+                status = simulator.get_status()
+                device_statuses.append(status)
+                
+                if status.get('error'):
+                    errors.append({
+                        'device_id': status['device_id'],
+                        'device_name': status['device_name'],
+                        'error': status['error']
+                    })
         
         return SimulationStatus(
             project_id=project_id,
             is_running=sim_project.is_running,
-            active_devices=len([s for s in sim_project.device_simulators if s.is_running]),
+            active_devices=sim_project.active_devices,
             total_devices=len(sim_project.device_simulators),
-            messages_sent=total_messages,
+            messages_sent=sim_project.messages_sent,
             started_at=sim_project.started_at,
+            uptime_seconds=sim_project.uptime_seconds,
             devices=device_statuses,
             errors=errors
         )
     
-    async def get_all_simulations_status(self) -> List[SimulationStatus]:
+    async def get_all_simulations_status(self, include_devices: bool = True) -> List[SimulationStatus]:
         """
         Get status of all running simulations
         
+        Args:
+            include_devices: Whether to collect per-device statuses and errors
+            
         Returns:
             List of SimulationStatus objects
         """
-        statuses = []
-        
-        for project_id in self.engine.running_projects.keys():
-            status = await self.get_project_simulation_status(project_id)
-            statuses.append(status)
-        
-        return statuses
+        return list(await asyncio.gather(
+            *(
+                self.get_project_simulation_status(project_id, include_devices)
+                for project_id in list(self.engine.running_projects)
+            )
+        ))
     
     async def emergency_stop_all(self) -> List[str]:
         """
@@ -217,20 +277,21 @@ class EnhancedSimulationService:
         Returns:
             List of project IDs that were stopped
         """
-        stopped_projects = []
-        
         # Get list of running projects to avoid modifying dict during iteration
         running_project_ids = list(self.engine.running_projects.keys())
         
-        for project_id in running_project_ids:
-            try:
-                success = await self.stop_project_simulation(project_id)
-                if success:
-                    stopped_projects.append(project_id)
-            except Exception as e:
-                print(f"Error stopping project {project_id} during emergency stop: {e}")
-                # Continue with other projects even if one fails
-                continue
+        # Stop all projects concurrently; a failure in one does not affect the others
+        results = await asyncio.gather(
+            *(self.stop_project_simulation(project_id) for project_id in running_project_ids),
+            return_exceptions=True
+        )
+        
+        stopped_projects = []
+        for project_id, result in zip(running_project_ids, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error stopping project {project_id} during emergency stop: {result}")
+            elif result is True:
+                stopped_projects.append(project_id)
         
         return stopped_projects
     
@@ -253,8 +314,8 @@ class EnhancedSimulationService:
                     'warnings': []
                 }
             
-            devices = await self.device_repository.get_by_project_id(project_id)
-            if not devices:
+            rows = await self.device_repository.get_project_devices_with_refs(project_id)
+            if not rows:
                 return {
                     'valid': False,
                     'errors': ['No devices found in project'],
@@ -265,17 +326,15 @@ class EnhancedSimulationService:
             warnings = []
             valid_devices = 0
             
-            for device in devices:
-                if not device.is_enabled:
-                    continue
-                
+            enabled_rows = [row for row in rows if row[0].is_enabled]
+            
+            for device, payload_id, target_system_id in enabled_rows:
                 # Check payload
                 if not device.payload_id:
                     errors.append(f"Device '{device.name}' has no payload generator assigned")
                     continue
                 
-                payload = await self.payload_repository.get_by_id(device.payload_id)
-                if not payload:
+                if payload_id is None:
                     errors.append(f"Device '{device.name}' has invalid payload generator")
                     continue
                 
@@ -284,8 +343,7 @@ class EnhancedSimulationService:
                     errors.append(f"Device '{device.name}' has no target system assigned")
                     continue
                 
-                target = await self.target_repository.get_by_id(device.target_system_id)
-                if not target:
+                if target_system_id is None:
                     errors.append(f"Device '{device.name}' has invalid target system")
                     continue
                 
@@ -307,7 +365,7 @@ class EnhancedSimulationService:
                 'errors': errors,
                 'warnings': warnings,
                 'valid_devices': valid_devices,
-                'total_devices': len([d for d in devices if d.is_enabled])
+                'total_devices': len(enabled_rows)
             }
             
         except Exception as e:
@@ -317,6 +375,30 @@ class EnhancedSimulationService:
                 'warnings': []
             }
     
+    async def test_project_devices(self, project_id: str, max_concurrent: int = 8) -> Dict[str, Dict[str, any]]:
+        """
+        Test the configuration of every enabled device in a project
+        
+        Device tests run concurrently, with at most max_concurrent target
+        connections open at a time.
+        
+        Args:
+            project_id: ID of the project whose devices are tested
+            max_concurrent: Maximum number of device tests running at once
+            
+        Returns:
+            Dictionary of test results keyed by device ID
+        """
+        devices = await self.device_repository.get_enabled_by_project_id(project_id)
+        semaphore = asyncio.Semaphore(max_concurrent)
+        
+        async def test_device(device_id: str) -> Dict[str, any]:
+            async with semaphore:
+                return await self.test_device_configuration(device_id)
+        
+        results = await asyncio.gather(*(test_device(device.id) for device in devices))
+        return {device.id: result for device, result in zip(devices, results)}
+    
     async def test_device_configuration(self, device_id: str) -> Dict[str, any]:
         """
         Test configuration for a specific device
@@ -1,7 +1,10 @@
 """
 Validation service for business logic validation
 """
-from typing import Dict, Any, List, Optional
+import ast
+import json
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from app.repositories.project_repository import ProjectRepository
 from app.repositories.device_repository import DeviceRepository
@@ -12,8 +15,67 @@ from app.models.payload import PayloadType
 from app.utils.logger import app_logger
 
 
+_MQTT_REQUIRED_FIELDS = frozenset({'host', 'port', 'topic'})
+_KAFKA_REQUIRED_FIELDS = frozenset({'bootstrap_servers', 'topic'})
+_HTTP_METHODS = frozenset({'GET', 'POST', 'PUT', 'PATCH', 'DELETE'})
+_WEBSOCKET_SCHEMES = ('ws://', 'wss://')
+
+
+@lru_cache(maxsize=1024)
+def _compile_check(code: str) -> Tuple[str, ...]:
+    """Check Python code syntax, memoized since payload code rarely changes"""
+    try:
+        ast.parse(code, filename='<payload>')
+    except SyntaxError as e:
+        return (f"Python syntax error: {e}",)
+    except Exception as e:
+        return (f"Python code error: {e}",)
+    return ()
+
+
+def _check_schema(schema: Any) -> Tuple[str, ...]:
+    """Validate payload schema structure"""
+    errors = []
+    
+    if not isinstance(schema, dict):
+        errors.append("Schema must be a dictionary")
+        return tuple(errors)
+    
+    if 'fields' not in schema:
+        errors.append("Schema must contain 'fields' array")
+        return tuple(errors)
+    
+    fields = schema['fields']
+    if not isinstance(fields, list):
+        errors.append("Schema fields must be an array")
+        return tuple(errors)
+    
+    for i, field in enumerate(fields):
+        if not isinstance(field, dict):
+            errors.append(f"Field {i} must be a dictionary")
+            continue
+        
+        if 'name' not in field:
+            errors.append(f"Field {i} missing 'name'")
+        
+        if 'type' not in field:
+            errors.append(f"Field {i} missing 'type'")
+        
+        if 'generator' not in field:
+            errors.append(f"Field {i} missing 'generator'")
+    
+    return tuple(errors)
+
+
+@lru_cache(maxsize=256)
+def _cached_schema_check(schema_key: str) -> Tuple[str, ...]:
+    """Validate a schema from its canonical JSON form, reusing results for unchanged schemas"""
+    return _check_schema(json.loads(schema_key))
+
+
 class ValidationError(Exception):
     """Custom validation error"""
+    
     def __init__(self, message: str, field: Optional[str] = None):
         self.message = message
         self.field = field
@@ -29,6 +91,18 @@ class ValidationService:
         self.payload_repository = PayloadRepository(db)
         self.target_repository = TargetSystemRepository(db)
         self.logger = app_logger
+        
+        # Type-specific validators: (required field, missing message, validator)
+        self._payload_validators: Dict[PayloadType, Tuple[str, str, Callable[[Any], List[str]]]] = {
+            PayloadType.VISUAL: ('schema', "Schema is required for visual payloads", self._validate_payload_schema),
+            PayloadType.PYTHON: ('python_code', "Python code is required for python payloads", self._validate_python_code),
+        }
+        self._target_validators: Dict[TargetType, Callable[[Dict[str, Any]], List[str]]] = {
+            TargetType.MQTT: self._validate_mqtt_config,
+            TargetType.HTTP: self._validate_http_config,
+            TargetType.KAFKA: self._validate_kafka_config,
+            TargetType.WEBSOCKET: self._validate_websocket_config,
+        }
     
     async def validate_project_creation(self, project_data: Dict[str, Any]) -> List[str]:
         """Validate project creation data"""
@@ -59,24 +133,51 @@ class ValidationService:
     async def validate_device_creation(self, device_data: Dict[str, Any]) -> List[str]:
         """Validate device creation data"""
         errors = []
-        
-        # Check if project exists
         project_id = device_data.get('project_id')
-        if not project_id or not await self.project_repository.exists(project_id):
-            errors.append("Project not found")
-        
-        # Check if payload exists (if provided)
         payload_id = device_data.get('payload_id')
-        if payload_id and not await self.payload_repository.exists(payload_id):
-            errors.append("Payload not found")
-        
-        # Check if target system exists (if provided)
         target_id = device_data.get('target_system_id')
-        if target_id and not await self.target_repository.exists(target_id):
+        
+        # Resolve all references in one round-trip
+        refs = await self.project_repository.validate_refs(project_id, payload_id, target_id)
+        
+        if not refs['project']:
+            errors.append("Project not found")
+        if payload_id and not refs['payload']:
+            errors.append("Payload not found")
+        if target_id and not refs['target_system']:
             errors.append("Target system not found")
         
         return errors
     
+    async def validate_devices_creation(self, batch: List[Dict[str, Any]]) -> List[List[str]]:
+        """Validate a batch of device creation data, returning the errors for each device"""
+        project_ids = {d['project_id'] for d in batch if d.get('project_id')}
+        payload_ids = {d['payload_id'] for d in batch if d.get('payload_id')}
+        target_ids = {d['target_system_id'] for d in batch if d.get('target_system_id')}
+        
+        # One existence query per repository instead of one per device
+        existing_projects = await self.project_repository.exists_many(project_ids)
+        existing_payloads = await self.payload_repository.exists_many(payload_ids)
+        existing_targets = await self.target_repository.exists_many(target_ids)
+        
+        results = []
+        for device_data in batch:
+            errors = []
+            if device_data.get('project_id') not in existing_projects:
+                errors.append("Project not found")
+            
+            payload_id = device_data.get('payload_id')
+            if payload_id and payload_id not in existing_payloads:
+                errors.append("Payload not found")
+            
+            target_id = device_data.get('target_system_id')
+            if target_id and target_id not in existing_targets:
+                errors.append("Target system not found")
+            
+            results.append(errors)
+        
+        return results
+    
     async def validate_device_update(self, device_id: str, device_data: Dict[str, Any]) -> List[str]:
         """Validate device update data"""
         errors = []
@@ -86,14 +187,14 @@ class ValidationService:
             errors.append("Device not found")
             return errors
         
-        # Check if payload exists (if being updated)
-        if 'payload_id' in device_data and device_data['payload_id']:
-            if not await self.payload_repository.exists(device_data['payload_id']):
+        # Check the payload and target system being assigned, in one query
+        payload_id = device_data.get('payload_id')
+        target_id = device_data.get('target_system_id')
+        if payload_id or target_id:
+            refs = await self.project_repository.validate_refs(None, payload_id, target_id)
+            if payload_id and not refs['payload']:
                 errors.append("Payload not found")
-        
-        # Check if target system exists (if being updated)
-        if 'target_system_id' in device_data and device_data['target_system_id']:
-            if not await self.target_repository.exists(device_data['target_system_id']):
+            if target_id and not refs['target_system']:
                 errors.append("Target system not found")
         
         return errors
@@ -107,19 +208,13 @@ class ValidationService:
             errors.append("Payload name already exists")
         
         # Validate payload type specific requirements
-        payload_type = payload_data.get('type')
-        if payload_type == PayloadType.VISUAL:
-            if not payload_data.get('schema'):
-                errors.append("Schema is required for visual payloads")
+        payload_validator = self._payload_validators.get(payload_data.get('type'))
+        if payload_validator:
+            field, missing_message, validate = payload_validator
+            if not payload_data.get(field):
+                errors.append(missing_message)
             else:
-                schema_errors = self._validate_payload_schema(payload_data['schema'])
-                errors.extend(schema_errors)
-        elif payload_type == PayloadType.PYTHON:
-            if not payload_data.get('python_code'):
-                errors.append("Python code is required for python payloads")
-            else:
-                code_errors = self._validate_python_code(payload_data['python_code'])
-                errors.extend(code_errors)
+                errors.extend(validate(payload_data[field]))
         
         return errors
     
@@ -161,18 +256,9 @@ class ValidationService:
         target_type = target_data.get('type')
         config = target_data.get('config', {})
         
-        if target_type == TargetType.MQTT:
-            config_errors = self._validate_mqtt_config(config)
-            errors.extend(config_errors)
-        elif target_type == TargetType.HTTP:
-            config_errors = self._validate_http_config(config)
-            errors.extend(config_errors)
-        elif target_type == TargetType.KAFKA:
-            config_errors = self._validate_kafka_config(config)
-            errors.extend(config_errors)
-        elif target_type == TargetType.WEBSOCKET:
-            config_errors = self._validate_websocket_config(config)
-            errors.extend(config_errors)
+        config_validator = self._target_validators.get(target_type)
+        if config_validator:
+            errors.extend(config_validator(config))
         
         return errors
     
@@ -194,58 +280,22 @@ class ValidationService:
     
     def _validate_payload_schema(self, schema: Dict[str, Any]) -> List[str]:
         """Validate payload schema structure"""
-        errors = []
-        
-        if not isinstance(schema, dict):
-            errors.append("Schema must be a dictionary")
-            return errors
-        
-        if 'fields' not in schema:
-            errors.append("Schema must contain 'fields' array")
-            return errors
-        
-        fields = schema['fields']
-        if not isinstance(fields, list):
-            errors.append("Schema fields must be an array")
-            return errors
-        
-        for i, field in enumerate(fields):
-            if not isinstance(field, dict):
-                errors.append(f"Field {i} must be a dictionary")
-                continue
-            
-            if 'name' not in field:
-                errors.append(f"Field {i} missing 'name'")
-            
-            if 'type' not in field:
-                errors.append(f"Field {i} missing 'type'")
-            
-            if 'generator' not in field:
-                errors.append(f"Field {i} missing 'generator'")
-        
-        return errors
+        try:
+            schema_key = json.dumps(schema, sort_keys=True)
+        except (TypeError, ValueError):
+            return list(_check_schema(schema))
+        return list(_cached_schema_check(schema_key))
     
     def _validate_python_code(self, code: str) -> List[str]:
         """Validate Python code syntax"""
-        errors = []
-        
-        try:
-            compile(code, '<string>', 'exec')
-        except SyntaxError as e:
-            errors.append(f"Python syntax error: {e}")
-        except Exception as e:
-            errors.append(f"Python code error: {e}")
-        
-        return errors
+        return list(_compile_check(code))
     
     def _validate_mqtt_config(self, config: Dict[str, Any]) -> List[str]:
         """Validate MQTT configuration"""
-        errors = []
-        required_fields = ['host', 'port', 'topic']
-        
-        for field in required_fields:
-            if field not in config:
-                errors.append(f"MQTT configuration missing '{field}'")
+        errors = [
+            f"MQTT configuration missing '{field}'"
+            for field in sorted(_MQTT_REQUIRED_FIELDS.difference(config))
+        ]
         
         if 'port' in config:
             port = config['port']
@@ -263,21 +313,17 @@ class ValidationService:
         
         if 'method' in config:
             method = config['method'].upper()
-            if method not in ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']:
+            if method not in _HTTP_METHODS:
                 errors.append("Invalid HTTP method")
         
         return errors
     
     def _validate_kafka_config(self, config: Dict[str, Any]) -> List[str]:
         """Validate Kafka configuration"""
-        errors = []
-        required_fields = ['bootstrap_servers', 'topic']
-        
-        for field in required_fields:
-            if field not in config:
-                errors.append(f"Kafka configuration missing '{field}'")
-        
-        return errors
+        return [
+            f"Kafka configuration missing '{field}'"
+            for field in sorted(_KAFKA_REQUIRED_FIELDS.difference(config))
+        ]
     
     def _validate_websocket_config(self, config: Dict[str, Any]) -> List[str]:
         """Validate WebSocket configuration"""
@@ -287,7 +333,7 @@ class ValidationService:
             errors.append("WebSocket configuration missing 'url'")
         else:
             url = config['url']
-            if not (url.startswith('ws://') or url.startswith('wss://')):
+            if not url.startswith(_WEBSOCKET_SCHEMES):
                 errors.append("WebSocket URL must start with ws:// or wss://")
         
         return errors
\ No newline at end of file
@@ -7,7 +7,7 @@ from .mqtt_connector import MQTTConnector
 from .websocket_connector import WebSocketConnector
 # from .ftp_connector import FTPConnector
 from .pubsub_connector import PubSubConnector
-from .connector_factory import ConnectorFactory, create_connector, get_supported_connector_types
+from .connector_factory import ConnectorFactory, create_connector, get_supported_connector_types, resolve_target_type
 
 __all__ = [
     'TargetConnector',
@@ -19,5 +19,6 @@ __all__ = [
     'PubSubConnector',
     'ConnectorFactory',
     'create_connector',
-    'get_supported_connector_types'
+    'get_supported_connector_types',
+    'resolve_target_type'
 ]
\ No newline at end of file
@@ -1,13 +1,30 @@
 """
 Base target connector interface
 """
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from app.utils.serialization import dumps_payload
 
 
 class TargetConnector(ABC):
     """Abstract base class for target system connectors"""
     
+    # Lets connectors that declare __slots__ actually drop the instance __dict__.
+    # Kept empty so connectors can also mix in other slotted bases
+    # (ResilientConnector); slotted connectors must list every attribute
+    # __init__ below assigns ('_connecting') in their own __slots__.
+    __slots__ = ()
+    
+    # Set by connectors that keep themselves connected (start_auto_reconnect /
+    # stop_auto_reconnect) and retry failed sends internally
+    has_auto_reconnect: bool = False
+    handles_own_retry: bool = False
+    
+    def __init__(self):
+        # connect() attempt shared by concurrent senders, see _reconnect()
+        self._connecting: Optional["asyncio.Future[bool]"] = None
+    
     @abstractmethod
     async def connect(self) -> bool:
         """
@@ -19,21 +36,79 @@ class TargetConnector(ABC):
         pass
     
     @abstractmethod
-    async def send(self, payload: Dict[str, Any]) -> bool:
+    async def send(self, payload: Dict[str, Any], pre_encoded: Optional[bytes] = None) -> bool:
         """
         Send payload to the target system
         
         Args:
             payload: Dictionary representing the JSON payload
+            pre_encoded: Result of encode(payload), sent as-is instead of
+                serializing the payload again
             
         Returns:
             True if send successful, False otherwise
         """
         pass
     
+    async def encode(self, payload: Dict[str, Any]) -> bytes:
+        """
+        Serialize a payload to the bytes send() would write for it
+        
+        Connectors that add fields or use another wire format override this.
+        """
+        return dumps_payload(payload)
+    
+    async def send_batch(self, payloads: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Send several payloads to the target system
+        
+        Connectors that can pipeline requests override this; the default
+        sends the payloads one after another.
+        
+        Args:
+            payloads: Payloads to send, in order
+            
+        Returns:
+            The send result for each payload
+        """
+        return [await self.send(payload) for payload in payloads]
+    
+    async def _reconnect(self) -> bool:
+        """
+        Connect from a send path, joining an attempt already in flight
+        
+        When a connection drops every concurrent send notices at once; only
+        the first caller runs connect() and the others await its result.
+        
+        Returns:
+            True if connection successful, False otherwise
+        """
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self.connect())
+            self._connecting.add_done_callback(self._connect_finished)
+        # Shielded so one cancelled sender does not abort the attempt for the rest
+        return await asyncio.shield(self._connecting)
+    
+    def _connect_finished(self, attempt: "asyncio.Future[bool]"):
+        """Allow a new connect attempt once the shared one has finished"""
+        if self._connecting is attempt:
+            self._connecting = None
+    
     @abstractmethod
     async def disconnect(self):
         """
         Close connection to the target system
         """
-        pass
\ No newline at end of file
+        pass
+    
+    async def start_auto_reconnect(self):
+        """Start keeping the connection alive, for connectors with has_auto_reconnect"""
+        pass
+    
+    async def stop_auto_reconnect(self):
+        """Stop keeping the connection alive"""
+        pass
+    
+    def get_connection_stats(self) -> Optional[Dict[str, Any]]:
+        """Connection statistics for monitoring, for connectors that track them"""
+        return None
@@ -2,9 +2,11 @@
 Circuit breaker pattern implementation for target connectors
 """
 import asyncio
+import time
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Callable, Any, Optional
+from app.utils.logger import app_logger
 
 
 class CircuitState(Enum):
@@ -18,6 +20,15 @@ class CircuitBreaker:
     Circuit breaker implementation to prevent cascading failures
     """
     
+    __slots__ = (
+        'failure_threshold',
+        'recovery_timeout',
+        'expected_exception',
+        'failure_count',
+        'last_failure_time',
+        'state',
+    )
+    
     def __init__(
         self,
         failure_threshold: int = 5,
@@ -29,7 +40,8 @@ class CircuitBreaker:
         self.expected_exception = expected_exception
         
         self.failure_count = 0
-        self.last_failure_time: Optional[datetime] = None
+        # time.monotonic() reading of the last failure
+        self.last_failure_time: Optional[float] = None
         self.state = CircuitState.CLOSED
         
     async def call(self, func: Callable, *args, **kwargs) -> Any:
@@ -47,11 +59,16 @@ class CircuitBreaker:
         Raises:
             Exception: If circuit is open or function fails
         """
-        if self.state == CircuitState.OPEN:
-            if self._should_attempt_reset():
-                self.state = CircuitState.HALF_OPEN
-            else:
+        probing = False
+        if self.state is CircuitState.OPEN:
+            if not self._should_attempt_reset():
                 raise Exception("Circuit breaker is OPEN")
+            # No await between the check and the transition, so exactly one
+            # caller becomes the recovery probe
+            self.state = CircuitState.HALF_OPEN
+            probing = True
+        elif self.state is CircuitState.HALF_OPEN:
+            raise Exception("Circuit breaker probe in flight")
         
         try:
             result = await func(*args, **kwargs)
@@ -61,33 +78,46 @@ class CircuitBreaker:
         except self.expected_exception as e:
             self._on_failure()
             raise e
+        
+        finally:
+            if probing and self.state is CircuitState.HALF_OPEN:
+                # The probe was cancelled or raised an unexpected error
+                self.state = CircuitState.OPEN
     
     def _should_attempt_reset(self) -> bool:
         """Check if enough time has passed to attempt reset"""
         if self.last_failure_time is None:
             return True
         
-        return datetime.utcnow() - self.last_failure_time >= timedelta(seconds=self.recovery_timeout)
+        return time.monotonic() - self.last_failure_time >= self.recovery_timeout
     
     def _on_success(self):
         """Handle successful operation"""
+        if self.state is CircuitState.CLOSED and self.failure_count == 0:
+            return  # Already healthy, nothing to reset
         self.failure_count = 0
         self.state = CircuitState.CLOSED
     
     def _on_failure(self):
         """Handle failed operation"""
         self.failure_count += 1
-        self.last_failure_time = datetime.utcnow()
+        self.last_failure_time = time.monotonic()
         
         if self.failure_count >= self.failure_threshold:
             self.state = CircuitState.OPEN
     
     def get_state(self) -> dict:
         """Get current circuit breaker state"""
+        last_failure_time = None
+        if self.last_failure_time is not None:
+            # Convert the monotonic reading to wall-clock time only when reporting
+            elapsed = time.monotonic() - self.last_failure_time
+            last_failure_time = datetime.utcnow() - timedelta(seconds=elapsed)
+        
         return {
             "state": self.state.value,
             "failure_count": self.failure_count,
-            "last_failure_time": self.last_failure_time,
+            "last_failure_time": last_failure_time,
             "failure_threshold": self.failure_threshold,
             "recovery_timeout": self.recovery_timeout
         }
@@ -104,6 +134,8 @@ class ResilientConnector:
     Base class for connectors with circuit breaker support
     """
     
+    __slots__ = ('circuit_breaker',)
+    
     def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 60.0):
         self.circuit_breaker = CircuitBreaker(
             failure_threshold=failure_threshold,
@@ -125,7 +157,7 @@ class ResilientConnector:
             result = await self.circuit_breaker.call(send_func, payload)
             return result
         except Exception as e:
-            print(f"Circuit breaker prevented call or call failed: {e}")
+            app_logger.warning("Circuit breaker prevented call or call failed: %s", e)
             return False
     
     def get_circuit_state(self) -> dict:
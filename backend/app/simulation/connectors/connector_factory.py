@@ -1,6 +1,8 @@
 """
 Connector Factory for creating target system connectors
 """
+import json
+from functools import lru_cache
 from typing import Dict, Any, Type
 from app.simulation.connectors.base_connector import TargetConnector
 from app.simulation.connectors.http_connector import HTTPConnector
@@ -20,6 +22,38 @@ from app.models.target import (
 )
 
 
+def _validate_config(config_class: Type, config: Dict[str, Any]):
+    """Validate a raw config, reusing the result for identical configs"""
+    try:
+        config_key = json.dumps(config, sort_keys=True)
+    except (TypeError, ValueError):
+        return config_class(**config)
+    return _cached_config(config_class, config_key)
+
+
+@lru_cache(maxsize=256)
+def _cached_config(config_class: Type, config_key: str):
+    """Build a validated config from its canonical JSON form"""
+    return config_class(**json.loads(config_key))
+
+
+@lru_cache(maxsize=32)
+def resolve_target_type(target_type: str) -> TargetType:
+    """
+    Resolve a case-insensitive target type string to its enum member
+    
+    Raises:
+        ValueError: If the string is not a known target type
+    """
+    return TargetType(target_type.lower())
+
+
+@lru_cache(maxsize=None)
+def _schema_for(config_class: Type) -> Dict[str, Any]:
+    """Generate the JSON schema of a config class once per process (treat as read-only)"""
+    return config_class.schema()
+
+
 class ConnectorFactory:
     """Factory class for creating target system connectors"""
     
@@ -65,7 +99,7 @@ class ConnectorFactory:
         config_class = cls._config_classes.get(target_type)
         if config_class:
             try:
-                validated_config = config_class(**config)
+                validated_config = _validate_config(config_class, config)
             except Exception as e:
                 raise ValueError(f"Invalid configuration for {target_type}: {e}")
         else:
@@ -115,6 +149,7 @@ class ConnectorFactory:
         cls._connectors[target_type] = connector_class
         if config_class:
             cls._config_classes[target_type] = config_class
+            _schema_for.cache_clear()
     
     @classmethod
     def get_config_schema(cls, target_type: TargetType) -> Dict[str, Any]:
@@ -129,7 +164,7 @@ class ConnectorFactory:
         """
         config_class = cls._config_classes.get(target_type)
         if config_class:
-            return config_class.schema()
+            return _schema_for(config_class)
         return {}
     
     @classmethod
@@ -172,7 +207,7 @@ def create_connector(target_type: str, config: Dict[str, Any]) -> TargetConnecto
         TargetConnector instance
     """
     try:
-        target_enum = TargetType(target_type.lower())
+        target_enum = resolve_target_type(target_type)
         return ConnectorFactory.create_connector(target_enum, config)
     except ValueError as e:
         raise ValueError(f"Failed to create connector: {e}")
@@ -1,25 +1,38 @@
 """
 FTP/SFTP target connector
 """
-import json
 import asyncio
-import tempfile
-import os
-from typing import Dict, Any
-from datetime import datetime
+import time
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional, Set
 import aioftp
+import orjson
 import asyncssh
 from app.simulation.connectors.base_connector import TargetConnector
 from app.models.target import FTPConfig
+from app.utils.logger import app_logger
 
 
 class FTPConnector(TargetConnector):
     """Connector for FTP/SFTP file transfer"""
     
+    __slots__ = (
+        'config', 'client', 'sftp', 'connected', '_known_dirs', '_path_prefix', '_transfer_lock', '_connecting'
+    )
+    
     def __init__(self, config: FTPConfig):
+        super().__init__()
         self.config = config
         self.client = None
+        self.sftp = None
         self.connected = False
+        # Remote directories already created (or attempted) on this connection
+        self._known_dirs: Set[str] = set()
+        # Remote paths are always POSIX, so build them by plain concatenation
+        self._path_prefix = config.path.rstrip('/') + '/'
+        # An FTP control connection runs one command or transfer at a time, so
+        # devices sharing this connector take turns; SFTP multiplexes requests
+        self._transfer_lock: Optional[asyncio.Lock] = None if config.use_sftp else asyncio.Lock()
     
     async def connect(self) -> bool:
         """Connect to FTP/SFTP server"""
@@ -33,6 +46,8 @@ class FTPConnector(TargetConnector):
                     password=self.config.password,
                     known_hosts=None  # Disable host key checking for simplicity
                 )
+                # Open the SFTP session once and reuse it for every upload
+                self.sftp = await self.client.start_sftp_client()
             else:
                 # FTP connection using aioftp
                 self.client = aioftp.Client()
@@ -43,62 +58,92 @@ class FTPConnector(TargetConnector):
             return True
             
         except Exception as e:
-            print(f"FTP connection failed: {e}")
+            app_logger.warning("FTP connection failed: %s", e)
             return False
     
-    async def send(self, payload: Dict[str, Any]) -> bool:
+    async def send(self, payload: Dict[str, Any], pre_encoded: Optional[bytes] = None) -> bool:
         """Upload payload as JSON file to FTP/SFTP server"""
         if not self.connected:
             return False
         
         try:
-            # Create temporary file with JSON payload
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            filename = f"payload_{timestamp}.json"
-            
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as temp_file:
-                json.dump(payload, temp_file, indent=2)
-                temp_file_path = temp_file.name
+            data = pre_encoded if pre_encoded is not None else self._serialize(payload)
+            async with self._transfer_lock or nullcontext():
+                await self._ensure_directory(self.config.path)
+                await self._upload(self._remote_path(f"payload_{time.time_ns()}.json"), data)
+            return True
             
-            try:
-                # Ensure remote directory exists and upload file
-                remote_path = os.path.join(self.config.path, filename).replace('\\', '/')
-                
-                if self.config.use_sftp:
-                    # SFTP upload
-                    async with self.client.start_sftp_client() as sftp:
-                        # Try to create directory if it doesn't exist
-                        try:
-                            await sftp.makedirs(self.config.path, exist_ok=True)
-                        except Exception:
-                            pass  # Directory might already exist or we might not have permissions
-                        
-                        await sftp.put(temp_file_path, remote_path)
-                else:
-                    # FTP upload
-                    # Try to create directory if it doesn't exist
-                    try:
-                        await self.client.make_directory(self.config.path)
-                    except Exception:
-                        pass  # Directory might already exist or we might not have permissions
-                    
-                    await self.client.upload(temp_file_path, remote_path)
-                
-                return True
-                
-            finally:
-                # Clean up temporary file
-                os.unlink(temp_file_path)
-                
         except Exception as e:
-            print(f"FTP send failed: {e}")
+            app_logger.warning("FTP send failed: %s", e)
             return False
     
+    async def send_batch(self, payloads: List[Dict[str, Any]], concurrency: int = 8) -> List[bool]:
+        """Upload several payloads, keeping up to `concurrency` SFTP writes in flight"""
+        if not self.connected:
+            return [False] * len(payloads)
+        
+        if not self.config.use_sftp:
+            # An FTP control connection can only run one transfer at a time
+            return await super().send_batch(payloads)
+        
+        await self._ensure_directory(self.config.path)
+        timestamp = time.time_ns()
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def upload(index: int, payload: Dict[str, Any]) -> bool:
+            async with semaphore:
+                try:
+                    await self._upload(self._remote_path(f"payload_{timestamp}_{index}.json"), self._serialize(payload))
+                    return True
+                except Exception as e:
+                    app_logger.warning("FTP send failed: %s", e)
+                    return False
+        
+        return list(await asyncio.gather(*(upload(i, payload) for i, payload in enumerate(payloads))))
+    
+    async def encode(self, payload: Dict[str, Any]) -> bytes:
+        """Serialize a payload to the uploaded JSON bytes"""
+        return self._serialize(payload)
+    
+    def _serialize(self, payload: Dict[str, Any]) -> bytes:
+        """Serialize a payload to the uploaded JSON bytes"""
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    
+    def _remote_path(self, filename: str) -> str:
+        """Build the remote path for an uploaded file"""
+        return self._path_prefix + filename
+    
+    async def _upload(self, remote_path: str, data: bytes):
+        """Write data to a remote file straight from memory"""
+        if self.config.use_sftp:
+            async with self.sftp.open(remote_path, 'wb') as remote_file:
+                await remote_file.write(data)
+        else:
+            async with self.client.upload_stream(remote_path) as stream:
+                await stream.write(data)
+    
+    async def _ensure_directory(self, path: str):
+        """Create the remote directory once per connection"""
+        if path in self._known_dirs:
+            return
+        
+        try:
+            if self.config.use_sftp:
+                await self.sftp.makedirs(path, exist_ok=True)
+            else:
+                await self.client.make_directory(path)
+        except Exception:
+            pass  # Directory might already exist or we might not have permissions
+        finally:
+            self._known_dirs.add(path)
+    
     async def disconnect(self):
         """Disconnect from FTP/SFTP server"""
         if self.client:
             try:
                 if self.config.use_sftp:
+                    if self.sftp:
+                        self.sftp.exit()
                     self.client.close()
                 else:
                     await self.client.quit()
@@ -106,4 +151,6 @@ class FTPConnector(TargetConnector):
                 pass  # Ignore errors during disconnect
             finally:
                 self.client = None
-                self.connected = False
\ No newline at end of file
+                self.sftp = None
+                self.connected = False
+                self._known_dirs.clear()
\ No newline at end of file
@@ -1,84 +1,133 @@
 """
 HTTP/HTTPS target connector
 """
-import json
+import asyncio
+import logging
 import aiohttp
-from typing import Dict, Any
+from operator import attrgetter
+from typing import Dict, Any, Optional, Tuple
 from app.simulation.connectors.base_connector import TargetConnector
 from app.models.target import HTTPConfig
+from app.utils.logger import app_logger
+from app.utils.serialization import dumps_payload, dumps_payload_str, utc_timestamp
+
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Session request method per supported HTTP verb, resolved once per connector
+SESSION_METHODS = {
+    'GET': attrgetter('get'),
+    'POST': attrgetter('post'),
+    'PUT': attrgetter('put'),
+    'PATCH': attrgetter('patch'),
+}
+
+# Pooled TCP connector shared by every HTTP connector, with the loop it belongs to
+_shared_connector: Optional[Tuple[asyncio.AbstractEventLoop, aiohttp.TCPConnector]] = None
+
+
+def get_shared_connector() -> aiohttp.TCPConnector:
+    """Return the TCP connector shared by all HTTP sessions on the running loop"""
+    global _shared_connector
+    loop = asyncio.get_running_loop()
+    if _shared_connector is None or _shared_connector[0] is not loop or _shared_connector[1].closed:
+        _shared_connector = (loop, aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=64,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+        ))
+    return _shared_connector[1]
+
+
+async def close_shared_connector():
+    """Close the shared TCP connector, if one was created on the running loop"""
+    global _shared_connector
+    if _shared_connector is not None and _shared_connector[0] is asyncio.get_running_loop():
+        await _shared_connector[1].close()
+    _shared_connector = None
 
 
 class HTTPConnector(TargetConnector):
     """Connector for HTTP/HTTPS endpoints"""
     
     def __init__(self, config: HTTPConfig):
+        super().__init__()
         self.config = config
         self.session: aiohttp.ClientSession = None
+        self._method = config.method.upper()
+        self._request = SESSION_METHODS.get(self._method)
+        self._inflight = asyncio.Semaphore(config.max_inflight)
     
     async def connect(self) -> bool:
         """Initialize HTTP session"""
         try:
             timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+            # Sessions are per target; sockets and DNS cache come from the shared pool
             self.session = aiohttp.ClientSession(
                 headers=self.config.headers,
-                timeout=timeout
+                timeout=timeout,
+                connector=get_shared_connector(),
+                connector_owner=False,
+                # Any json= request body goes through orjson as well
+                json_serialize=dumps_payload_str
             )
             return True
         except Exception as e:
-            print(f"HTTP connection failed: {e}")
+            app_logger.warning("HTTP connection failed: %s", e)
             return False
     
-    async def send(self, payload: Dict[str, Any]) -> bool:
+    async def send(self, payload: Dict[str, Any], pre_encoded: Optional[bytes] = None) -> bool:
         """Send HTTP request with payload"""
-        if not self.session:
+        if not self.session or self.session.closed:
             # Try to reconnect if session is not available
-            if not await self.connect():
+            if not await self._reconnect():
                 return False
         
-        try:
-            method = self.config.method.upper()
-            
-            # Add timestamp if not present
-            if 'timestamp' not in payload:
-                from datetime import datetime
-                payload['timestamp'] = datetime.utcnow().isoformat()
-            
-            if method == "GET":
-                async with self.session.get(self.config.url, params=payload) as response:
-                    success = response.status < 400
-                    if not success:
-                        print(f"HTTP GET failed with status {response.status}: {await response.text()}")
-                    return success
-            elif method == "POST":
-                async with self.session.post(self.config.url, json=payload) as response:
-                    success = response.status < 400
-                    if not success:
-                        print(f"HTTP POST failed with status {response.status}: {await response.text()}")
-                    return success
-            elif method == "PUT":
-                async with self.session.put(self.config.url, json=payload) as response:
-                    success = response.status < 400
-                    if not success:
-                        print(f"HTTP PUT failed with status {response.status}: {await response.text()}")
-                    return success
-            elif method == "PATCH":
-                async with self.session.patch(self.config.url, json=payload) as response:
+        if self._request is None:
+            app_logger.warning("Unsupported HTTP method: %s", self._method)
+            return False
+        
+        # Bound concurrent requests so a burst of sends waits here, not inside aiohttp
+        async with self._inflight:
+            try:
+                # GET sends the payload as query parameters; other verbs post the
+                # serialized body as bytes
+                if self._method == "GET":
+                    request_args = {'params': self._stamp(payload)}
+                else:
+                    body = pre_encoded if pre_encoded is not None else await self.encode(payload)
+                    request_args = {'data': body, 'headers': JSON_HEADERS}
+                
+                async with self._request(self.session)(self.config.url, **request_args) as response:
                     success = response.status < 400
                     if not success:
-                        print(f"HTTP PATCH failed with status {response.status}: {await response.text()}")
+                        # Only pull the error body into memory when it will be logged
+                        if app_logger.isEnabledFor(logging.DEBUG):
+                            app_logger.debug("HTTP %s failed with status %s: %s", self._method, response.status, await response.text())
+                        else:
+                            app_logger.warning("HTTP %s failed with status %s", self._method, response.status)
                     return success
-            else:
-                print(f"Unsupported HTTP method: {method}")
+                    
+            except aiohttp.ClientError as e:
+                # The session stays open: devices sharing this connector still use it,
+                # and aiohttp already discards the broken connection
+                app_logger.warning("HTTP client error: %s", e)
                 return False
-                
-        except aiohttp.ClientError as e:
-            print(f"HTTP client error: {e}")
-            # Close session to force reconnection on next attempt
-            await self.disconnect()
-            return False
-        except Exception as e:
-            print(f"HTTP send failed: {e}")
-            return False
+            except Exception as e:
+                app_logger.warning("HTTP send failed: %s", e)
+                return False
+    
+    async def encode(self, payload: Dict[str, Any]) -> bytes:
+        """Serialize the request body, timestamped like every sent payload"""
+        return dumps_payload(self._stamp(payload))
+    
+    @staticmethod
+    def _stamp(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Add timestamp if not present, leaving the caller's payload untouched"""
+        if 'timestamp' not in payload:
+            return {**payload, 'timestamp': utc_timestamp()}
+        return payload
     
     async def disconnect(self):
         """Close HTTP session"""
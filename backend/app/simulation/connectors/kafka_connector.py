@@ -1,19 +1,39 @@
 """
 Kafka target connector
 """
-import json
-from typing import Dict, Any
+import asyncio
+from typing import Callable, Dict, Any, Optional
 from aiokafka import AIOKafkaProducer
 from app.simulation.connectors.base_connector import TargetConnector
 from app.models.target import KafkaConfig
+from app.utils.logger import app_logger
+from app.utils.serialization import dumps_payload
+
+
+# Unacknowledged sends allowed before send() waits for deliveries to drain
+MAX_PENDING_DELIVERIES = 10000
+
+# Seconds disconnect() waits for outstanding deliveries to be confirmed
+DELIVERY_DRAIN_TIMEOUT = 30.0
 
 
 class KafkaConnector(TargetConnector):
     """Connector for Apache Kafka"""
     
     def __init__(self, config: KafkaConfig):
+        super().__init__()
         self.config = config
         self.producer: AIOKafkaProducer = None
+        self.successful_requests = 0
+        self.failed_requests = 0
+        # Called with the error of each failed delivery
+        self.on_delivery_error: Optional[Callable[[Exception], None]] = None
+        self._deliveries: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDING_DELIVERIES)
+        self._reaper_task: Optional[asyncio.Task] = None
+        # A static key is the same for every message, so encode it only once
+        self._static_key: Optional[bytes] = config.key_static.encode('utf-8') if config.key_static else None
+        self._inflight = asyncio.Semaphore(config.max_inflight)
+        self._serialize = self._build_serializer()
     
     async def connect(self) -> bool:
         """Connect to Kafka cluster"""
@@ -21,7 +41,12 @@ class KafkaConnector(TargetConnector):
             # Configure producer
             producer_config = {
                 'bootstrap_servers': self.config.bootstrap_servers,
-                'value_serializer': lambda v: json.dumps(v).encode('utf-8')
+                'value_serializer': self._serialize_value,
+                # Let concurrent sends share compressed batches
+                'linger_ms': self.config.linger_ms,
+                'max_batch_size': self.config.max_batch_size,
+                'compression_type': self.config.compression_type,
+                'acks': self.config.acks,
             }
             
             # Add security configuration if needed
@@ -35,62 +60,114 @@ class KafkaConnector(TargetConnector):
             
             self.producer = AIOKafkaProducer(**producer_config)
             await self.producer.start()
+            self._reaper_task = asyncio.create_task(self._reap_deliveries())
             return True
             
         except Exception as e:
-            print(f"Kafka connection failed: {e}")
+            app_logger.warning("Kafka connection failed: %s", e)
             self.producer = None
             return False
     
-    async def send(self, payload: Dict[str, Any]) -> bool:
+    def _build_serializer(self) -> Callable[[Any], bytes]:
+        """Build the value serializer for the configured wire format"""
+        if self.config.serialization == 'msgpack':
+            import msgspec
+            # One encoder per connector; it reuses its internal buffer
+            return msgspec.msgpack.Encoder(enc_hook=str).encode
+        return dumps_payload
+    
+    async def send(self, payload: Dict[str, Any], pre_encoded: Optional[bytes] = None) -> bool:
         """Send message to Kafka topic with partition and key support"""
         if not self.producer:
             return False
         
-        try:
-            # Determine message key
-            message_key = self._get_message_key(payload)
-            
-            # Prepare send arguments
-            send_args = {
-                'topic': self.config.topic,
-                'value': payload
-            }
-            
-            # Add key if specified
-            if message_key is not None:
-                send_args['key'] = message_key.encode('utf-8') if isinstance(message_key, str) else str(message_key).encode('utf-8')
-            
-            # Add partition if specified
-            if self.config.partition is not None:
-                send_args['partition'] = self.config.partition
-            
-            await self.producer.send_and_wait(**send_args)
-            return True
-            
-        except Exception as e:
-            print(f"Kafka send failed: {e}")
-            return False
+        # Bound sends waiting on the producer buffer
+        async with self._inflight:
+            try:
+                # Prepare send arguments
+                send_args = {
+                    'topic': self.config.topic,
+                    'value': pre_encoded if pre_encoded is not None else payload
+                }
+                
+                # Add key if specified
+                message_key = self._static_key if self._static_key is not None else self._get_message_key(payload)
+                if message_key is not None:
+                    send_args['key'] = message_key
+                
+                # Add partition if specified
+                if self.config.partition is not None:
+                    send_args['partition'] = self.config.partition
+                
+                # Only enqueue the record; delivery is confirmed by the reaper task so
+                # the producer's batch keeps filling while we return to the caller
+                delivery = await self.producer.send(**send_args)
+                await self._deliveries.put(delivery)
+                return True
+                
+            except Exception as e:
+                app_logger.warning("Kafka send failed: %s", e)
+                return False
     
-    def _get_message_key(self, payload: Dict[str, Any]) -> str:
-        """Extract or generate message key from payload"""
-        # Use static key if configured
-        if self.config.key_static:
-            return self.config.key_static
-        
-        # Use field from payload as key
+    async def encode(self, payload: Dict[str, Any]) -> bytes:
+        """Serialize a message value in the configured wire format"""
+        return self._serialize(payload)
+    
+    def _serialize_value(self, value: Any) -> bytes:
+        """Producer value serializer; values encoded up front pass through as-is"""
+        if isinstance(value, bytes):
+            return value
+        return self._serialize(value)
+    
+    def _get_message_key(self, payload: Dict[str, Any]) -> Optional[bytes]:
+        """Extract the message key from the configured payload field"""
         if self.config.key_field:
             key_value = payload.get(self.config.key_field)
             if key_value is not None:
-                return str(key_value)
-            else:
-                print(f"Warning: Key field '{self.config.key_field}' not found in payload")
+                return str(key_value).encode('utf-8')
+            app_logger.warning("Key field '%s' not found in payload", self.config.key_field)
         
         # No key specified
         return None
     
+    async def _reap_deliveries(self):
+        """Await delivery results in the background and record their outcome"""
+        while True:
+            delivery = await self._deliveries.get()
+            try:
+                await delivery
+                self.successful_requests += 1
+            except Exception as e:
+                self.failed_requests += 1
+                app_logger.warning("Kafka delivery failed: %s", e)
+                if self.on_delivery_error:
+                    # A failing callback must not end the reaper and leave deliveries unconfirmed
+                    try:
+                        self.on_delivery_error(e)
+                    except Exception as callback_error:
+                        app_logger.warning("Kafka delivery error callback failed: %s", callback_error)
+            finally:
+                self._deliveries.task_done()
+    
     async def disconnect(self):
-        """Close Kafka producer"""
+        """Flush pending messages and close Kafka producer"""
         if self.producer:
-            await self.producer.stop()
-            self.producer = None
\ No newline at end of file
+            try:
+                if self._reaper_task:
+                    await self.producer.flush()
+                    try:
+                        await asyncio.wait_for(self._deliveries.join(), DELIVERY_DRAIN_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        app_logger.warning(
+                            "Kafka disconnect gave up on %d unconfirmed deliveries", self._deliveries.qsize()
+                        )
+            finally:
+                if self._reaper_task:
+                    self._reaper_task.cancel()
+                    try:
+                        await self._reaper_task
+                    except asyncio.CancelledError:
+                        pass
+                    self._reaper_task = None
+                await self.producer.stop()
+                self.producer = None
\ No newline at end of file
@@ -1,31 +1,44 @@
 """
 MQTT target connector
 """
-import json
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import orjson
 import paho.mqtt.client as mqtt
 from app.simulation.connectors.base_connector import TargetConnector
 from app.models.target import MQTTConfig
+from app.utils.logger import app_logger
+from app.utils.serialization import dumps_payload, utc_timestamp
+
+
+# Seconds to wait for the broker to acknowledge a publish
+PUBLISH_TIMEOUT = 10
 
 
 class MQTTConnector(TargetConnector):
     """Connector for MQTT brokers"""
     
     def __init__(self, config: MQTTConfig):
+        super().__init__()
         self.config = config
         self.client: mqtt.Client = None
         self.connected = False
         self.connection_event = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Publish futures keyed by message id, resolved from paho's network thread
+        self._pending_publishes: Dict[int, asyncio.Future] = {}
+        self._inflight = asyncio.Semaphore(config.max_inflight)
     
     async def connect(self) -> bool:
         """Connect to MQTT broker"""
         try:
+            self._loop = asyncio.get_running_loop()
             self.client = mqtt.Client()
             
             # Set callbacks
             self.client.on_connect = self._on_connect
             self.client.on_disconnect = self._on_disconnect
+            self.client.on_publish = self._on_publish
             
             # Configure authentication
             if self.config.username:
@@ -47,52 +60,60 @@ class MQTTConnector(TargetConnector):
             return self.connected
             
         except Exception as e:
-            print(f"MQTT connection failed: {e}")
+            app_logger.warning("MQTT connection failed: %s", e)
             return False
     
-    async def send(self, payload: Dict[str, Any]) -> bool:
+    async def send(self, payload: Dict[str, Any], pre_encoded: Optional[bytes] = None) -> bool:
         """Publish message to MQTT topic"""
         if not self.connected:
             # Try to reconnect if not connected
-            if not await self.connect():
+            if not await self._reconnect():
                 return False
         
-        try:
-            # Add timestamp if not present
-            if 'timestamp' not in payload:
-                from datetime import datetime
-                payload['timestamp'] = datetime.utcnow().isoformat()
-            
-            message = json.dumps(payload, default=str)  # Handle datetime objects
-            result = self.client.publish(
-                self.config.topic,
-                message,
-                qos=self.config.qos
-            )
-            
-            # Wait for message to be sent
+        # Bound publishes awaiting broker acknowledgement
+        async with self._inflight:
             try:
-                result.wait_for_publish(timeout=10)
-                success = result.rc == mqtt.MQTT_ERR_SUCCESS
+                message = pre_encoded if pre_encoded is not None else await self.encode(payload)
+                result = self.client.publish(
+                    self.config.topic,
+                    message,
+                    qos=self.config.qos
+                )
                 
-                if not success:
-                    print(f"MQTT publish failed with return code: {result.rc}")
+                if result.rc != mqtt.MQTT_ERR_SUCCESS:
+                    app_logger.warning("MQTT publish failed with return code: %s", result.rc)
                     # If publish failed, mark as disconnected to force reconnection
                     self.connected = False
+                    return False
+                
+                # Await the acknowledgement without blocking the event loop; the future
+                # is registered before _on_publish can be scheduled back onto this loop
+                published = asyncio.get_running_loop().create_future()
+                self._pending_publishes[result.mid] = published
+                try:
+                    # False when disconnect() gave up on the publish
+                    return await asyncio.wait_for(published, timeout=PUBLISH_TIMEOUT)
+                except asyncio.TimeoutError:
+                    app_logger.warning("MQTT publish timed out")
+                    self.connected = False
+                    return False
+                finally:
+                    self._pending_publishes.pop(result.mid, None)
                 
-                return success
-            except Exception as wait_error:
-                print(f"MQTT publish timeout or error: {wait_error}")
+            except orjson.JSONEncodeError as e:
+                app_logger.warning("MQTT JSON encoding failed: %s", e)
+                return False
+            except Exception as e:
+                app_logger.warning("MQTT send failed: %s", e)
                 self.connected = False
                 return False
-            
-        except json.JSONEncodeError as e:
-            print(f"MQTT JSON encoding failed: {e}")
-            return False
-        except Exception as e:
-            print(f"MQTT send failed: {e}")
-            self.connected = False
-            return False
+    
+    async def encode(self, payload: Dict[str, Any]) -> bytes:
+        """Serialize a message, timestamped if the payload has none"""
+        # Add timestamp if not present, leaving the caller's payload untouched
+        if 'timestamp' not in payload:
+            payload = {**payload, 'timestamp': utc_timestamp()}
+        return dumps_payload(payload)
     
     async def disconnect(self):
         """Disconnect from MQTT broker"""
@@ -100,6 +121,12 @@ class MQTTConnector(TargetConnector):
             self.client.loop_stop()
             self.client.disconnect()
             self.connected = False
+            # Fail the sends still awaiting an acknowledgement; cancelling them
+            # would look like task cancellation to the caller
+            for published in self._pending_publishes.values():
+                if not published.done():
+                    published.set_result(False)
+            self._pending_publishes.clear()
     
     def _on_connect(self, client, userdata, flags, rc):
         """MQTT connection callback"""
@@ -107,10 +134,21 @@ class MQTTConnector(TargetConnector):
             self.connected = True
             self.connection_event.set()
         else:
-            print(f"MQTT connection failed with code {rc}")
+            app_logger.warning("MQTT connection failed with code %s", rc)
             self.connected = False
             self.connection_event.set()
     
     def _on_disconnect(self, client, userdata, rc):
         """MQTT disconnection callback"""
-        self.connected = False
\ No newline at end of file
+        self.connected = False
+    
+    def _on_publish(self, client, userdata, mid):
+        """MQTT publish callback, invoked from paho's network thread"""
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._resolve_publish, mid)
+    
+    def _resolve_publish(self, mid: int):
+        """Complete the pending publish for a message id on the event loop"""
+        published = self._pending_publishes.get(mid)
+        if published and not published.done():
+            published.set_result(True)
\ No newline at end of file
@@ -1,20 +1,37 @@
 """
 Pub/Sub target connector for cloud messaging services
 """
-import json
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set, Tuple
 from app.simulation.connectors.base_connector import TargetConnector
 from app.models.target import PubSubConfig
+from app.utils.logger import app_logger
+from app.utils.serialization import dumps_payload
+
+
+# GCP publish batching, mirroring the sync client's BatchSettings defaults
+GCP_BATCH_MAX_MESSAGES = 1000
+GCP_BATCH_MAX_BYTES = 1_000_000
+GCP_BATCH_MAX_LATENCY = 0.05
 
 
 class PubSubConnector(TargetConnector):
     """Connector for cloud Pub/Sub services (GCP, AWS, Azure)"""
     
     def __init__(self, config: PubSubConfig):
+        super().__init__()
         self.config = config
         self.client = None
         self.connected = False
+        self._aws_client_context = None
+        # Pending GCP messages and the futures of the sends waiting on them
+        self._gcp_batch: List[Tuple[Any, asyncio.Future]] = []
+        self._gcp_batch_bytes = 0
+        self._gcp_flush_handle: Optional[asyncio.TimerHandle] = None
+        self._gcp_publish_tasks: Set[asyncio.Task] = set()
+        # Long-lived Azure topic sender; opening one negotiates an AMQP link
+        self._azure_sender = None
+        self._inflight = asyncio.Semaphore(config.max_inflight)
     
     async def connect(self) -> bool:
         """Connect to Pub/Sub service"""
@@ -26,31 +43,34 @@ class PubSubConnector(TargetConnector):
             elif self.config.provider == 'azure':
                 return await self._connect_azure()
             else:
-                print(f"Unsupported Pub/Sub provider: {self.config.provider}")
+                app_logger.warning("Unsupported Pub/Sub provider: %s", self.config.provider)
                 return False
                 
         except Exception as e:
-            print(f"Pub/Sub connection failed: {e}")
+            app_logger.warning("Pub/Sub connection failed: %s", e)
             return False
     
-    async def send(self, payload: Dict[str, Any]) -> bool:
+    async def send(self, payload: Dict[str, Any], pre_encoded: Optional[bytes] = None) -> bool:
         """Send message to Pub/Sub topic"""
         if not self.connected:
             return False
         
-        try:
-            if self.config.provider == 'gcp':
-                return await self._send_gcp(payload)
-            elif self.config.provider == 'aws':
-                return await self._send_aws(payload)
-            elif self.config.provider == 'azure':
-                return await self._send_azure(payload)
-            else:
+        # Bound publishes in flight to the provider
+        async with self._inflight:
+            try:
+                data = pre_encoded if pre_encoded is not None else dumps_payload(payload)
+                if self.config.provider == 'gcp':
+                    return await self._send_gcp(data)
+                elif self.config.provider == 'aws':
+                    return await self._send_aws(data)
+                elif self.config.provider == 'azure':
+                    return await self._send_azure(data)
+                else:
+                    return False
+                    
+            except Exception as e:
+                app_logger.warning("Pub/Sub send failed: %s", e)
                 return False
-                
-        except Exception as e:
-            print(f"Pub/Sub send failed: {e}")
-            return False
     
     async def disconnect(self):
         """Disconnect from Pub/Sub service"""
@@ -71,17 +91,17 @@ class PubSubConnector(TargetConnector):
     async def _connect_gcp(self) -> bool:
         """Connect to Google Cloud Pub/Sub"""
         try:
-            from google.cloud import pubsub_v1
+            from google.cloud.pubsub_v1.services.publisher.async_client import PublisherAsyncClient
             from google.oauth2 import service_account
             
             # Create credentials from service account info
             credentials_info = self.config.credentials.get('service_account_info')
             if credentials_info:
                 credentials = service_account.Credentials.from_service_account_info(credentials_info)
-                self.client = pubsub_v1.PublisherClient(credentials=credentials)
+                self.client = PublisherAsyncClient(credentials=credentials)
             else:
                 # Use default credentials
-                self.client = pubsub_v1.PublisherClient()
+                self.client = PublisherAsyncClient()
             
             # Validate topic exists or create topic path
             project_id = self.config.credentials.get('project_id')
@@ -93,50 +113,94 @@ class PubSubConnector(TargetConnector):
             return True
             
         except ImportError:
-            print("Google Cloud Pub/Sub library not installed. Install with: pip install google-cloud-pubsub")
+            app_logger.warning("Google Cloud Pub/Sub library not installed. Install with: pip install google-cloud-pubsub")
             return False
         except Exception as e:
-            print(f"GCP Pub/Sub connection failed: {e}")
+            app_logger.warning("GCP Pub/Sub connection failed: %s", e)
             return False
     
-    async def _send_gcp(self, payload: Dict[str, Any]) -> bool:
-        """Send message to GCP Pub/Sub"""
+    async def _send_gcp(self, data: bytes) -> bool:
+        """Send a serialized message to GCP Pub/Sub"""
         try:
-            message_data = json.dumps(payload).encode('utf-8')
-            future = self.client.publish(self.topic_path, message_data)
+            from google.cloud.pubsub_v1.types import PubsubMessage
+            
+            if self._gcp_batch and self._gcp_batch_bytes + len(data) > GCP_BATCH_MAX_BYTES:
+                self._flush_gcp_batch()
+            
+            # Queue the message so concurrent sends share one publish RPC
+            loop = asyncio.get_running_loop()
+            published = loop.create_future()
+            self._gcp_batch.append((PubsubMessage(data=data), published))
+            self._gcp_batch_bytes += len(data)
             
-            # Wait for publish to complete
-            await asyncio.get_event_loop().run_in_executor(None, future.result)
+            if len(self._gcp_batch) >= GCP_BATCH_MAX_MESSAGES:
+                self._flush_gcp_batch()
+            elif self._gcp_flush_handle is None:
+                self._gcp_flush_handle = loop.call_later(GCP_BATCH_MAX_LATENCY, self._flush_gcp_batch)
+            
+            await published
             return True
             
         except Exception as e:
-            print(f"GCP Pub/Sub send failed: {e}")
+            app_logger.warning("GCP Pub/Sub send failed: %s", e)
             return False
     
+    def _flush_gcp_batch(self):
+        """Hand the queued GCP messages to a single publish call"""
+        if self._gcp_flush_handle:
+            self._gcp_flush_handle.cancel()
+            self._gcp_flush_handle = None
+        
+        if not self._gcp_batch:
+            return
+        
+        batch, self._gcp_batch, self._gcp_batch_bytes = self._gcp_batch, [], 0
+        task = asyncio.create_task(self._publish_gcp_batch(batch))
+        self._gcp_publish_tasks.add(task)
+        task.add_done_callback(self._gcp_publish_tasks.discard)
+    
+    async def _publish_gcp_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Publish a batch of GCP messages and settle the waiting sends"""
+        try:
+            await self.client.publish(topic=self.topic_path, messages=[message for message, _ in batch])
+        except Exception as e:
+            for _, published in batch:
+                if not published.done():
+                    published.set_exception(e)
+        else:
+            for _, published in batch:
+                if not published.done():
+                    published.set_result(True)
+    
     async def _disconnect_gcp(self):
         """Disconnect from GCP Pub/Sub"""
-        # GCP client doesn't require explicit disconnect
-        pass
+        # Publish whatever is still queued before closing the gRPC channel
+        self._flush_gcp_batch()
+        if self._gcp_publish_tasks:
+            await asyncio.gather(*self._gcp_publish_tasks, return_exceptions=True)
+        await self.client.transport.close()
     
     async def _connect_aws(self) -> bool:
         """Connect to AWS SNS/SQS"""
         try:
-            import boto3
+            import aioboto3
             
-            # Create SNS client with credentials
+            # Create native asyncio SNS client with credentials
             aws_credentials = self.config.credentials
-            self.client = boto3.client(
+            session = aioboto3.Session()
+            self._aws_client_context = session.client(
                 'sns',
                 region_name=aws_credentials.get('region', 'us-east-1'),
                 aws_access_key_id=aws_credentials.get('access_key_id'),
                 aws_secret_access_key=aws_credentials.get('secret_access_key')
             )
+            self.client = await self._aws_client_context.__aenter__()
             
             # Store topic ARN
             self.topic_arn = aws_credentials.get('topic_arn')
             if not self.topic_arn:
                 # Try to find topic by name
-                response = self.client.list_topics()
+                response = await self.client.list_topics()
                 for topic in response.get('Topics', []):
                     if topic['TopicArn'].endswith(f":{self.config.topic}"):
                         self.topic_arn = topic['TopicArn']
@@ -149,36 +213,37 @@ class PubSubConnector(TargetConnector):
             return True
             
         except ImportError:
-            print("AWS SDK not installed. Install with: pip install boto3")
+            app_logger.warning("AWS SDK not installed. Install with: pip install aioboto3")
             return False
         except Exception as e:
-            print(f"AWS SNS connection failed: {e}")
+            app_logger.warning("AWS SNS connection failed: %s", e)
+            await self._disconnect_aws()
+            self.client = None
             return False
     
-    async def _send_aws(self, payload: Dict[str, Any]) -> bool:
-        """Send message to AWS SNS"""
+    async def _send_aws(self, data: bytes) -> bool:
+        """Send a serialized message to AWS SNS"""
         try:
-            message = json.dumps(payload)
-            
-            # Publish message
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.client.publish(
-                    TopicArn=self.topic_arn,
-                    Message=message
-                )
+            message = data.decode()  # SNS messages are strings
+            
+            # Publish message on the event loop; no thread pool hop
+            response = await self.client.publish(
+                TopicArn=self.topic_arn,
+                Message=message
             )
             
             return 'MessageId' in response
             
         except Exception as e:
-            print(f"AWS SNS send failed: {e}")
+            app_logger.warning("AWS SNS send failed: %s", e)
             return False
     
     async def _disconnect_aws(self):
         """Disconnect from AWS SNS"""
-        # AWS client doesn't require explicit disconnect
-        pass
+        # Closes the client's underlying aiohttp session
+        if self._aws_client_context:
+            context, self._aws_client_context = self._aws_client_context, None
+            await context.__aexit__(None, None, None)
     
     async def _connect_azure(self) -> bool:
         """Connect to Azure Service Bus"""
@@ -191,35 +256,39 @@ class PubSubConnector(TargetConnector):
                 raise ValueError("Azure Service Bus connection_string is required")
             
             self.client = ServiceBusClient.from_connection_string(connection_string)
+            sender = self.client.get_topic_sender(topic_name=self.config.topic)
+            await sender.__aenter__()
+            self._azure_sender = sender
             self.connected = True
             return True
             
         except ImportError:
-            print("Azure Service Bus library not installed. Install with: pip install azure-servicebus")
+            app_logger.warning("Azure Service Bus library not installed. Install with: pip install azure-servicebus")
             return False
         except Exception as e:
-            print(f"Azure Service Bus connection failed: {e}")
+            app_logger.warning("Azure Service Bus connection failed: %s", e)
+            await self._disconnect_azure()
+            self.client = None
             return False
     
-    async def _send_azure(self, payload: Dict[str, Any]) -> bool:
-        """Send message to Azure Service Bus"""
+    async def _send_azure(self, data: bytes) -> bool:
+        """Send a serialized message to Azure Service Bus"""
         try:
             from azure.servicebus import ServiceBusMessage
             
-            message = ServiceBusMessage(json.dumps(payload))
-            
-            async with self.client:
-                sender = self.client.get_topic_sender(topic_name=self.config.topic)
-                async with sender:
-                    await sender.send_messages(message)
+            message = ServiceBusMessage(data)
+            await self._azure_sender.send_messages(message)
             
             return True
             
         except Exception as e:
-            print(f"Azure Service Bus send failed: {e}")
+            app_logger.warning("Azure Service Bus send failed: %s", e)
             return False
     
     async def _disconnect_azure(self):
         """Disconnect from Azure Service Bus"""
+        if self._azure_sender:
+            sender, self._azure_sender = self._azure_sender, None
+            await sender.__aexit__(None, None, None)
         if self.client:
             await self.client.close()
\ No newline at end of file
@@ -1,15 +1,25 @@
 """
 Resilient HTTP/HTTPS target connector with circuit breaker
 """
-import json
+import asyncio
+import gzip
+import itertools
+import logging
 import aiohttp
-from datetime import datetime
-from typing import Dict, Any
+from functools import partial
+from typing import Callable, Dict, Any, Optional
 from app.simulation.connectors.base_connector import TargetConnector
 from app.simulation.connectors.circuit_breaker import ResilientConnector
+from app.simulation.connectors.http_connector import JSON_HEADERS, SESSION_METHODS, get_shared_connector
+from app.utils.logger import app_logger
+from app.utils.serialization import dumps_payload, dumps_payload_str, utc_timestamp
 from app.models.target import HTTPConfig
 
 
+# Bodies smaller than this are sent uncompressed; the codec overhead outweighs the saving
+COMPRESSION_MIN_BYTES = 1024
+
+
 class ResilientHTTPConnector(TargetConnector, ResilientConnector):
     """Resilient connector for HTTP/HTTPS endpoints with circuit breaker"""
     
@@ -19,29 +29,33 @@ class ResilientHTTPConnector(TargetConnector, ResilientConnector):
         
         self.config = config
         self.session: aiohttp.ClientSession = None
-        self.connection_pool_size = 10
+        self._method = config.method.upper()
+        self._request = SESSION_METHODS.get(self._method)
+        self._inflight = asyncio.Semaphore(config.max_inflight)
+        self._compress: Optional[Callable[[bytes], bytes]] = None
+        self._compressed_headers = {**JSON_HEADERS, 'Content-Encoding': config.compression}
         self.total_requests = 0
+        # Per-connector request ids: increasing, so they also order requests
+        self._next_request_id = itertools.count(1).__next__
         self.successful_requests = 0
         self.failed_requests = 0
     
     async def connect(self) -> bool:
         """Initialize HTTP session with connection pooling"""
         try:
+            self._compress = self._build_compressor()
+            
             if self.session and not self.session.closed:
                 return True
             
             timeout = aiohttp.ClientTimeout(total=self.config.timeout)
-            connector = aiohttp.TCPConnector(
-                limit=self.connection_pool_size,
-                limit_per_host=self.connection_pool_size,
-                ttl_dns_cache=300,
-                use_dns_cache=True,
-            )
-            
             self.session = aiohttp.ClientSession(
                 headers=self.config.headers,
                 timeout=timeout,
-                connector=connector
+                connector=get_shared_connector(),
+                connector_owner=False,
+                # Any json= request body goes through orjson as well
+                json_serialize=dumps_payload_str
             )
             
             # Test connection with a simple request
@@ -49,22 +63,35 @@ class ResilientHTTPConnector(TargetConnector, ResilientConnector):
             return True
             
         except Exception as e:
-            print(f"HTTP connection failed: {e}")
+            app_logger.warning("HTTP connection failed: %s", e)
             if self.session:
                 await self.session.close()
                 self.session = None
             return False
     
-    async def send(self, payload: Dict[str, Any]) -> bool:
+    async def send(self, payload: Dict[str, Any], pre_encoded: Optional[bytes] = None) -> bool:
         """Send HTTP request with payload using circuit breaker"""
         if not self.session or self.session.closed:
-            if not await self.connect():
+            if not await self._reconnect():
                 return False
         
         self.total_requests += 1
         
-        # Use circuit breaker for resilient sending
-        success = await self.send_with_circuit_breaker(self._send_internal, payload)
+        # Serialize (and compress) once up front so the protected call only does I/O;
+        # a body from encode() keeps the request id it was given there
+        body, headers = None, JSON_HEADERS
+        if self._method == "GET" or pre_encoded is None:
+            payload = self._with_metadata(payload)
+        if self._method != "GET":
+            body = pre_encoded if pre_encoded is not None else dumps_payload(payload)
+            if self._compress and len(body) >= COMPRESSION_MIN_BYTES:
+                body, headers = self._compress(body), self._compressed_headers
+        
+        # Use circuit breaker for resilient sending, with a bounded number in flight
+        async with self._inflight:
+            success = await self.send_with_circuit_breaker(
+                partial(self._send_internal, body=body, headers=headers), payload
+            )
         
         if success:
             self.successful_requests += 1
@@ -73,40 +100,54 @@ class ResilientHTTPConnector(TargetConnector, ResilientConnector):
         
         return success
     
-    async def _send_internal(self, payload: Dict[str, Any]) -> bool:
+    async def encode(self, payload: Dict[str, Any]) -> bytes:
+        """Serialize the request body, with its request metadata"""
+        return dumps_payload(self._with_metadata(payload))
+    
+    def _with_metadata(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Add request metadata on a shallow copy so callers can reuse their payload"""
+        payload = {**payload, '_request_id': f"{self._next_request_id():x}"}
+        if 'timestamp' not in payload:
+            payload['timestamp'] = utc_timestamp()
+        return payload
+    
+    def _build_compressor(self) -> Optional[Callable[[bytes], bytes]]:
+        """Build the request body compressor for the configured encoding"""
+        if self.config.compression == 'zstd':
+            import zstandard
+            # One compressor per connector; it reuses its context between bodies
+            return zstandard.ZstdCompressor().compress
+        if self.config.compression == 'gzip':
+            return partial(gzip.compress, compresslevel=6, mtime=0)
+        return None
+    
+    async def _send_internal(
+        self,
+        payload: Dict[str, Any],
+        body: Optional[bytes] = None,
+        headers: Dict[str, str] = JSON_HEADERS
+    ) -> bool:
         """Internal send method protected by circuit breaker"""
         try:
-            method = self.config.method.upper()
-            
-            # Add timestamp if not present
-            if 'timestamp' not in payload:
-                payload['timestamp'] = datetime.utcnow().isoformat()
-            
-            # Add request metadata
-            payload['_request_id'] = f"{self.total_requests}_{datetime.utcnow().timestamp()}"
+            if self._request is None:
+                raise ValueError(f"Unsupported HTTP method: {self._method}")
             
-            if method == "GET":
-                async with self.session.get(self.config.url, params=payload) as response:
-                    return await self._handle_response(response, method)
-            elif method == "POST":
-                async with self.session.post(self.config.url, json=payload) as response:
-                    return await self._handle_response(response, method)
-            elif method == "PUT":
-                async with self.session.put(self.config.url, json=payload) as response:
-                    return await self._handle_response(response, method)
-            elif method == "PATCH":
-                async with self.session.patch(self.config.url, json=payload) as response:
-                    return await self._handle_response(response, method)
+            # The body is posted as the bytes serialized once in send()
+            if self._method == "GET":
+                request_args = {'params': payload}
             else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+                request_args = {'data': body if body is not None else dumps_payload(payload), 'headers': headers}
+            
+            async with self._request(self.session)(self.config.url, **request_args) as response:
+                return await self._handle_response(response, self._method)
                 
         except aiohttp.ClientError as e:
-            print(f"HTTP client error: {e}")
-            # Close session to force reconnection
-            await self.disconnect()
+            # The session stays open: devices sharing this connector still use it,
+            # and aiohttp already discards the broken connection
+            app_logger.warning("HTTP client error: %s", e)
             raise e
         except Exception as e:
-            print(f"HTTP send failed: {e}")
+            app_logger.warning("HTTP send failed: %s", e)
             raise e
     
     async def _handle_response(self, response: aiohttp.ClientResponse, method: str) -> bool:
@@ -114,19 +155,17 @@ class ResilientHTTPConnector(TargetConnector, ResilientConnector):
         success = response.status < 400
         
         if not success:
-            error_text = await response.text()
-            error_msg = f"HTTP {method} failed with status {response.status}: {error_text}"
-            print(error_msg)
-            
-            # For certain status codes, close connection
-            if response.status >= 500:
-                await self.disconnect()
+            # Only pull the error body into memory when it will be logged
+            if app_logger.isEnabledFor(logging.DEBUG):
+                app_logger.debug("HTTP %s failed with status %s: %s", method, response.status, await response.text())
+            else:
+                app_logger.warning("HTTP %s failed with status %s", method, response.status)
             
             raise aiohttp.ClientResponseError(
                 request_info=response.request_info,
                 history=response.history,
                 status=response.status,
-                message=error_text
+                message=response.reason or ""
             )
         
         return True
@@ -146,7 +185,7 @@ class ResilientHTTPConnector(TargetConnector, ResilientConnector):
                         status=response.status
                     )
         except Exception as e:
-            print(f"Connection test failed: {e}")
+            app_logger.warning("Connection test failed: %s", e)
             raise e
     
     async def disconnect(self):
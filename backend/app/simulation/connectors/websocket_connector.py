@@ -1,18 +1,181 @@
 """
 WebSocket target connector with automatic reconnection
 """
-import json
 import asyncio
 import websockets
 import logging
-from typing import Dict, Any, Optional
+import random
+import socket
+import ssl
+import time
+from typing import Awaitable, Callable, Dict, Any, Optional, Tuple
 from enum import Enum
+from websockets.uri import parse_uri
 from app.simulation.connectors.base_connector import TargetConnector
 from app.models.target import WebSocketConfig
+from app.utils.serialization import dumps_payload
 
 
 logger = logging.getLogger(__name__)
 
+# Payloads estimated above this are encoded in the default executor so a large
+# burst does not stall the event loop; smaller ones are cheaper to encode inline
+OFFLOAD_ENCODE_BYTES = 256 * 1024
+
+# Per-connector budget for repetitive failure logs: a burst, then a steady rate
+LOG_BURST = 10
+LOG_RATE = 1.0  # records per second
+
+
+# Limits on what the server may send us; incoming messages are drained and
+# discarded, so these only bound the library's receive buffer
+INCOMING_MAX_SIZE = 2 ** 20
+INCOMING_MAX_QUEUE = 16
+
+# Resolved target addresses are reused for this long, so reconnects skip DNS
+DNS_CACHE_TTL = 300.0
+
+_ssl_context: Optional[ssl.SSLContext] = None
+# (host, port) -> (expiry on the monotonic clock, address)
+_resolved_hosts: Dict[Tuple[str, int], Tuple[float, str]] = {}
+
+
+def get_ssl_context() -> ssl.SSLContext:
+    """Return the client TLS context shared by all connectors; building one loads the CA bundle"""
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+async def _resolve(host: str, port: int) -> str:
+    """Resolve a host to one address, cached for DNS_CACHE_TTL seconds"""
+    now = time.monotonic()
+    cached = _resolved_hosts.get((host, port))
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    address = infos[0][4][0]
+    _resolved_hosts[(host, port)] = (now + DNS_CACHE_TTL, address)
+    return address
+
+
+_struct_encoder = None
+
+
+def _encode_payload(payload: Any) -> bytes:
+    """Encode a payload dict with orjson, or a fixed-schema msgspec.Struct with msgspec"""
+    if isinstance(payload, dict):
+        return dumps_payload(payload)
+    
+    global _struct_encoder
+    if _struct_encoder is None:
+        import msgspec
+        # Structs are encoded field by field in C, without per-key type dispatch
+        _struct_encoder = msgspec.json.Encoder(enc_hook=str)
+    return _struct_encoder.encode(payload)
+
+
+def _estimated_size(payload: Dict[str, Any]) -> int:
+    """Rough encoded size of a payload, looking only at its top-level values"""
+    size = 2
+    for key, value in payload.items():
+        if isinstance(value, (str, bytes)):
+            size += len(key) + len(value) + 6
+        elif isinstance(value, (list, tuple, dict)):
+            # Assume short elements such as sensor readings
+            size += len(key) + 16 * len(value) + 6
+        else:
+            size += len(key) + 24
+    return size
+
+
+def _log_task_error(task: asyncio.Task):
+    """Log a background task that ended with an error instead of losing it"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("WebSocket background task failed: %s", task.exception())
+
+
+def _spawn(coro) -> asyncio.Task:
+    """Start a connector background task whose errors get logged"""
+    task = asyncio.create_task(coro)
+    task.add_done_callback(_log_task_error)
+    return task
+
+
+async def _cancel(task: Optional[asyncio.Task]):
+    """Cancel a background task and wait until it has finished"""
+    if task is None or task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        # Only swallow the task's own cancellation, not one aimed at the caller
+        current = asyncio.current_task()
+        if current is not None and current.cancelling():
+            raise
+
+
+# Drain tasks of open connections; they end on their own when the connection closes
+_drain_tasks = set()
+
+
+async def _drain_incoming(websocket):
+    """Read and discard what the server sends so a full receive queue never stalls the connection"""
+    try:
+        async for _ in websocket:
+            pass
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+class WebSocketPool:
+    """Connections shared by connectors with the same URL and headers on an event loop"""
+    
+    # Latest connection attempt per pool key
+    _connections: Dict[Tuple, asyncio.Future] = {}
+    # Open connection -> [pool key, number of connectors holding it]
+    _holders: Dict[Any, list] = {}
+    
+    @staticmethod
+    def key(config: WebSocketConfig) -> Tuple:
+        """Pool key: connections are only shared when they would be opened identically"""
+        headers = tuple(sorted(config.headers.items())) if config.headers else ()
+        return (asyncio.get_running_loop(), config.url, headers, config.ping_interval, config.compression)
+    
+    @classmethod
+    async def acquire(cls, key: Tuple, open_connection: Callable[[], Awaitable[Any]]):
+        """Return the open connection for key, opening it once for concurrent callers"""
+        attempt = cls._connections.get(key)
+        if attempt is None or (attempt.done() and (
+                attempt.cancelled() or attempt.exception() is not None or attempt.result().closed)):
+            attempt = cls._connections[key] = asyncio.ensure_future(open_connection())
+        
+        websocket = await asyncio.shield(attempt)
+        holder = cls._holders.setdefault(websocket, [key, 0])
+        holder[1] += 1
+        return websocket
+    
+    @classmethod
+    def release(cls, websocket) -> bool:
+        """Drop one reference to a connection; True when the caller should close it"""
+        holder = cls._holders.get(websocket)
+        if holder is None:
+            return True
+        
+        holder[1] -= 1
+        if holder[1] > 0:
+            return False
+        
+        del cls._holders[websocket]
+        attempt = cls._connections.get(holder[0])
+        if attempt is not None and attempt.done() and not attempt.cancelled() \
+                and attempt.exception() is None and attempt.result() is websocket:
+            del cls._connections[holder[0]]
+        return True
+
 
 class ConnectionState(Enum):
     """Connection states for circuit breaker pattern"""
@@ -24,7 +187,38 @@ class ConnectionState(Enum):
 class WebSocketConnector(TargetConnector):
     """Connector for WebSocket endpoints with automatic reconnection"""
     
+    has_auto_reconnect = True
+    handles_own_retry = True
+    
+    __slots__ = (
+        'config',
+        'websocket',
+        'connected',
+        'max_retries',
+        'base_delay',
+        'max_delay',
+        'retry_count',
+        'circuit_state',
+        'failure_count',
+        'failure_threshold',
+        'recovery_timeout',
+        'last_failure_time',
+        '_recovery_jitter',
+        '_reconnect_task',
+        '_should_reconnect',
+        '_log_tokens',
+        '_log_refill_time',
+        '_suppressed_logs',
+        '_connect_future',
+        '_out_queue',
+        'dropped',
+        '_writer_task',
+        '_frame_buffer',
+        '_connecting',
+    )
+    
     def __init__(self, config: WebSocketConfig):
+        super().__init__()
         self.config = config
         self.websocket: Optional[websockets.WebSocketServerProtocol] = None
         self.connected = False
@@ -41,15 +235,38 @@ class WebSocketConnector(TargetConnector):
         self.failure_threshold = 3
         self.recovery_timeout = 30.0  # Time to wait before trying half-open
         self.last_failure_time = 0.0
+        # Fraction of recovery_timeout to wait, redrawn on each failure
+        self._recovery_jitter = 1.0
         
         # Connection management
         self._reconnect_task: Optional[asyncio.Task] = None
         self._should_reconnect = True
-        self._connection_lock = asyncio.Lock()
+        # Token bucket limiting failure logs during an outage
+        self._log_tokens = float(LOG_BURST)
+        self._log_refill_time = time.monotonic()
+        self._suppressed_logs = 0
+        
+        # Result of the connect attempt in flight, shared by concurrent callers
+        self._connect_future: Optional[asyncio.Future] = None
+        
+        # Encoded outgoing messages, coalesced into frames by the writer task,
+        # which only runs while there is something to write
+        self._out_queue: asyncio.Queue = asyncio.Queue(maxsize=config.max_queue)
+        # Messages rejected because the queue was full
+        self.dropped = 0
+        self._writer_task: Optional[asyncio.Task] = None
+        # Reused for every batched frame instead of joining a new bytes object each time
+        self._frame_buffer: Optional[memoryview] = None
     
     async def connect(self) -> bool:
         """Connect to WebSocket endpoint with circuit breaker"""
-        async with self._connection_lock:
+        # Callers racing to reconnect share one handshake instead of queuing up
+        if self._connect_future is not None and not self._connect_future.done():
+            return await asyncio.shield(self._connect_future)
+        
+        future = self._connect_future = asyncio.get_running_loop().create_future()
+        success = False
+        try:
             # Check circuit breaker state
             if not self._should_attempt_connection():
                 return False
@@ -57,41 +274,89 @@ class WebSocketConnector(TargetConnector):
             try:
                 await self._establish_connection()
                 self._on_connection_success()
-                return True
+                success = True
                 
             except Exception as e:
                 self._on_connection_failure(e)
-                return False
+            
+            return success
+        finally:
+            future.set_result(success)
     
     async def _establish_connection(self):
         """Establish WebSocket connection"""
+        if self.config.shared_connection:
+            # Let go of a lost shared connection before picking up the current one
+            await self._close_connection()
+            self.websocket = await WebSocketPool.acquire(WebSocketPool.key(self.config), self._open_connection)
+        else:
+            self.websocket = await self._open_connection()
+        
+        self.connected = True
+        logger.info("WebSocket connected to %s", self.config.url)
+    
+    async def _open_connection(self):
+        """Open a new WebSocket connection to the configured URL"""
         extra_headers = self.config.headers if self.config.headers else None
+        target = parse_uri(self.config.url)
         
-        # Use websockets.connect as a context manager to properly handle the connection
-        self.websocket = await websockets.connect(
-            self.config.url,
-            extra_headers=extra_headers,
-            ping_interval=self.config.ping_interval,
-            close_timeout=10.0
-        )
+        tls_args = {}
+        if target.secure:
+            # Certificates are still checked against the host name, not the cached address
+            tls_args = {'ssl': get_ssl_context(), 'server_hostname': target.host}
         
-        self.connected = True
-        logger.info(f"WebSocket connected to {self.config.url}")
+        try:
+            websocket = await websockets.connect(
+                self.config.url,
+                host=await _resolve(target.host, target.port),
+                port=target.port,
+                extra_headers=extra_headers,
+                ping_interval=self.config.ping_interval,
+                # Compressing small JSON frames costs more CPU than it saves on the wire
+                compression='deflate' if self.config.compression == 'deflate' else None,
+                close_timeout=10.0,
+                max_size=INCOMING_MAX_SIZE,
+                max_queue=INCOMING_MAX_QUEUE,
+                **tls_args
+            )
+        except Exception:
+            # The cached address may be what failed; resolve again next time
+            _resolved_hosts.pop((target.host, target.port), None)
+            raise
+        
+        # One reader per connection, shared ones included
+        drain_task = _spawn(_drain_incoming(websocket))
+        _drain_tasks.add(drain_task)
+        drain_task.add_done_callback(_drain_tasks.discard)
+        return websocket
+    
+    async def _close_connection(self):
+        """Close the current connection, or only release it while other connectors share it"""
+        websocket, self.websocket = self.websocket, None
+        self.connected = False
+        if websocket is None:
+            return
+        
+        if not self.config.shared_connection or WebSocketPool.release(websocket):
+            try:
+                await websocket.close()
+            except Exception as e:
+                logger.warning("Error closing WebSocket: %s", e)
     
     def _should_attempt_connection(self) -> bool:
         """Check if connection attempt should be made based on circuit breaker state"""
-        current_time = asyncio.get_event_loop().time()
+        current_time = time.monotonic()
         
-        if self.circuit_state == ConnectionState.CLOSED:
+        if self.circuit_state is ConnectionState.CLOSED:
             return True
-        elif self.circuit_state == ConnectionState.OPEN:
+        elif self.circuit_state is ConnectionState.OPEN:
             # Check if enough time has passed to try half-open
-            if current_time - self.last_failure_time >= self.recovery_timeout:
+            if current_time - self.last_failure_time >= self.recovery_timeout * self._recovery_jitter:
                 self.circuit_state = ConnectionState.HALF_OPEN
                 logger.info("Circuit breaker moving to HALF_OPEN state")
                 return True
             return False
-        elif self.circuit_state == ConnectionState.HALF_OPEN:
+        elif self.circuit_state is ConnectionState.HALF_OPEN:
             return True
         
         return False
@@ -106,66 +371,179 @@ class WebSocketConnector(TargetConnector):
     def _on_connection_failure(self, error: Exception):
         """Handle connection failure"""
         self.failure_count += 1
-        self.last_failure_time = asyncio.get_event_loop().time()
+        self.last_failure_time = time.monotonic()
+        # Connectors tripped by the same outage should not all probe again at once
+        self._recovery_jitter = random.uniform(0.5, 1.0)
         
-        logger.warning(f"WebSocket connection failed (attempt {self.failure_count}): {error}")
+        self._log_limited(logging.WARNING, "WebSocket connection failed (attempt %d): %s", self.failure_count, error)
         
         # Update circuit breaker state
         if self.failure_count >= self.failure_threshold:
             self.circuit_state = ConnectionState.OPEN
-            logger.warning(f"Circuit breaker OPEN after {self.failure_count} failures")
-        elif self.circuit_state == ConnectionState.HALF_OPEN:
+            logger.warning("Circuit breaker OPEN after %d failures", self.failure_count)
+        elif self.circuit_state is ConnectionState.HALF_OPEN:
             self.circuit_state = ConnectionState.OPEN
             logger.warning("Circuit breaker back to OPEN from HALF_OPEN")
     
-    async def send(self, payload: Dict[str, Any]) -> bool:
-        """Send message via WebSocket with automatic reconnection"""
-        # Try to send with current connection
-        if await self._try_send(payload):
-            return True
+    def _log_limited(self, level: int, msg: str, *args):
+        """Log unless this connector has used up its log budget; skipped records are counted"""
+        if not logger.isEnabledFor(level):
+            return
+        
+        now = time.monotonic()
+        self._log_tokens = min(LOG_BURST, self._log_tokens + (now - self._log_refill_time) * LOG_RATE)
+        self._log_refill_time = now
+        if self._log_tokens < 1:
+            self._suppressed_logs += 1
+            return
+        
+        self._log_tokens -= 1
+        if self._suppressed_logs:
+            msg += " (%d similar messages suppressed)"
+            args += (self._suppressed_logs,)
+            self._suppressed_logs = 0
+        logger.log(level, msg, *args)
+    
+    @staticmethod
+    def encode_once(payload: Dict[str, Any]) -> bytes:
+        """Encode a payload once so it can be sent through several connectors"""
+        return _encode_payload(payload)
+    
+    async def send(self, payload: Dict[str, Any], pre_encoded: Optional[bytes] = None) -> bool:
+        """
+        Queue a message for the background writer, connecting first if needed
+        
+        Args:
+            payload: Message to send, as a dict or a fixed-schema msgspec.Struct
+            pre_encoded: Result of encode_once(payload), when fanning the same
+                message out to several connectors
+        """
+        # Fail fast while the circuit breaker is still holding off reconnects
+        if (self.circuit_state is ConnectionState.OPEN
+                and time.monotonic() - self.last_failure_time < self.recovery_timeout * self._recovery_jitter):
+            return False
+        
+        if not self.connected:
+            # Nothing would deliver the message until a connection is made
+            if not (self._should_reconnect and await self._reconnect_and_retry()):
+                return False
+        
+        try:
+            self._out_queue.put_nowait(pre_encoded if pre_encoded is not None else await self.encode(payload))
+        except asyncio.QueueFull:
+            # The target is not keeping up; shed load rather than buffer without end
+            self.dropped += 1
+            return False
+        self._start_writer()
+        return True
+    
+    @staticmethod
+    async def encode(payload: Dict[str, Any]) -> bytes:
+        """Encode a payload for send(pre_encoded=...), off the event loop when it is large"""
+        if isinstance(payload, dict) and _estimated_size(payload) > OFFLOAD_ENCODE_BYTES:
+            return await asyncio.get_running_loop().run_in_executor(None, dumps_payload, payload)
+        return _encode_payload(payload)
+    
+    async def flush(self):
+        """Wait until every queued message has been written or dropped"""
+        if self._writer_task and not self._writer_task.done():
+            await self._out_queue.join()
+    
+    def _start_writer(self):
+        """Start the writer task unless it is already running"""
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = _spawn(self._writer_loop())
+    
+    async def _writer_loop(self):
+        """Write queued messages until the queue is empty, coalescing those already waiting into one frame"""
+        queue = self._out_queue
+        max_messages = self.config.max_batch_messages
+        max_bytes = self.config.max_batch_bytes
+        pending: Optional[bytes] = None
+        
+        while pending is not None or not queue.empty():
+            message = pending if pending is not None else queue.get_nowait()
+            pending = None
+            count, size = 1, len(message)
+            
+            if max_messages > 1 and size <= max_bytes and not queue.empty():
+                # Newline-delimited frame of everything queued, up to the batch
+                # limits, assembled in place in the connector's frame buffer
+                buffer = self._get_frame_buffer()
+                buffer[:size] = message
+                while count < max_messages and not queue.empty():
+                    message = queue.get_nowait()
+                    end = size + 1 + len(message)
+                    if end > max_bytes:
+                        pending = message
+                        break
+                    buffer[size] = 0x0A
+                    buffer[size + 1:end] = message
+                    size, count = end, count + 1
+                frame = str(buffer[:size], 'utf-8')
+            else:
+                frame = message.decode()
+            
+            try:
+                # Decoded once per frame so targets keep receiving text frames
+                await self._write_frame(frame, count)
+            finally:
+                for _ in range(count):
+                    queue.task_done()
+    
+    def _get_frame_buffer(self) -> memoryview:
+        """Return the buffer batched frames are assembled in, allocated on first use"""
+        if self._frame_buffer is None:
+            self._frame_buffer = memoryview(bytearray(self.config.max_batch_bytes))
+        return self._frame_buffer
+    
+    async def _write_frame(self, frame: str, count: int):
+        """Write one frame, reconnecting once if the connection was lost"""
+        if await self._try_send(frame):
+            return
         
         # If send failed, try to reconnect and send again
-        if self._should_reconnect and await self._reconnect_and_retry():
-            return await self._try_send(payload)
+        if self._should_reconnect and await self._reconnect_and_retry() and await self._try_send(frame):
+            return
         
-        return False
+        self._log_limited(logging.WARNING, "WebSocket frame with %d message(s) dropped", count)
     
-    async def _try_send(self, payload: Dict[str, Any]) -> bool:
-        """Attempt to send payload through current connection"""
+    async def _try_send(self, frame: str) -> bool:
+        """Attempt to send a frame through current connection"""
         if not self.connected or not self.websocket:
             return False
         
         try:
-            message = json.dumps(payload)
-            await self.websocket.send(message)
+            await self.websocket.send(frame)
             return True
             
         except websockets.exceptions.ConnectionClosed:
-            logger.warning("WebSocket connection closed during send")
+            self._log_limited(logging.WARNING, "WebSocket connection closed during send")
             self.connected = False
             return False
         except Exception as e:
-            logger.error(f"WebSocket send failed: {e}")
+            self._log_limited(logging.ERROR, "WebSocket send failed: %s", e)
             self.connected = False
             return False
     
     async def _reconnect_and_retry(self) -> bool:
         """Attempt to reconnect with exponential backoff"""
         if self.retry_count >= self.max_retries:
-            logger.error(f"Max reconnection attempts ({self.max_retries}) reached")
+            self._log_limited(logging.ERROR, "Max reconnection attempts (%d) reached", self.max_retries)
             return False
         
-        # Calculate delay with exponential backoff
-        delay = min(self.base_delay * (2 ** self.retry_count), self.max_delay)
+        # Exponential backoff with full jitter, so connectors that lost the
+        # same server do not all reconnect in lockstep
+        delay = random.uniform(0, min(self.base_delay * (2 ** self.retry_count), self.max_delay))
         self.retry_count += 1
         
-        logger.info(f"Attempting reconnection {self.retry_count}/{self.max_retries} after {delay}s delay")
+        self._log_limited(logging.INFO, "Attempting reconnection %d/%d after %.2fs delay", self.retry_count, self.max_retries, delay)
         
         try:
             await asyncio.sleep(delay)
             return await self.connect()
         except Exception as e:
-            logger.error(f"Reconnection attempt {self.retry_count} failed: {e}")
+            self._log_limited(logging.ERROR, "Reconnection attempt %d failed: %s", self.retry_count, e)
             return False
     
     async def start_auto_reconnect(self):
@@ -174,58 +552,49 @@ class WebSocketConnector(TargetConnector):
             return
         
         self._should_reconnect = True
-        self._reconnect_task = asyncio.create_task(self._auto_reconnect_loop())
+        self._reconnect_task = _spawn(self._auto_reconnect_loop())
     
     async def stop_auto_reconnect(self):
         """Stop automatic reconnection"""
         self._should_reconnect = False
-        if self._reconnect_task and not self._reconnect_task.done():
-            self._reconnect_task.cancel()
-            try:
-                await self._reconnect_task
-            except asyncio.CancelledError:
-                pass
+        await _cancel(self._reconnect_task)
     
     async def _auto_reconnect_loop(self):
-        """Background loop to monitor connection and reconnect if needed"""
+        """Background loop that reconnects whenever the connection is lost"""
         while self._should_reconnect:
             try:
-                # Check connection health
-                if self.connected and self.websocket:
-                    try:
-                        # Send ping to check if connection is alive
-                        await self.websocket.ping()
-                        await asyncio.sleep(self.config.ping_interval)
-                        continue
-                    except Exception:
-                        logger.warning("WebSocket ping failed, connection lost")
+                websocket = self.websocket
+                if self.connected and websocket:
+                    # Returns once the connection is closed; the library's own
+                    # keepalive pings close it when the peer stops answering
+                    await websocket.wait_closed()
+                    if self.websocket is websocket:
+                        logger.warning("WebSocket connection lost")
                         self.connected = False
+                        # Give the writer's reconnect a chance before starting another
+                        await asyncio.sleep(self.base_delay)
+                    continue
                 
-                # If not connected, try to reconnect
-                if not self.connected:
-                    logger.info("Attempting automatic reconnection...")
-                    await self.connect()
-                
-                await asyncio.sleep(5)  # Check every 5 seconds
+                logger.info("Attempting automatic reconnection...")
+                if not await self.connect():
+                    await asyncio.sleep(5)  # Retry every 5 seconds
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error in auto-reconnect loop: {e}")
+                logger.error("Error in auto-reconnect loop: %s", e)
                 await asyncio.sleep(10)  # Wait longer on error
     
     async def disconnect(self):
-        """Close WebSocket connection and stop reconnection"""
+        """Write queued messages, then close WebSocket connection and stop reconnection"""
         await self.stop_auto_reconnect()
         
-        if self.websocket:
-            try:
-                await self.websocket.close()
-            except Exception as e:
-                logger.warning(f"Error closing WebSocket: {e}")
-            finally:
-                self.websocket = None
-                self.connected = False
+        # With reconnection stopped, the writer drops rather than retries failed frames
+        await self.flush()
+        await _cancel(self._writer_task)
+        self._writer_task = None
+        
+        await self._close_connection()
         
         logger.info("WebSocket disconnected")
     
@@ -237,5 +606,6 @@ class WebSocketConnector(TargetConnector):
             "retry_count": self.retry_count,
             "failure_count": self.failure_count,
             "last_failure_time": self.last_failure_time,
+            "dropped": self.dropped,
             "auto_reconnect_active": self._should_reconnect and self._reconnect_task and not self._reconnect_task.done()
         }
\ No newline at end of file
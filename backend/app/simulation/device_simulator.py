@@ -2,13 +2,73 @@
 Individual device simulator
 """
 import asyncio
-from datetime import datetime
-from typing import Dict, Any, Optional
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, Optional, Union
 from app.models.device import DeviceResponse
 from app.simulation.payload_generators.base_generator import PayloadGenerator
 from app.simulation.connectors.base_connector import TargetConnector
 from app.models.simulation import SimulationLogEntry
 from app.simulation.metrics import metrics_collector
+from app.utils.serialization import utc_timestamp
+
+
+# Seconds between hand-offs of buffered message metrics to the metrics collector,
+# done for all of a project's devices by SimulationProject
+METRICS_FLUSH_INTERVAL = 1.0
+
+# Level each simulation log event is emitted at, for filtering with log_level
+EVENT_LOG_LEVELS = {
+    "message_sent": logging.DEBUG,
+    "info": logging.INFO,
+    "connected": logging.INFO,
+    "disconnected": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+# Observers count running devices from these, so they are never filtered out
+LIFECYCLE_EVENTS = frozenset({"started", "stopped"})
+
+
+class Backoff:
+    """Capped exponential backoff with jitter, so devices failing together retry apart"""
+    
+    __slots__ = ('base_delay', 'max_delay', 'multiplier', 'jitter')
+    
+    def __init__(
+        self,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: float = 0.25
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+    
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number attempt (0-based)"""
+        # The exponent is bounded so a long error streak cannot overflow
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** min(attempt, 64))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class _PendingMetrics:
+    """Per-message metrics a device buffers until its next flush"""
+    
+    __slots__ = ('generated', 'sent', 'bytes_out', 'response_times')
+    
+    def __init__(self):
+        self.generated = 0
+        self.sent = 0
+        self.bytes_out = 0
+        # Only the latest ones reach the connector's recent response time window
+        self.response_times: deque = deque(maxlen=100)
 
 
 class DeviceStats:
@@ -19,17 +79,29 @@ class DeviceStats:
         self.errors = 0
         self.connection_errors = 0
         self.send_errors = 0
-        self.last_message_at: Optional[datetime] = None
         self.last_error: Optional[str] = None
-        self.last_success_at: Optional[datetime] = None
         self.consecutive_errors = 0
         self.total_retries = 0
+        # Monotonic time of the last successful message; turned into a
+        # datetime only when the stats are read
+        self._last_success_mono: Optional[float] = None
+    
+    @property
+    def last_success_at(self) -> Optional[datetime]:
+        """Wall-clock time of the last successful message"""
+        if self._last_success_mono is None:
+            return None
+        return datetime.utcnow() - timedelta(seconds=time.monotonic() - self._last_success_mono)
+    
+    @property
+    def last_message_at(self) -> Optional[datetime]:
+        """Wall-clock time of the last message sent"""
+        return self.last_success_at
     
     def increment_messages(self):
         """Increment message count"""
         self.messages_sent += 1
-        self.last_message_at = datetime.utcnow()
-        self.last_success_at = datetime.utcnow()
+        self._last_success_mono = time.monotonic()
         self.consecutive_errors = 0  # Reset consecutive errors on success
     
     def record_error(self, error: str, error_type: str = "general"):
@@ -59,12 +131,38 @@ class DeviceSimulator:
         log_callback=None,
         max_retries: int = 3,
         retry_delay: float = 1.0,
-        max_consecutive_errors: int = 10
+        max_consecutive_errors: int = 10,
+        shared_connector: bool = False,
+        max_retry_delay: float = 30.0,
+        retry_jitter: float = 0.25,
+        message_callback: Optional[Callable[[], None]] = None,
+        log_level: Union[int, str] = logging.DEBUG,
+        log_sample_rate: int = 1,
+        log_min_interval: Optional[float] = None
     ):
         self.config = device_config
         self.payload_generator = payload_generator
         self.connector = target_connector
         self.log_callback = log_callback
+        # Called once per message sent, whether or not its log entry is emitted
+        self.message_callback = message_callback
+        
+        # Log filtering: events below log_level are dropped, and only every
+        # log_sample_rate-th message_sent event is emitted, or the first one
+        # after log_min_interval seconds without one
+        if isinstance(log_level, str):
+            level_name = log_level
+            log_level = logging.getLevelNamesMapping().get(level_name.upper())
+            if log_level is None:
+                raise ValueError(f"Unknown simulation log level: {level_name!r}")
+        self._enabled_events = LIFECYCLE_EVENTS | {
+            event_type for event_type, level in EVENT_LOG_LEVELS.items() if level >= log_level
+        }
+        self.log_sample_rate = max(log_sample_rate, 1)
+        self.log_min_interval = float('inf') if log_min_interval is None else log_min_interval
+        self._messages_since_log = 0
+        self._last_msg_log_mono = float('-inf')
+        self._message_sent_text = f"Message sent successfully to {target_connector.__class__.__name__}"
         self.is_running = False
         self.stats = DeviceStats()
         
@@ -72,6 +170,10 @@ class DeviceSimulator:
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.max_consecutive_errors = max_consecutive_errors
+        self._backoff = Backoff(base_delay=retry_delay, max_delay=max_retry_delay, jitter=retry_jitter)
+        
+        # A shared connector is opened and closed by its owner, not by this device
+        self.shared_connector = shared_connector
         
         # Connection state
         self.is_connected = False
@@ -82,6 +184,10 @@ class DeviceSimulator:
             device_config.id, device_config.name
         )
         self.connector_id = f"{device_config.id}_{target_connector.__class__.__name__}"
+        # Connector capabilities, looked up once rather than on every send
+        self._has_auto_reconnect = target_connector.has_auto_reconnect
+        self._handles_own_retry = target_connector.handles_own_retry
+        self._pending = _PendingMetrics()
     
     async def run(self):
         """Main simulation loop for the device"""
@@ -115,11 +221,9 @@ class DeviceSimulator:
                     
                     if success:
                         self.stats.increment_messages()
-                        await self._log_event(
-                            "message_sent",
-                            f"Message sent successfully to {self.connector.__class__.__name__}",
-                            payload
-                        )
+                        if self.message_callback is not None:
+                            self.message_callback()
+                        await self._log_event("message_sent", self._message_sent_text, payload)
                     else:
                         self.stats.record_error("Failed to send message after retries", "send")
                         await self._log_event("error", "Failed to send message to target system after retries")
@@ -135,56 +239,61 @@ class DeviceSimulator:
                     await self._log_event("error", error_msg)
                     
                     # Wait before retrying (adaptive delay based on consecutive errors)
-                    retry_delay = min(30, self.retry_delay * (2 ** min(self.stats.consecutive_errors, 5)))
-                    await asyncio.sleep(retry_delay)
+                    await asyncio.sleep(self._backoff.delay(self.stats.consecutive_errors))
         
         except asyncio.CancelledError:
             pass
         finally:
             self.is_running = False
+            self.flush_metrics()
             await self._stop_auto_reconnection()
             await self._safe_disconnect()
             await self._log_event("stopped", "Device simulation stopped")
     
     async def _log_event(self, event_type: str, message: str, payload: Dict[str, Any] = None):
         """Log a simulation event"""
-        if self.log_callback:
-            log_entry = SimulationLogEntry(
-                timestamp=datetime.utcnow(),
-                device_id=self.config.id,
-                device_name=self.config.name,
-                event_type=event_type,
-                message=message,
-                payload=payload
-            )
-            await self.log_callback(log_entry)
+        if self.log_callback is None or event_type not in self._enabled_events:
+            return
+        
+        if event_type == "message_sent":
+            self._messages_since_log += 1
+            now = time.monotonic()
+            if (self._messages_since_log < self.log_sample_rate
+                    and now - self._last_msg_log_mono < self.log_min_interval):
+                return
+            self._messages_since_log = 0
+            self._last_msg_log_mono = now
+        
+        log_entry = SimulationLogEntry(
+            timestamp=datetime.utcnow(),
+            device_id=self.config.id,
+            device_name=self.config.name,
+            event_type=event_type,
+            message=message,
+            payload=payload
+        )
+        await self.log_callback(log_entry)
     
     async def _start_auto_reconnection(self):
         """Start auto-reconnection for WebSocket connectors"""
-        from app.simulation.connectors.websocket_connector import WebSocketConnector
-        
-        if isinstance(self.connector, WebSocketConnector):
+        if self._has_auto_reconnect and not self.shared_connector:
             await self.connector.start_auto_reconnect()
             await self._log_event("info", "Auto-reconnection started for WebSocket connector")
     
     async def _stop_auto_reconnection(self):
         """Stop auto-reconnection for WebSocket connectors"""
-        from app.simulation.connectors.websocket_connector import WebSocketConnector
-        
-        if isinstance(self.connector, WebSocketConnector):
+        if self._has_auto_reconnect and not self.shared_connector:
             await self.connector.stop_auto_reconnect()
             await self._log_event("info", "Auto-reconnection stopped for WebSocket connector")
     
     async def _ensure_connection(self):
         """Ensure connection to target system with retry logic"""
-        from app.simulation.connectors.websocket_connector import WebSocketConnector
-        
         if self.is_connected:
             return True
         
         # For WebSocket connectors with auto-reconnection, just try once
         # as they handle their own reconnection logic
-        if isinstance(self.connector, WebSocketConnector):
+        if self._has_auto_reconnect:
             try:
                 self.last_connection_attempt = datetime.utcnow()
                 success = await self.connector.connect()
@@ -217,7 +326,7 @@ class DeviceSimulator:
                     if attempt < self.max_retries:
                         self.stats.record_retry()
                         await self._log_event("warning", f"Connection attempt {attempt + 1} failed, retrying...")
-                        await asyncio.sleep(self.retry_delay * (2 ** attempt))
+                        await asyncio.sleep(self._backoff.delay(attempt))
                     
             except Exception as e:
                 error_msg = f"Connection attempt {attempt + 1} failed: {str(e)}"
@@ -226,7 +335,7 @@ class DeviceSimulator:
                 if attempt < self.max_retries:
                     self.stats.record_retry()
                     await self._log_event("warning", error_msg + ", retrying...")
-                    await asyncio.sleep(self.retry_delay * (2 ** attempt))
+                    await asyncio.sleep(self._backoff.delay(attempt))
                 else:
                     await self._log_event("error", f"Failed to connect after {self.max_retries + 1} attempts")
         
@@ -250,7 +359,7 @@ class DeviceSimulator:
                 payload['device_name'] = self.config.name
             
             # Record successful payload generation
-            self.device_metrics.record_message_generated()
+            self._pending.generated += 1
             
             return payload
             
@@ -266,34 +375,48 @@ class DeviceSimulator:
             return {
                 "device_id": self.config.id,
                 "device_name": self.config.name,
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": utc_timestamp(),
                 "error": "payload_generation_failed",
                 "message": str(e)
             }
     
+    def _record_sent(self, response_time: float, payload_size: int):
+        """Buffer the metrics of a successful send until the next flush"""
+        pending = self._pending
+        pending.sent += 1
+        pending.bytes_out += payload_size
+        pending.response_times.append(response_time)
+    
+    def flush_metrics(self):
+        """Hand buffered message metrics to the metrics collector"""
+        if not (self._pending.generated or self._pending.sent):
+            return
+        
+        pending, self._pending = self._pending, _PendingMetrics()
+        self.device_metrics.record_messages(generated=pending.generated, sent=pending.sent)
+        if pending.sent:
+            metrics_collector.record_connector_success_batch(
+                self.connector_id,
+                self.connector.__class__.__name__,
+                pending.sent,
+                pending.response_times,
+                pending.bytes_out
+            )
+    
     async def _send_with_retry(self, payload: Dict[str, Any]) -> bool:
         """Send payload with retry logic"""
-        from app.simulation.connectors.websocket_connector import WebSocketConnector
-        
-        start_time = datetime.utcnow()
-        
         # For WebSocket connectors, rely on their internal retry logic
-        if isinstance(self.connector, WebSocketConnector):
+        if self._handles_own_retry:
             try:
-                send_start = datetime.utcnow()
-                success = await self.connector.send(payload)
-                response_time = (datetime.utcnow() - send_start).total_seconds()
+                # Encoded once here so the message size comes for free
+                encoded = await self.connector.encode(payload)
+                send_start = time.perf_counter()
+                success = await self.connector.send(payload, pre_encoded=encoded)
+                response_time = time.perf_counter() - send_start
                 
                 if success:
                     # Record successful send
-                    payload_size = len(str(payload).encode('utf-8'))
-                    metrics_collector.record_connector_success(
-                        self.connector_id,
-                        self.connector.__class__.__name__,
-                        response_time,
-                        payload_size
-                    )
-                    self.device_metrics.record_message_sent()
+                    self._record_sent(response_time, len(encoded))
                     self.is_connected = True  # Update connection status
                     return True
                 else:
@@ -319,7 +442,9 @@ class DeviceSimulator:
                 self.is_connected = False
                 return False
         
-        # For other connectors, use the original retry logic
+        # For other connectors, use the original retry logic; the payload is
+        # encoded once and the same bytes are sent on every attempt
+        encoded: Optional[bytes] = None
         for attempt in range(self.max_retries + 1):
             try:
                 # Ensure we're connected before sending
@@ -336,21 +461,17 @@ class DeviceSimulator:
                         self.device_metrics.record_send_failure()
                         return False
                 
+                if encoded is None:
+                    encoded = await self.connector.encode(payload)
+                
                 # Attempt to send
-                send_start = datetime.utcnow()
-                success = await self.connector.send(payload)
-                response_time = (datetime.utcnow() - send_start).total_seconds()
+                send_start = time.perf_counter()
+                success = await self.connector.send(payload, pre_encoded=encoded)
+                response_time = time.perf_counter() - send_start
                 
                 if success:
-                    # Record successful send
-                    payload_size = len(str(payload).encode('utf-8'))
-                    metrics_collector.record_connector_success(
-                        self.connector_id,
-                        self.connector.__class__.__name__,
-                        response_time,
-                        payload_size
-                    )
-                    self.device_metrics.record_message_sent()
+                    # Record successful send, sized as the bytes the connector sent
+                    self._record_sent(response_time, len(encoded))
                     return True
                 else:
                     # Send failed, but no exception - might be a temporary issue
@@ -358,7 +479,7 @@ class DeviceSimulator:
                         self.stats.record_retry()
                         self.device_metrics.record_retry()
                         await self._log_event("warning", f"Send attempt {attempt + 1} failed, retrying...")
-                        await asyncio.sleep(self.retry_delay * (2 ** attempt))
+                        await asyncio.sleep(self._backoff.delay(attempt))
                         
                         # Mark as disconnected to force reconnection on next attempt
                         self.is_connected = False
@@ -378,7 +499,7 @@ class DeviceSimulator:
                     self.stats.record_retry()
                     self.device_metrics.record_retry()
                     await self._log_event("warning", error_msg + ", retrying...")
-                    await asyncio.sleep(self.retry_delay * (2 ** attempt))
+                    await asyncio.sleep(self._backoff.delay(attempt))
                     
                     # Mark as disconnected to force reconnection on next attempt
                     self.is_connected = False
@@ -399,7 +520,8 @@ class DeviceSimulator:
         """Safely disconnect from target system"""
         try:
             if self.is_connected:
-                await self.connector.disconnect()
+                if not self.shared_connector:
+                    await self.connector.disconnect()
                 self.is_connected = False
                 await self._log_event("disconnected", "Disconnected from target system")
         except Exception as e:
@@ -407,8 +529,6 @@ class DeviceSimulator:
     
     def get_status(self):
         """Get current device status"""
-        from app.simulation.connectors.websocket_connector import WebSocketConnector
-        
         status = {
             "device_id": self.config.id,
             "device_name": self.config.name,
@@ -427,8 +547,8 @@ class DeviceSimulator:
         }
         
         # Add WebSocket-specific connection statistics
-        if isinstance(self.connector, WebSocketConnector):
-            websocket_stats = self.connector.get_connection_stats()
-            status["websocket_stats"] = websocket_stats
+        connection_stats = self.connector.get_connection_stats()
+        if connection_stats is not None:
+            status["websocket_stats"] = connection_stats
         
         return status
\ No newline at end of file
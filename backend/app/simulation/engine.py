@@ -2,11 +2,13 @@
 Main simulation engine - orchestrates all simulations
 """
 import asyncio
+import time
 from datetime import datetime
 from typing import Dict, Optional, List
 from fastapi import WebSocket
+from app.core.config import settings
 from app.models.simulation import SimulationStatus, SimulationLogEntry
-from app.simulation.device_simulator import DeviceSimulator
+from app.simulation.device_simulator import DeviceSimulator, METRICS_FLUSH_INTERVAL
 from app.simulation.connectors import ConnectorFactory
 from app.models.target import TargetType
 from app.repositories.project_repository import ProjectRepository
@@ -16,6 +18,12 @@ from app.repositories.payload_repository import PayloadRepository
 from app.simulation.payload_generators.visual_generator import VisualPayloadGenerator
 from app.simulation.payload_generators.python_runner import PythonCodeGenerator
 from app.models.payload import PayloadType
+from app.utils.serialization import dumps_payload_str
+from app.utils.logger import app_logger
+
+
+# Seconds a log observer gets to accept an entry before it is dropped
+OBSERVER_SEND_TIMEOUT = 5.0
 
 
 class SimulationProject:
@@ -25,11 +33,30 @@ class SimulationProject:
         self.project_id = project_id
         self.device_simulators: List[DeviceSimulator] = []
         self.tasks: List[asyncio.Task] = []
+        # Hands every device's buffered metrics to the collector on an interval
+        self._metrics_task: Optional[asyncio.Task] = None
         self.is_running = False
-        self.started_at = None
+        self.started_at = None  # Wall clock, for display
+        self.started_at_monotonic: Optional[int] = None  # Monotonic ns, for elapsed time
         self.observers: List[WebSocket] = []
         self.log_buffer: List[SimulationLogEntry] = []  # Buffer for recent logs
         self.max_log_buffer_size = 100  # Keep last 100 logs
+        
+        # Aggregates maintained from device log events for cheap status reads
+        self.active_devices = 0
+        self.messages_sent = 0
+    
+    def mark_started(self):
+        """Record the start time once, as wall clock for display and monotonic for durations"""
+        self.started_at = datetime.utcnow()
+        self.started_at_monotonic = time.monotonic_ns()
+    
+    @property
+    def uptime_seconds(self) -> Optional[float]:
+        """Seconds since the project was started, unaffected by wall-clock adjustments"""
+        if self.started_at_monotonic is None:
+            return None
+        return (time.monotonic_ns() - self.started_at_monotonic) / 1e9
     
     async def start_all_devices(self):
         """Start all device simulators"""
@@ -37,6 +64,7 @@ class SimulationProject:
         for simulator in self.device_simulators:
             task = asyncio.create_task(simulator.run())
             self.tasks.append(task)
+        self._metrics_task = asyncio.create_task(self._flush_metrics_loop())
     
     async def stop_all_devices(self):
         """Stop all device simulators"""
@@ -49,6 +77,19 @@ class SimulationProject:
             await asyncio.gather(*self.tasks, return_exceptions=True)
         
         self.tasks.clear()
+        
+        # Devices flush their own metrics as they stop
+        if self._metrics_task:
+            self._metrics_task.cancel()
+            await asyncio.gather(self._metrics_task, return_exceptions=True)
+            self._metrics_task = None
+    
+    async def _flush_metrics_loop(self):
+        """Flush the metrics buffered by every device, including idle ones, on an interval"""
+        while True:
+            await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+            for simulator in self.device_simulators:
+                simulator.flush_metrics()
     
     def add_observer(self, websocket: WebSocket):
         """Add WebSocket observer for logs"""
@@ -59,27 +100,48 @@ class SimulationProject:
         if websocket in self.observers:
             self.observers.remove(websocket)
     
+    def record_message_sent(self):
+        """Count a message sent by one of the project's devices"""
+        self.messages_sent += 1
+    
     async def notify_observers(self, log_entry: SimulationLogEntry):
         """Notify all observers of a new log entry"""
+        # Keep aggregate counters in step with device events; messages are
+        # counted by record_message_sent since message_sent events are sampled
+        if log_entry.event_type == "started":
+            self.active_devices += 1
+        elif log_entry.event_type == "stopped":
+            self.active_devices -= 1
+        
         # Add to log buffer
         self.log_buffer.insert(0, log_entry)  # Add to beginning
         if len(self.log_buffer) > self.max_log_buffer_size:
             self.log_buffer = self.log_buffer[:self.max_log_buffer_size]  # Keep only recent logs
         
-        # Notify WebSocket observers
-        disconnected = []
-        log_data = log_entry.dict()
+        if not self.observers:
+            return
         
-        for websocket in self.observers:
-            try:
-                await websocket.send_json(log_data)
-            except Exception as e:
-                print(f"Failed to send log to observer: {e}")
-                disconnected.append(websocket)
+        # Notify WebSocket observers concurrently, serializing the entry once for all of them
+        log_text = dumps_payload_str(log_entry.dict())
+        observers = list(self.observers)
+        if len(observers) == 1:
+            errors = [await self._send_to_observer(observers[0], log_text)]
+        else:
+            errors = await asyncio.gather(*(self._send_to_observer(ws, log_text) for ws in observers))
         
-        # Remove disconnected observers
-        for ws in disconnected:
-            self.remove_observer(ws)
+        # Remove disconnected or stalled observers
+        for websocket, error in zip(observers, errors):
+            if error is not None:
+                app_logger.warning("Failed to send log to observer: %r", error)
+                self.remove_observer(websocket)
+    
+    async def _send_to_observer(self, websocket: WebSocket, log_text: str) -> Optional[Exception]:
+        """Send a log entry to one observer, returning the error if it failed"""
+        try:
+            await asyncio.wait_for(websocket.send_text(log_text), OBSERVER_SEND_TIMEOUT)
+        except Exception as e:
+            return e
+        return None
 
 
 class SimulationEngine:
@@ -148,29 +210,25 @@ class SimulationEngine:
                 else:
                     continue  # Skip device without target
                 
-                # Create log callback function for this device
-                async def create_log_callback(project):
-                    async def log_callback(log_entry):
-                        await project.notify_observers(log_entry)
-                    return log_callback
-                
-                log_callback = await create_log_callback(sim_project)
-                
                 # Create device simulator with enhanced configuration
                 device_simulator = DeviceSimulator(
                     device_config=device,
                     payload_generator=payload_generator,
                     target_connector=connector,
-                    log_callback=log_callback,
+                    log_callback=sim_project.notify_observers,
                     max_retries=3,
                     retry_delay=1.0,
-                    max_consecutive_errors=10
+                    max_consecutive_errors=10,
+                    message_callback=sim_project.record_message_sent,
+                    log_level=settings.simulation_log_level,
+                    log_sample_rate=settings.simulation_log_sample_rate,
+                    log_min_interval=settings.simulation_log_min_interval
                 )
                 
                 sim_project.device_simulators.append(device_simulator)
             
             # Start simulation
-            sim_project.started_at = datetime.utcnow()
+            sim_project.mark_started()
             await sim_project.start_all_devices()
             
             self.running_projects[project_id] = sim_project
@@ -235,6 +293,7 @@ class SimulationEngine:
             total_devices=len(sim_project.device_simulators),
             messages_sent=total_messages,
             started_at=sim_project.started_at,
+            uptime_seconds=sim_project.uptime_seconds,
             devices=device_statuses,
             errors=errors
         )
@@ -264,7 +323,7 @@ class SimulationEngine:
         # Send recent logs from buffer (in reverse order to maintain chronological order)
         for log_entry in reversed(sim_project.log_buffer[-20:]):  # Send last 20 logs
             try:
-                await websocket.send_json(log_entry.dict())
+                await websocket.send_text(dumps_payload_str(log_entry.dict()))
                 await asyncio.sleep(0.01)  # Small delay to prevent overwhelming the client
             except Exception as e:
                 print(f"Failed to send buffered log: {e}")
@@ -3,7 +3,7 @@ Metrics collection for simulation monitoring
 """
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional
 from dataclasses import dataclass, field
 from collections import defaultdict, deque
 
@@ -38,6 +38,17 @@ class ConnectorMetrics:
         self._update_avg_response_time()
         self._update_recent_success_rate()
     
+    def record_success_batch(self, count: int, response_times: Iterable[float], bytes_sent: int = 0):
+        """Record several successful operations aggregated by the caller"""
+        self.total_attempts += count
+        self.successful_sends += count
+        self.total_bytes_sent += bytes_sent
+        self.last_success_time = datetime.utcnow()
+        
+        self.recent_response_times.extend(response_times)
+        self._update_avg_response_time()
+        self._update_recent_success_rate()
+    
     def record_failure(self, error: str, is_connection_error: bool = False):
         """Record a failed operation"""
         self.total_attempts += 1
@@ -109,6 +120,12 @@ class DeviceMetrics:
         self.messages_sent += 1
         self.last_activity = datetime.utcnow()
     
+    def record_messages(self, generated: int = 0, sent: int = 0):
+        """Record messages generated and sent since the caller last reported"""
+        self.messages_generated += generated
+        self.messages_sent += sent
+        self.last_activity = datetime.utcnow()
+    
     def record_payload_failure(self):
         """Record a payload generation failure"""
         self.payload_generation_failures += 1
@@ -176,6 +193,18 @@ class MetricsCollector:
         metrics = self.get_or_create_connector_metrics(connector_id, connector_type)
         metrics.record_success(response_time, bytes_sent)
     
+    def record_connector_success_batch(
+        self,
+        connector_id: str,
+        connector_type: str,
+        count: int,
+        response_times: Iterable[float],
+        bytes_sent: int = 0
+    ):
+        """Record several successful connector operations at once"""
+        metrics = self.get_or_create_connector_metrics(connector_id, connector_type)
+        metrics.record_success_batch(count, response_times, bytes_sent)
+    
     def record_connector_failure(self, connector_id: str, connector_type: str, error: str, is_connection_error: bool = False):
         """Record failed connector operation"""
         metrics = self.get_or_create_connector_metrics(connector_id, connector_type)
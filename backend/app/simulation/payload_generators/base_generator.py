@@ -1,7 +1,9 @@
 """
 Base payload generator interface
 """
+import json
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from typing import Dict, Any, Optional
 
 
@@ -30,6 +32,8 @@ class PayloadGeneratorFactory:
         """
         Create a payload generator based on type and configuration
         
+        Identical configurations return the same shared instance.
+        
         Args:
             generator_type: Type of generator ('json_builder', 'python_code', 'visual')
             config: Configuration dictionary for the generator
@@ -40,14 +44,36 @@ class PayloadGeneratorFactory:
         Raises:
             ValueError: If generator_type is not supported
         """
-        from .json_builder import JsonBuilderGenerator
-        from .python_runner import PythonCodeGenerator
+        try:
+            config_key = json.dumps(config, sort_keys=True)
+        except (TypeError, ValueError):
+            # Not canonicalizable, build an uncached instance
+            return _build_generator(generator_type, config)
         
-        if generator_type == "json_builder":
-            return JsonBuilderGenerator(config)
-        elif generator_type == "python_code":
-            # Extract Python code from config
-            python_code = config.get("code", "result = {}")
-            return PythonCodeGenerator(python_code)
-        else:
-            raise ValueError(f"Unsupported generator type: {generator_type}")
\ No newline at end of file
+        return _cached_generator(generator_type, config_key)
+
+
+def _build_generator(generator_type: str, config: Dict[str, Any]) -> PayloadGenerator:
+    """Instantiate the generator for a type and configuration"""
+    from .json_builder import JsonBuilderGenerator
+    from .python_runner import PythonCodeGenerator
+    
+    if generator_type == "json_builder":
+        return JsonBuilderGenerator(config)
+    elif generator_type == "python_code":
+        # Extract Python code from config
+        python_code = config.get("code", "result = {}")
+        return PythonCodeGenerator(python_code)
+    else:
+        raise ValueError(f"Unsupported generator type: {generator_type}")
+
+
+@lru_cache(maxsize=512)
+def _cached_generator(generator_type: str, config_key: str) -> PayloadGenerator:
+    """
+    Share one generator per unique (type, configuration)
+    
+    Generators keep no per-call state, so devices using the same payload
+    definition can safely share an instance.
+    """
+    return _build_generator(generator_type, json.loads(config_key))
@@ -2,16 +2,23 @@
 Python code payload generator with safe execution
 """
 import ast
+import hashlib
 import sys
 import random
 import uuid
 import math
 import json
 from datetime import datetime
+from types import CodeType
 from typing import Dict, Any, Optional, Set
 from app.simulation.payload_generators.base_generator import PayloadGenerator
 
 
+# Validated code objects shared by all executors, keyed by source digest
+_COMPILE_CACHE: Dict[bytes, CodeType] = {}
+_COMPILE_CACHE_MAX_SIZE = 256
+
+
 class SafePythonExecutor:
     """Safe Python code executor with sandboxing"""
     
@@ -41,16 +48,27 @@ class SafePythonExecutor:
             return False
     
     def compile_code(self, code: str) -> bool:
-        """Compile the Python code"""
+        """Compile the Python code, reusing the code object for previously seen sources"""
+        code_hash = hashlib.blake2b(code.encode(), digest_size=16).digest()
+        cached = _COMPILE_CACHE.get(code_hash)
+        if cached is not None:
+            self.compiled_code = cached
+            return True
+        
         if not self.validate_code(code):
             return False
         
         try:
-            self.compiled_code = compile(code, '<user_code>', 'exec')
-            return True
+            compiled = compile(code, '<user_code>', 'exec')
         except SyntaxError as e:
             print(f"Code compilation failed: {e}")
             return False
+        
+        if len(_COMPILE_CACHE) >= _COMPILE_CACHE_MAX_SIZE:
+            # Evict the oldest entry (dicts preserve insertion order)
+            _COMPILE_CACHE.pop(next(iter(_COMPILE_CACHE)))
+        self.compiled_code = _COMPILE_CACHE.setdefault(code_hash, compiled)
+        return True
     
     async def execute(self, device_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Execute the compiled code safely"""
@@ -0,0 +1,57 @@
+"""
+In-process caching utilities
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class VersionedLRUCache:
+    """LRU cache keyed by entity ID and tagged with an entity version
+
+    A lookup only hits when the stored version matches the requested one,
+    so a changed ``updated_at`` (or any other version tag) misses without
+    explicit invalidation. With a ``ttl``, entries also expire that many
+    seconds after being built, bounding how stale a value with no usable
+    version tag can get.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (version, value, monotonic expiry time)
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, Any, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get_or_create(self, key: Hashable, version: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for key/version, building it with factory on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and time.monotonic() < entry[2]:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = factory()
+        expires_at = float('inf') if self.ttl is None else time.monotonic() + self.ttl
+
+        with self._lock:
+            self._entries[key] = (version, value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def invalidate(self, key: Hashable):
+        """Drop the cached value for a key"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop all cached values"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
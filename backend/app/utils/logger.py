@@ -1,13 +1,25 @@
 """
 Logging configuration
 """
+import atexit
 import logging
+import queue
 import sys
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+
+
+# Listeners draining queued log records to their real handlers
+_listeners: List[QueueListener] = []
 
 
 def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
-    """Setup logger with consistent formatting"""
+    """Setup logger with consistent formatting
+    
+    Records are put on an in-memory queue and written to stdout by a
+    background listener thread, so logging from async code never blocks the
+    event loop on console I/O.
+    """
     
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, level.upper()))
@@ -26,9 +38,24 @@ def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
     )
     handler.setFormatter(formatter)
     
-    logger.addHandler(handler)
+    # Hand records to the console handler through a queue
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    
+    logger.addHandler(QueueHandler(log_queue))
     return logger
 
 
+def stop_log_listeners():
+    """Flush queued log records and stop the listener threads"""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_log_listeners)
+
+
 # Default application logger
-app_logger = setup_logger("iot_simulator")
\ No newline at end of file
+app_logger = setup_logger("iot_simulator")
@@ -0,0 +1,46 @@
+"""
+JSON serialization helpers for outgoing payloads
+"""
+import time
+from datetime import datetime
+from typing import Any
+
+import orjson
+
+
+# Seconds a generated timestamp string is reused for
+TIMESTAMP_RESOLUTION = 0.001
+
+# [monotonic time of last refresh, cached ISO string]
+_timestamp_cache = [float('-inf'), ""]
+
+
+def dumps_payload(payload: Any) -> bytes:
+    """Serialize a payload to compact JSON bytes
+
+    Values orjson cannot encode natively are stringified, the same fallback
+    the connectors used with ``json.dumps(..., default=str)``.
+    """
+    return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps_payload_str(payload: Any) -> str:
+    """Serialize a payload like ``dumps_payload`` but return text
+
+    Suitable as aiohttp's ``json_serialize``, which expects a ``str``.
+    """
+    return dumps_payload(payload).decode()
+
+
+def utc_timestamp() -> str:
+    """Current UTC time as an ISO 8601 string, cached for ``TIMESTAMP_RESOLUTION``
+
+    Connectors stamp every outgoing payload; at thousands of messages per
+    second rebuilding the datetime string per message is measurable, while
+    millisecond precision is all the simulated telemetry needs.
+    """
+    now = time.monotonic()
+    if now - _timestamp_cache[0] >= TIMESTAMP_RESOLUTION:
+        _timestamp_cache[0] = now
+        _timestamp_cache[1] = datetime.utcnow().isoformat()
+    return _timestamp_cache[1]
@@ -1,12 +1,22 @@
 """
 Integration tests for Kafka connector with partition and key support
 """
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch
 from app.simulation.connectors.connector_factory import ConnectorFactory
 from app.models.target import TargetType
 
 
+def _delivered_producer():
+    """Producer mock whose sends resolve to an already acknowledged delivery"""
+    producer = AsyncMock()
+    delivery = asyncio.get_running_loop().create_future()
+    delivery.set_result(None)
+    producer.send.return_value = delivery
+    return producer
+
+
 class TestKafkaIntegration:
     """Integration tests for Kafka connector"""
     
@@ -28,7 +38,7 @@ class TestKafkaIntegration:
         
         # Mock the Kafka producer
         with patch('app.simulation.connectors.kafka_connector.AIOKafkaProducer') as mock_producer_class:
-            mock_producer = AsyncMock()
+            mock_producer = _delivered_producer()
             mock_producer_class.return_value = mock_producer
             
             # Test connection
@@ -47,7 +57,7 @@ class TestKafkaIntegration:
             assert result is True
             
             # Verify the producer was called with correct parameters
-            mock_producer.send_and_wait.assert_called_once_with(
+            mock_producer.send.assert_called_once_with(
                 topic='iot-data',
                 value=payload,
                 key=b'temp-001',  # Key from sensor_id field
@@ -72,7 +82,7 @@ class TestKafkaIntegration:
         connector = ConnectorFactory.create_connector(TargetType.KAFKA, config)
         
         with patch('app.simulation.connectors.kafka_connector.AIOKafkaProducer') as mock_producer_class:
-            mock_producer = AsyncMock()
+            mock_producer = _delivered_producer()
             mock_producer_class.return_value = mock_producer
             
             await connector.connect()
@@ -86,11 +96,13 @@ class TestKafkaIntegration:
             assert result is True
             
             # Verify static key is used
-            mock_producer.send_and_wait.assert_called_once_with(
+            mock_producer.send.assert_called_once_with(
                 topic='iot-data',
                 value=payload,
                 key=b'building-a'  # Static key
             )
+            
+            await connector.disconnect()
     
     @pytest.mark.asyncio
     async def test_kafka_connector_without_partition_or_key(self):
@@ -105,7 +117,7 @@ class TestKafkaIntegration:
         connector = ConnectorFactory.create_connector(TargetType.KAFKA, config)
         
         with patch('app.simulation.connectors.kafka_connector.AIOKafkaProducer') as mock_producer_class:
-            mock_producer = AsyncMock()
+            mock_producer = _delivered_producer()
             mock_producer_class.return_value = mock_producer
             
             await connector.connect()
@@ -119,10 +131,12 @@ class TestKafkaIntegration:
             assert result is True
             
             # Verify no key or partition is specified
-            mock_producer.send_and_wait.assert_called_once_with(
+            mock_producer.send.assert_called_once_with(
                 topic='iot-data',
                 value=payload
             )
+            
+            await connector.disconnect()
     
     def test_kafka_config_validation_through_factory(self):
         """Test that factory properly validates Kafka configuration"""
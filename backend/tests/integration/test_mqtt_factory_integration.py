@@ -151,7 +151,7 @@ class TestMQTTFactoryIntegration:
         # Mock successful publish
         mock_result = Mock()
         mock_result.rc = 0
-        mock_result.wait_for_publish = Mock()
+        mock_result.mid = 1
         mock_client.publish.return_value = mock_result
         
         config = {
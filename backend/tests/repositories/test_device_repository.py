@@ -0,0 +1,77 @@
+"""
+Test device repository
+"""
+import pytest
+from app.repositories.device_repository import DeviceRepository
+from app.repositories.project_repository import ProjectRepository
+from app.repositories.payload_repository import PayloadRepository
+
+
+async def _create_project_with_devices(db_session, count: int = 3):
+    """Create a project with a number of enabled devices"""
+    project = await ProjectRepository(db_session).create({"name": "Device Test Project"})
+    repository = DeviceRepository(db_session)
+    devices = [
+        await repository.create({"project_id": project.id, "name": f"Device {i}"})
+        for i in range(count)
+    ]
+    return project, devices
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_enabled_status(db_session):
+    """Test bulk updating the enabled status of devices"""
+    repository = DeviceRepository(db_session)
+    project, devices = await _create_project_with_devices(db_session)
+    
+    updated = await repository.bulk_update_enabled_status(
+        [devices[0].id, devices[1].id], False
+    )
+    
+    assert updated == 2
+    enabled = await repository.get_enabled_by_project_id(project.id)
+    assert [device.id for device in enabled] == [devices[2].id]
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_enabled_status_empty_list(db_session):
+    """Test bulk update with no device IDs is a no-op"""
+    repository = DeviceRepository(db_session)
+    
+    assert await repository.bulk_update_enabled_status([], False) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_by_project_id_load_relations(db_session):
+    """Test that payloads are eager-loaded when requested"""
+    repository = DeviceRepository(db_session)
+    project, devices = await _create_project_with_devices(db_session, count=2)
+    payload = await PayloadRepository(db_session).create(
+        {"name": "Shared Payload", "type": "visual", "schema": {}}
+    )
+    await repository.update(devices[0].id, {"payload_id": payload.id})
+    db_session.expire_all()
+    
+    loaded = await repository.get_by_project_id(project.id, load_relations=True)
+    
+    by_id = {device.id: device for device in loaded}
+    assert "payload" in by_id[devices[0].id].__dict__
+    assert by_id[devices[0].id].payload.id == payload.id
+    assert by_id[devices[1].id].payload is None
+
+
+@pytest.mark.asyncio
+async def test_get_project_devices_with_refs(db_session):
+    """Test loading devices with the IDs of their existing references"""
+    repository = DeviceRepository(db_session)
+    project, devices = await _create_project_with_devices(db_session, count=2)
+    payload = await PayloadRepository(db_session).create(
+        {"name": "Joined Payload", "type": "visual", "schema": {}}
+    )
+    await repository.update(devices[0].id, {"payload_id": payload.id})
+    await repository.update(devices[1].id, {"payload_id": "missing-payload-id"})
+    
+    rows = await repository.get_project_devices_with_refs(project.id)
+    
+    refs = {device.id: (payload_id, target_id) for device, payload_id, target_id in rows}
+    assert refs == {devices[0].id: (payload.id, None), devices[1].id: (None, None)}
@@ -41,6 +41,21 @@ async def test_get_project_by_id(db_session):
     assert retrieved_project.name == "Test Project"
 
 
+@pytest.mark.asyncio
+async def test_get_projects_by_ids(db_session):
+    """Test getting several projects by ID in one call"""
+    repository = ProjectRepository(db_session)
+    
+    project1 = await repository.create({"name": "Project 1"})
+    project2 = await repository.create({"name": "Project 2"})
+    
+    projects = await repository.get_by_ids([project1.id, project2.id, "non-existent-id"])
+    
+    assert set(projects) == {project1.id, project2.id}
+    assert projects[project1.id].name == "Project 1"
+    assert await repository.get_by_ids([]) == {}
+
+
 @pytest.mark.asyncio
 async def test_get_project_by_name(db_session):
     """Test getting a project by name"""
@@ -124,4 +139,17 @@ async def test_get_all_projects(db_session):
     projects = await repository.get_all()
     
     assert len(projects) == 3
-    assert all(isinstance(project, Project) for project in projects)
\ No newline at end of file
+    assert all(isinstance(project, Project) for project in projects)
+
+@pytest.mark.asyncio
+async def test_validate_refs(db_session):
+    """Test resolving device references in a single query"""
+    repository = ProjectRepository(db_session)
+    project = await repository.create({"name": "Refs Project"})
+    
+    refs = await repository.validate_refs(project.id, "missing-payload", None)
+    
+    assert refs == {'project': True, 'payload': False, 'target_system': False}
+    assert await repository.validate_refs(None) == {
+        'project': False, 'payload': False, 'target_system': False
+    }
@@ -2,7 +2,9 @@
 Test project service
 """
 import pytest
+from app.services.device_service import DeviceService
 from app.services.project_service import ProjectService
+from app.models.device import DeviceCreate
 from app.models.project import ProjectCreate, ProjectUpdate
 
 
@@ -82,6 +84,36 @@ async def test_update_project_success(db_session):
     assert updated_project.description == "Updated description"
 
 
+@pytest.mark.asyncio
+async def test_get_project_by_id_after_update(db_session):
+    """Test that a cached project response is refreshed after an update"""
+    service = ProjectService(db_session)
+    
+    created_project = await service.create_project(ProjectCreate(name="Cached Project"))
+    assert (await service.get_project_by_id(created_project.id)).name == "Cached Project"
+    
+    await service.update_project(created_project.id, ProjectUpdate(name="Renamed Project"))
+    retrieved_project = await service.get_project_by_id(created_project.id)
+    
+    assert retrieved_project.name == "Renamed Project"
+
+
+@pytest.mark.asyncio
+async def test_get_project_by_id_after_device_changes(db_session):
+    """Test that adding or removing a device refreshes the cached project response"""
+    service = ProjectService(db_session)
+    device_service = DeviceService(db_session)
+    
+    project = await service.create_project(ProjectCreate(name="Device Project"))
+    assert (await service.get_project_by_id(project.id)).devices == []
+    
+    device = await device_service.create_device(DeviceCreate(name="Sensor", project_id=project.id))
+    assert [d.id for d in (await service.get_project_by_id(project.id)).devices] == [device.id]
+    
+    await device_service.delete_device(device.id)
+    assert (await service.get_project_by_id(project.id)).devices == []
+
+
 @pytest.mark.asyncio
 async def test_update_project_duplicate_name(db_session):
     """Test project update with duplicate name"""
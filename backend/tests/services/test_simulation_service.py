@@ -0,0 +1,51 @@
+"""
+Test simulation service
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.simulation_service import EnhancedSimulationService
+from app.simulation.connectors.base_connector import TargetConnector
+from app.simulation.engine import SimulationProject
+
+
+def _device(device_id: str, target_system):
+    """Enabled device row with its relations loaded"""
+    device = MagicMock()
+    device.id = device_id
+    device.name = f"Device {device_id}"
+    device.metadata = {}
+    device.target_system = target_system
+    device.target_system_id = target_system.id
+    return device
+
+
+@pytest.mark.asyncio
+async def test_devices_on_one_target_share_a_connector():
+    """Test that devices on one target get a single connector, opened and closed once"""
+    service = EnhancedSimulationService(MagicMock())
+    target_system = MagicMock(id="target-1")
+    devices = [_device(f"device-{n}", target_system) for n in range(3)]
+    service.project_repository.get_by_id = AsyncMock(return_value=MagicMock(id="project-1"))
+    service.device_repository.get_enabled_by_project_id = AsyncMock(return_value=devices)
+    
+    connector = AsyncMock(spec=TargetConnector)
+    connector.has_auto_reconnect = False
+    connector.connect.return_value = True
+    service.connector_service.create_connector_for_target = MagicMock(return_value=connector)
+    
+    with patch('app.services.simulation_service.PayloadGeneratorFactory.create_generator'), \
+            patch.object(SimulationProject, 'start_all_devices', new_callable=AsyncMock), \
+            patch.object(SimulationProject, 'stop_all_devices', new_callable=AsyncMock):
+        assert await service.start_project_simulation("project-1") is True
+        
+        simulators = service.engine.running_projects["project-1"].device_simulators
+        assert len(simulators) == 3
+        assert all(simulator.connector is connector for simulator in simulators)
+        assert all(simulator.is_connected for simulator in simulators)
+        service.connector_service.create_connector_for_target.assert_called_once_with(target_system)
+        connector.connect.assert_awaited_once()
+        
+        assert await service.stop_project_simulation("project-1") is True
+    
+    connector.disconnect.assert_awaited_once()
+    assert "project-1" not in service.engine.running_projects
@@ -0,0 +1,103 @@
+"""
+Test validation service
+"""
+import pytest
+from app.services.validation_service import ValidationService
+from app.repositories.device_repository import DeviceRepository
+from app.repositories.project_repository import ProjectRepository
+
+
+@pytest.mark.asyncio
+async def test_validate_devices_creation_batch(db_session):
+    """Test batch validation of device creation data"""
+    service = ValidationService(db_session)
+    project = await ProjectRepository(db_session).create({"name": "Batch Project"})
+    
+    results = await service.validate_devices_creation([
+        {"project_id": project.id, "name": "Valid"},
+        {"project_id": "missing-project", "name": "No Project"},
+        {"project_id": project.id, "payload_id": "missing-payload", "target_system_id": "missing-target"},
+    ])
+    
+    assert results == [
+        [],
+        ["Project not found"],
+        ["Payload not found", "Target system not found"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_validate_device_creation_missing_references(db_session):
+    """Test single device validation reports every missing reference"""
+    service = ValidationService(db_session)
+    
+    errors = await service.validate_device_creation(
+        {"payload_id": "missing-payload", "target_system_id": "missing-target"}
+    )
+    
+    assert errors == ["Project not found", "Payload not found", "Target system not found"]
+
+
+@pytest.mark.asyncio
+async def test_validate_device_update_references(db_session):
+    """Test that a missing device short-circuits and missing references are reported"""
+    service = ValidationService(db_session)
+    project = await ProjectRepository(db_session).create({"name": "Update Project"})
+    device = await DeviceRepository(db_session).create({"project_id": project.id, "name": "Sensor"})
+    
+    missing_refs = {"payload_id": "missing-payload", "target_system_id": "missing-target"}
+    
+    assert await service.validate_device_update("missing-device", missing_refs) == ["Device not found"]
+    assert await service.validate_device_update(device.id, missing_refs) == [
+        "Payload not found", "Target system not found"
+    ]
+    assert await service.validate_device_update(device.id, {"name": "Renamed"}) == []
+
+
+def test_validate_python_code_reports_syntax_errors(db_session):
+    """Test Python code validation for valid and invalid sources"""
+    service = ValidationService(db_session)
+    
+    assert service._validate_python_code("result = {'value': 1}") == []
+    errors = service._validate_python_code("result = {")
+    assert len(errors) == 1
+    assert errors[0].startswith("Python syntax error")
+    # Cached results are returned as fresh lists
+    errors.append("mutated")
+    assert len(service._validate_python_code("result = {")) == 1
+
+
+@pytest.mark.asyncio
+async def test_validate_target_system_creation_dispatches_by_type(db_session):
+    """Test that target configuration is validated by the matching validator"""
+    service = ValidationService(db_session)
+    
+    errors = await service.validate_target_system_creation(
+        {"name": "Socket", "type": "websocket", "config": {"url": "http://example.com"}}
+    )
+    
+    assert errors == ["WebSocket URL must start with ws:// or wss://"]
+    assert await service.validate_target_system_creation(
+        {"name": "Bucket", "type": "ftp", "config": {}}
+    ) == []
+
+
+def test_validate_mqtt_config_missing_fields(db_session):
+    """Test that missing MQTT fields are reported in a stable order"""
+    service = ValidationService(db_session)
+    
+    assert service._validate_mqtt_config({"port": 1883}) == [
+        "MQTT configuration missing 'host'",
+        "MQTT configuration missing 'topic'",
+    ]
+
+
+def test_validate_payload_schema_fields(db_session):
+    """Test schema structure validation and repeated checks of the same schema"""
+    service = ValidationService(db_session)
+    schema = {"fields": [{"name": "temp", "type": "number", "generator": {}}, {"name": "id"}]}
+    
+    expected = ["Field 1 missing 'type'", "Field 1 missing 'generator'"]
+    assert service._validate_payload_schema(schema) == expected
+    assert service._validate_payload_schema(dict(reversed(list(schema.items())))) == expected
+    assert service._validate_payload_schema([]) == ["Schema must be a dictionary"]
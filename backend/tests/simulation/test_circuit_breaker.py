@@ -0,0 +1,97 @@
+"""
+Tests for the circuit breaker
+"""
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+from app.simulation.connectors.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class TestCircuitBreaker:
+    """Test circuit breaker state transitions"""
+    
+    @pytest.mark.asyncio
+    async def test_opens_after_threshold(self):
+        """Test that the circuit opens after reaching the failure threshold"""
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60.0)
+        failing = AsyncMock(side_effect=ValueError("boom"))
+        
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await breaker.call(failing)
+        
+        assert breaker.state == CircuitState.OPEN
+        with pytest.raises(Exception, match="Circuit breaker is OPEN"):
+            await breaker.call(failing)
+        assert failing.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_half_open_after_recovery_timeout(self):
+        """Test that a call is attempted again once the recovery timeout elapses"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30.0)
+        
+        with patch('app.simulation.connectors.circuit_breaker.time.monotonic', return_value=100.0):
+            with pytest.raises(ValueError):
+                await breaker.call(AsyncMock(side_effect=ValueError("boom")))
+        
+        with patch('app.simulation.connectors.circuit_breaker.time.monotonic', return_value=131.0):
+            result = await breaker.call(AsyncMock(return_value=True))
+        
+        assert result is True
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.failure_count == 0
+    
+    @pytest.mark.asyncio
+    async def test_get_state_reports_wall_clock_time(self):
+        """Test that the last failure time is reported as a datetime"""
+        breaker = CircuitBreaker(failure_threshold=5)
+        assert breaker.get_state()["last_failure_time"] is None
+        
+        with pytest.raises(ValueError):
+            await breaker.call(AsyncMock(side_effect=ValueError("boom")))
+        
+        state = breaker.get_state()
+        assert isinstance(state["last_failure_time"], datetime)
+        assert state["failure_count"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_single_recovery_probe(self):
+        """Test that concurrent callers fail fast while a recovery probe runs"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.0)
+        with pytest.raises(ValueError):
+            await breaker.call(AsyncMock(side_effect=ValueError("boom")))
+        
+        release = asyncio.Event()
+        
+        async def slow_probe():
+            await release.wait()
+            return True
+        
+        probe = asyncio.create_task(breaker.call(slow_probe))
+        await asyncio.sleep(0)
+        assert breaker.state == CircuitState.HALF_OPEN
+        
+        backend = AsyncMock(return_value=True)
+        with pytest.raises(Exception, match="probe in flight"):
+            await breaker.call(backend)
+        backend.assert_not_awaited()
+        
+        release.set()
+        assert await probe is True
+        assert breaker.state == CircuitState.CLOSED
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_reopens_circuit(self):
+        """Test that a cancelled probe does not leave the circuit half-open"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.0)
+        with pytest.raises(ValueError):
+            await breaker.call(AsyncMock(side_effect=ValueError("boom")))
+        
+        probe = asyncio.create_task(breaker.call(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        
+        assert breaker.state == CircuitState.OPEN
@@ -3,7 +3,7 @@ Tests for ConnectorFactory
 """
 import pytest
 from unittest.mock import Mock, patch
-from app.simulation.connectors.connector_factory import ConnectorFactory, create_connector, get_supported_connector_types
+from app.simulation.connectors.connector_factory import ConnectorFactory, create_connector, get_supported_connector_types, resolve_target_type
 from app.simulation.connectors.base_connector import TargetConnector
 from app.simulation.connectors.http_connector import HTTPConnector
 from app.simulation.connectors.mqtt_connector import MQTTConnector
@@ -150,16 +150,32 @@ class TestConnectorFactory:
         assert "method" in schema["properties"]
         assert "timeout" in schema["properties"]
     
+    def test_get_config_schema_is_cached(self):
+        """Test that schemas are generated once and reused"""
+        first = ConnectorFactory.get_config_schema(TargetType.MQTT)
+        second = ConnectorFactory.get_config_schema(TargetType.MQTT)
+        
+        assert first is second
+    
+    def test_resolve_target_type(self):
+        """Test case-insensitive resolution of target type strings"""
+        assert resolve_target_type("MQTT") is TargetType.MQTT
+        assert resolve_target_type("mqtt") is TargetType.MQTT
+        
+        with pytest.raises(ValueError):
+            resolve_target_type("carrier-pigeon")
+    
     def test_register_custom_connector(self):
         """Test registering a custom connector"""
         class CustomConnector(TargetConnector):
             def __init__(self, config):
+                super().__init__()
                 self.config = config
             
             async def connect(self):
                 return True
             
-            async def send(self, payload):
+            async def send(self, payload, pre_encoded=None):
                 return True
             
             async def disconnect(self):
@@ -0,0 +1,245 @@
+"""
+Tests for device simulator
+"""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from app.models.device import DeviceResponse
+from app.simulation.connectors.base_connector import TargetConnector
+from app.simulation.connectors.websocket_connector import WebSocketConnector
+from app.simulation.device_simulator import Backoff, DeviceSimulator, DeviceStats
+from app.simulation.metrics import MetricsCollector
+from app.simulation.payload_generators.base_generator import PayloadGenerator
+
+
+@pytest.fixture
+def device_config():
+    """Device configuration for testing"""
+    return DeviceResponse(
+        id="test-device",
+        name="Test Device",
+        project_id="test-project",
+        metadata={},
+        payload_id="test-payload",
+        target_system_id="test-target",
+        send_interval=1,
+        is_enabled=True,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+
+
+class StaticPayloadGenerator(PayloadGenerator):
+    """Payload generator returning a fixed reading"""
+    
+    async def generate(self, device_metadata=None):
+        return {"temperature": 25.5}
+
+
+class TestDeviceStats:
+    """Test cases for DeviceStats"""
+    
+    def test_no_message_timestamps_before_first_success(self):
+        """Test that timestamps are unset until a message is sent"""
+        stats = DeviceStats()
+        
+        assert stats.last_message_at is None
+        assert stats.last_success_at is None
+    
+    def test_increment_messages_records_success_time(self):
+        """Test that a successful message is stamped with the current wall-clock time"""
+        stats = DeviceStats()
+        stats.record_error("boom")
+        
+        before = datetime.utcnow()
+        stats.increment_messages()
+        after = datetime.utcnow()
+        
+        assert stats.messages_sent == 1
+        assert stats.consecutive_errors == 0
+        tolerance = timedelta(milliseconds=50)
+        assert before - tolerance <= stats.last_success_at <= after + tolerance
+        assert abs(stats.last_message_at - stats.last_success_at) < tolerance
+
+
+class TestBackoff:
+    """Test cases for Backoff"""
+    
+    def test_delay_grows_exponentially_within_jitter(self):
+        """Test that delays double per attempt, give or take the jitter"""
+        backoff = Backoff(base_delay=1.0, max_delay=30.0, jitter=0.25)
+        
+        for attempt in range(4):
+            assert 0.75 * 2 ** attempt <= backoff.delay(attempt) <= 1.25 * 2 ** attempt
+    
+    def test_delay_is_capped(self):
+        """Test that long error streaks stay around max_delay"""
+        backoff = Backoff(base_delay=1.0, max_delay=30.0, jitter=0.25)
+        
+        for attempt in (5, 50, 5000):
+            assert 22.5 <= backoff.delay(attempt) <= 37.5
+    
+    def test_no_jitter(self):
+        """Test that a zero jitter gives the plain capped delay"""
+        backoff = Backoff(base_delay=0.5, max_delay=4.0, jitter=0.0)
+        
+        assert [backoff.delay(attempt) for attempt in range(5)] == [0.5, 1.0, 2.0, 4.0, 4.0]
+
+
+class TestDeviceSimulatorMetrics:
+    """Test cases for buffered device metrics"""
+    
+    @pytest.mark.asyncio
+    async def test_message_metrics_are_flushed_in_batches(self, device_config):
+        """Test that per-message metrics reach the collector only when flushed"""
+        collector = MetricsCollector()
+        connector = AsyncMock(spec=TargetConnector)
+        connector.has_auto_reconnect = False
+        connector.handles_own_retry = False
+        connector.connect.return_value = True
+        connector.encode.return_value = b'{"temperature":25.5}'
+        connector.send.return_value = True
+        
+        with patch('app.simulation.device_simulator.metrics_collector', collector):
+            simulator = DeviceSimulator(device_config, StaticPayloadGenerator(), connector)
+            
+            for _ in range(3):
+                payload = await simulator._generate_payload()
+                assert await simulator._send_with_retry(payload) is True
+            
+            device_metrics = collector.device_metrics["test-device"]
+            assert device_metrics.messages_sent == 0
+            assert collector.connector_metrics == {}
+            
+            simulator.flush_metrics()
+        
+        assert device_metrics.messages_generated == 3
+        assert device_metrics.messages_sent == 3
+        connector_metrics = collector.connector_metrics[simulator.connector_id]
+        assert connector_metrics.successful_sends == 3
+        assert connector_metrics.total_bytes_sent > 0
+        assert len(connector_metrics.recent_response_times) == 3
+    
+    @pytest.mark.asyncio
+    async def test_websocket_payload_encoded_once(self, device_config):
+        """Test that a WebSocket payload is encoded once and its size reused for metrics"""
+        collector = MetricsCollector()
+        connector = AsyncMock(spec=WebSocketConnector)
+        connector.has_auto_reconnect = True
+        connector.handles_own_retry = True
+        encoded = b'{"temperature":25.5}'
+        connector.encode.return_value = encoded
+        connector.send.return_value = True
+        
+        with patch('app.simulation.device_simulator.metrics_collector', collector):
+            simulator = DeviceSimulator(device_config, StaticPayloadGenerator(), connector)
+            payload = {"temperature": 25.5}
+            
+            assert await simulator._send_with_retry(payload) is True
+            simulator.flush_metrics()
+        
+        connector.send.assert_called_once_with(payload, pre_encoded=encoded)
+        assert collector.connector_metrics[simulator.connector_id].total_bytes_sent == len(encoded)
+    
+    @pytest.mark.asyncio
+    async def test_payload_encoded_once_across_retries(self, device_config):
+        """Test that retries resend the bytes encoded for the first attempt"""
+        collector = MetricsCollector()
+        connector = AsyncMock(spec=TargetConnector)
+        connector.has_auto_reconnect = False
+        connector.handles_own_retry = False
+        connector.connect.return_value = True
+        encoded = b'{"temperature":25.5}'
+        connector.encode.return_value = encoded
+        connector.send.side_effect = [False, True]
+        
+        with patch('app.simulation.device_simulator.metrics_collector', collector), \
+                patch('app.simulation.device_simulator.asyncio.sleep', new_callable=AsyncMock):
+            simulator = DeviceSimulator(device_config, StaticPayloadGenerator(), connector)
+            payload = {"temperature": 25.5}
+            
+            assert await simulator._send_with_retry(payload) is True
+            simulator.flush_metrics()
+        
+        connector.encode.assert_awaited_once_with(payload)
+        assert connector.send.await_args_list == [((payload,), {"pre_encoded": encoded})] * 2
+        assert collector.connector_metrics[simulator.connector_id].total_bytes_sent == len(encoded)
+
+
+class TestDeviceSimulatorConnectorCapabilities:
+    """Test cases for connector capability dispatch"""
+    
+    def test_plain_connector_has_no_connection_stats(self, device_config):
+        """Test that status only carries connection stats for connectors that track them"""
+        connector = AsyncMock(spec=TargetConnector)
+        connector.has_auto_reconnect = False
+        connector.handles_own_retry = False
+        connector.get_connection_stats.return_value = None
+        
+        simulator = DeviceSimulator(device_config, StaticPayloadGenerator(), connector)
+        
+        assert "websocket_stats" not in simulator.get_status()
+    
+    def test_websocket_connector_capabilities(self):
+        """Test that the WebSocket connector advertises its own reconnection and retries"""
+        assert WebSocketConnector.has_auto_reconnect is True
+        assert WebSocketConnector.handles_own_retry is True
+        assert TargetConnector.has_auto_reconnect is False
+        assert TargetConnector.handles_own_retry is False
+
+
+class TestDeviceSimulatorLogging:
+    """Test cases for simulation log filtering and sampling"""
+    
+    @pytest.mark.asyncio
+    async def test_message_sent_events_are_sampled(self, device_config):
+        """Test that only every log_sample_rate-th message_sent event is emitted"""
+        log_callback = AsyncMock()
+        simulator = DeviceSimulator(
+            device_config, StaticPayloadGenerator(), AsyncMock(spec=TargetConnector),
+            log_callback=log_callback, log_sample_rate=3
+        )
+        
+        for _ in range(7):
+            await simulator._log_event("message_sent", "sent")
+        
+        # The first message is always emitted, then every third
+        assert log_callback.await_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_message_sent_emitted_after_min_interval(self, device_config):
+        """Test that a message_sent event is emitted once log_min_interval has passed"""
+        log_callback = AsyncMock()
+        simulator = DeviceSimulator(
+            device_config, StaticPayloadGenerator(), AsyncMock(spec=TargetConnector),
+            log_callback=log_callback, log_sample_rate=100, log_min_interval=5.0
+        )
+        
+        with patch('app.simulation.device_simulator.time.monotonic', side_effect=[100.0, 101.0, 106.0]):
+            for _ in range(3):
+                await simulator._log_event("message_sent", "sent")
+        
+        assert log_callback.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_events_below_log_level_are_dropped(self, device_config):
+        """Test that log_level filters events but never lifecycle events"""
+        log_callback = AsyncMock()
+        simulator = DeviceSimulator(
+            device_config, StaticPayloadGenerator(), AsyncMock(spec=TargetConnector),
+            log_callback=log_callback, log_level="warning"
+        )
+        
+        for event_type in ("started", "message_sent", "connected", "warning", "error", "stopped"):
+            await simulator._log_event(event_type, event_type)
+        
+        emitted = [call.args[0].event_type for call in log_callback.await_args_list]
+        assert emitted == ["started", "warning", "error", "stopped"]
+    
+    def test_unknown_log_level_is_rejected(self, device_config):
+        """Test that a mistyped log_level fails loudly instead of at filter time"""
+        with pytest.raises(ValueError, match="Unknown simulation log level"):
+            DeviceSimulator(
+                device_config, StaticPayloadGenerator(), AsyncMock(spec=TargetConnector),
+                log_level="verbose"
+            )
@@ -0,0 +1,85 @@
+"""
+Tests for simulation engine
+"""
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.models.simulation import SimulationLogEntry
+from app.simulation.engine import SimulationProject
+
+
+@pytest.fixture
+def log_entry():
+    """Log entry for testing"""
+    return SimulationLogEntry(
+        timestamp=datetime(2024, 1, 1, 12, 0, 0),
+        device_id="test-device",
+        device_name="Test Device",
+        event_type="message_sent",
+        message="Message sent",
+        payload={"temperature": 25.5}
+    )
+
+
+class TestSimulationProjectObservers:
+    """Test cases for log observer fan-out"""
+    
+    @pytest.mark.asyncio
+    async def test_entry_serialized_once_for_all_observers(self, log_entry):
+        """Test that every observer receives the same serialized entry"""
+        project = SimulationProject("test-project")
+        observers = [AsyncMock(), AsyncMock(), AsyncMock()]
+        for websocket in observers:
+            project.add_observer(websocket)
+        
+        await project.notify_observers(log_entry)
+        
+        texts = [websocket.send_text.await_args.args[0] for websocket in observers]
+        assert texts[0] is texts[1] is texts[2]
+        assert '"timestamp":"2024-01-01T12:00:00"' in texts[0]
+        assert project.log_buffer == [log_entry]
+    
+    @pytest.mark.asyncio
+    async def test_failed_and_stalled_observers_are_removed(self, log_entry):
+        """Test that observers that error or time out are dropped and the rest kept"""
+        project = SimulationProject("test-project")
+        healthy, broken, stalled = AsyncMock(), AsyncMock(), AsyncMock()
+        broken.send_text.side_effect = RuntimeError("connection closed")
+        stalled.send_text.side_effect = asyncio.Event().wait
+        for websocket in (healthy, broken, stalled):
+            project.add_observer(websocket)
+        
+        with patch('app.simulation.engine.OBSERVER_SEND_TIMEOUT', 0.01):
+            await project.notify_observers(log_entry)
+        
+        assert project.observers == [healthy]
+    
+    @pytest.mark.asyncio
+    async def test_no_observers_still_buffers(self, log_entry):
+        """Test that entries are buffered for later observers when nobody is watching"""
+        project = SimulationProject("test-project")
+        
+        await project.notify_observers(log_entry)
+        
+        assert project.log_buffer == [log_entry]
+
+
+class TestSimulationProjectMetrics:
+    """Test cases for the project-wide metrics flusher"""
+    
+    @pytest.mark.asyncio
+    async def test_device_metrics_flushed_until_stopped(self):
+        """Test that one project task flushes every device's metrics while running"""
+        project = SimulationProject("test-project")
+        simulators = [MagicMock(run=AsyncMock()) for _ in range(3)]
+        project.device_simulators.extend(simulators)
+        
+        with patch('app.simulation.engine.METRICS_FLUSH_INTERVAL', 0):
+            await project.start_all_devices()
+            await asyncio.sleep(0.01)
+            await project.stop_all_devices()
+        
+        for simulator in simulators:
+            assert simulator.flush_metrics.called
+        assert project._metrics_task is None
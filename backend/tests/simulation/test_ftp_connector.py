@@ -3,7 +3,8 @@ Tests for FTP connector functionality
 """
 import pytest
 import asyncio
-from unittest.mock import Mock, patch, AsyncMock
+import json
+from unittest.mock import Mock, MagicMock, patch, AsyncMock
 from app.simulation.connectors.ftp_connector import FTPConnector
 from app.models.target import FTPConfig
 
@@ -89,8 +90,10 @@ class TestFTPConnector:
         connector = FTPConnector(config)
         
         # Mock asyncssh.connect
-        with patch('app.simulation.connectors.ftp_connector.asyncssh.connect') as mock_connect:
+        with patch('app.simulation.connectors.ftp_connector.asyncssh.connect', new_callable=AsyncMock) as mock_connect:
             mock_client = AsyncMock()
+            mock_sftp_client = Mock()
+            mock_client.start_sftp_client.return_value = mock_sftp_client
             mock_connect.return_value = mock_client
             
             result = await connector.connect()
@@ -98,6 +101,8 @@ class TestFTPConnector:
             assert result is True
             assert connector.connected is True
             assert connector.client == mock_client
+            assert connector.sftp == mock_sftp_client
+            mock_client.start_sftp_client.assert_awaited_once()
             
             # Verify connection calls
             mock_connect.assert_called_once_with(
@@ -168,27 +173,23 @@ class TestFTPConnector:
         connector.connected = True
         
         mock_client = AsyncMock()
+        mock_client.upload_stream = MagicMock()
+        mock_stream = AsyncMock()
+        mock_client.upload_stream.return_value.__aenter__.return_value = mock_stream
         connector.client = mock_client
         
         payload = {"test": "data", "timestamp": "2024-01-15T10:30:00Z"}
         
-        with patch('tempfile.NamedTemporaryFile') as mock_temp, \
-             patch('os.unlink') as mock_unlink, \
-             patch('json.dump') as mock_json_dump:
-            
-            # Mock temporary file
-            mock_temp_file = Mock()
-            mock_temp_file.name = "/tmp/test_file.json"
-            mock_temp.__enter__.return_value = mock_temp_file
-            
-            result = await connector.send(payload)
-            
-            assert result is True
-            
-            # Verify file operations
-            mock_json_dump.assert_called_once()
-            mock_client.upload.assert_called_once()
-            mock_unlink.assert_called_once_with("/tmp/test_file.json")
+        result = await connector.send(payload)
+        
+        assert result is True
+        
+        # Verify the payload is streamed from memory
+        remote_path = mock_client.upload_stream.call_args.args[0]
+        assert remote_path.startswith("/uploads/payload_")
+        assert remote_path.endswith(".json")
+        mock_stream.write.assert_called_once()
+        assert json.loads(mock_stream.write.call_args.args[0]) == payload
     
     @pytest.mark.asyncio
     async def test_sftp_send_success(self):
@@ -205,30 +206,114 @@ class TestFTPConnector:
         connector = FTPConnector(config)
         connector.connected = True
         
+        mock_sftp_client = MagicMock()
+        mock_sftp_client.makedirs = AsyncMock()
+        mock_remote_file = AsyncMock()
+        mock_sftp_client.open.return_value.__aenter__.return_value = mock_remote_file
+        connector.client = Mock()
+        connector.sftp = mock_sftp_client
+        
+        payload = {"test": "data", "timestamp": "2024-01-15T10:30:00Z"}
+        
+        result = await connector.send(payload)
+        
+        assert result is True
+        
+        # Verify the payload is written from memory
+        mock_sftp_client.open.assert_called_once()
+        assert mock_sftp_client.open.call_args.args[1] == 'wb'
+        assert json.loads(mock_remote_file.write.call_args.args[0]) == payload
+    
+    @pytest.mark.asyncio
+    async def test_ftp_send_creates_directory_once(self):
+        """Test that the remote directory is only created on the first send"""
+        config = FTPConfig(
+            host="ftp.example.com",
+            port=21,
+            username="testuser",
+            password="testpass",
+            path="/uploads",
+            use_sftp=False
+        )
+        
+        connector = FTPConnector(config)
+        connector.connected = True
+        
         mock_client = AsyncMock()
-        mock_sftp_client = AsyncMock()
-        mock_client.start_sftp_client.return_value.__aenter__.return_value = mock_sftp_client
+        mock_client.upload_stream = MagicMock()
+        mock_client.upload_stream.return_value.__aenter__.return_value = AsyncMock()
         connector.client = mock_client
         
-        payload = {"test": "data", "timestamp": "2024-01-15T10:30:00Z"}
+        assert await connector.send({"n": 1}) is True
+        assert await connector.send({"n": 2}) is True
         
-        with patch('tempfile.NamedTemporaryFile') as mock_temp, \
-             patch('os.unlink') as mock_unlink, \
-             patch('json.dump') as mock_json_dump:
-            
-            # Mock temporary file
-            mock_temp_file = Mock()
-            mock_temp_file.name = "/tmp/test_file.json"
-            mock_temp.__enter__.return_value = mock_temp_file
-            
-            result = await connector.send(payload)
-            
-            assert result is True
-            
-            # Verify file operations
-            mock_json_dump.assert_called_once()
-            mock_sftp_client.put.assert_called_once()
-            mock_unlink.assert_called_once_with("/tmp/test_file.json")
+        mock_client.make_directory.assert_called_once_with("/uploads")
+        assert mock_client.upload_stream.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_ftp_concurrent_sends_take_turns(self):
+        """Test that devices sharing a plain FTP connector never overlap transfers"""
+        config = FTPConfig(
+            host="ftp.example.com",
+            port=21,
+            username="testuser",
+            password="testpass",
+            path="/uploads",
+            use_sftp=False
+        )
+        
+        connector = FTPConnector(config)
+        connector.connected = True
+        
+        active = 0
+        overlapped = False
+        
+        async def write(data):
+            nonlocal active, overlapped
+            active += 1
+            overlapped = overlapped or active > 1
+            await asyncio.sleep(0)
+            active -= 1
+        
+        mock_client = AsyncMock()
+        mock_client.upload_stream = MagicMock()
+        mock_client.upload_stream.return_value.__aenter__.return_value = AsyncMock(write=write)
+        connector.client = mock_client
+        
+        results = await asyncio.gather(*(connector.send({"n": n}) for n in range(5)))
+        
+        assert results == [True] * 5
+        assert not overlapped
+    
+    @pytest.mark.asyncio
+    async def test_sftp_send_batch(self):
+        """Test uploading a batch of payloads over SFTP"""
+        config = FTPConfig(
+            host="sftp.example.com",
+            port=22,
+            username="testuser",
+            password="testpass",
+            path="/uploads",
+            use_sftp=True
+        )
+        
+        connector = FTPConnector(config)
+        connector.connected = True
+        
+        mock_sftp_client = MagicMock()
+        mock_sftp_client.makedirs = AsyncMock()
+        mock_remote_file = AsyncMock()
+        mock_sftp_client.open.return_value.__aenter__.return_value = mock_remote_file
+        connector.client = Mock()
+        connector.sftp = mock_sftp_client
+        
+        results = await connector.send_batch([{"n": i} for i in range(3)], concurrency=2)
+        
+        assert results == [True, True, True]
+        mock_sftp_client.makedirs.assert_called_once()
+        remote_paths = {call.args[0] for call in mock_sftp_client.open.call_args_list}
+        assert len(remote_paths) == 3
+        assert mock_remote_file.write.call_count == 3
     
     @pytest.mark.asyncio
     async def test_ftp_send_failure(self):
@@ -246,26 +331,15 @@ class TestFTPConnector:
         connector.connected = True
         
         mock_client = AsyncMock()
-        mock_client.upload.side_effect = Exception("Upload failed")
+        mock_client.upload_stream = MagicMock()
+        mock_client.upload_stream.return_value.__aenter__.side_effect = Exception("Upload failed")
         connector.client = mock_client
         
         payload = {"test": "data"}
         
-        with patch('tempfile.NamedTemporaryFile') as mock_temp, \
-             patch('os.unlink') as mock_unlink, \
-             patch('json.dump') as mock_json_dump:
-            
-            # Mock temporary file
-            mock_temp_file = Mock()
-            mock_temp_file.name = "/tmp/test_file.json"
-            mock_temp.__enter__.return_value = mock_temp_file
-            
-            result = await connector.send(payload)
-            
-            assert result is False
-            
-            # Verify cleanup still happens
-            mock_unlink.assert_called_once_with("/tmp/test_file.json")
+        result = await connector.send(payload)
+        
+        assert result is False
     
     @pytest.mark.asyncio
     async def test_ftp_disconnect(self):
@@ -307,13 +381,38 @@ class TestFTPConnector:
         connector.connected = True
         
         mock_client = Mock()
+        mock_sftp_client = Mock()
         connector.client = mock_client
+        connector.sftp = mock_sftp_client
         
         await connector.disconnect()
         
         assert connector.client is None
+        assert connector.sftp is None
         assert connector.connected is False
+        mock_sftp_client.exit.assert_called_once()
         mock_client.close.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_ftp_reconnect_shares_one_attempt(self):
+        """Test that concurrent reconnects from the send path run connect() once"""
+        config = FTPConfig(
+            host="ftp.example.com",
+            port=21,
+            username="testuser",
+            password="testpass",
+            path="/uploads",
+            use_sftp=False
+        )
+        
+        connector = FTPConnector(config)
+        
+        with patch.object(FTPConnector, 'connect', new_callable=AsyncMock, return_value=True) as mock_connect:
+            results = await asyncio.gather(connector._reconnect(), connector._reconnect())
+        
+        assert results == [True, True]
+        mock_connect.assert_called_once()
+        assert connector._connecting is None
 
 
 class TestFTPConnectorIntegration:
@@ -1,6 +1,7 @@
 """
 Tests for Kafka connector
 """
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from app.simulation.connectors.kafka_connector import KafkaConnector
@@ -63,6 +64,53 @@ class TestKafkaConnector:
             assert result is True
             assert connector.producer == mock_producer
             mock_producer.start.assert_called_once()
+            
+            await connector.disconnect()
+    
+    @pytest.mark.asyncio
+    async def test_connect_configures_batching(self):
+        """Test that producer batching and compression options are applied"""
+        config = KafkaConfig(
+            bootstrap_servers="localhost:9092",
+            topic="test-topic",
+            linger_ms=100,
+            compression_type="zstd",
+            acks="all"
+        )
+        connector = KafkaConnector(config)
+        
+        with patch('app.simulation.connectors.kafka_connector.AIOKafkaProducer') as mock_producer_class:
+            mock_producer_class.return_value = AsyncMock()
+            
+            assert await connector.connect() is True
+            
+            kwargs = mock_producer_class.call_args.kwargs
+            assert kwargs['linger_ms'] == 100
+            assert kwargs['max_batch_size'] == 131072
+            assert kwargs['compression_type'] == "zstd"
+            assert kwargs['acks'] == "all"
+            
+            await connector.disconnect()
+    
+    @pytest.mark.asyncio
+    async def test_connect_msgpack_serializer(self):
+        """Test that msgpack serialization can be selected"""
+        msgspec = pytest.importorskip("msgspec")
+        config = KafkaConfig(
+            bootstrap_servers="localhost:9092",
+            topic="test-topic",
+            serialization="msgpack"
+        )
+        connector = KafkaConnector(config)
+        
+        with patch('app.simulation.connectors.kafka_connector.AIOKafkaProducer') as mock_producer_class:
+            mock_producer_class.return_value = AsyncMock()
+            await connector.connect()
+            
+            serializer = mock_producer_class.call_args.kwargs['value_serializer']
+            assert msgspec.msgpack.decode(serializer({"temperature": 25.5})) == {"temperature": 25.5}
+            
+            await connector.disconnect()
     
     @pytest.mark.asyncio
     async def test_connect_failure(self, basic_kafka_config):
@@ -91,7 +139,7 @@ class TestKafkaConnector:
         result = await connector.send(payload)
         
         assert result is True
-        mock_producer.send_and_wait.assert_called_once_with(
+        mock_producer.send.assert_called_once_with(
             topic="test-topic",
             value=payload
         )
@@ -108,7 +156,7 @@ class TestKafkaConnector:
         result = await connector.send(payload)
         
         assert result is True
-        mock_producer.send_and_wait.assert_called_once_with(
+        mock_producer.send.assert_called_once_with(
             topic="test-topic",
             value=payload,
             partition=2
@@ -126,7 +174,7 @@ class TestKafkaConnector:
         result = await connector.send(payload)
         
         assert result is True
-        mock_producer.send_and_wait.assert_called_once_with(
+        mock_producer.send.assert_called_once_with(
             topic="test-topic",
             value=payload,
             key=b"static-key"
@@ -144,7 +192,7 @@ class TestKafkaConnector:
         result = await connector.send(payload)
         
         assert result is True
-        mock_producer.send_and_wait.assert_called_once_with(
+        mock_producer.send.assert_called_once_with(
             topic="test-topic",
             value=payload,
             key=b"sensor-001"
@@ -163,7 +211,7 @@ class TestKafkaConnector:
         
         assert result is True
         # Should send without key when field is missing
-        mock_producer.send_and_wait.assert_called_once_with(
+        mock_producer.send.assert_called_once_with(
             topic="test-topic",
             value=payload
         )
@@ -180,7 +228,7 @@ class TestKafkaConnector:
         result = await connector.send(payload)
         
         assert result is True
-        mock_producer.send_and_wait.assert_called_once_with(
+        mock_producer.send.assert_called_once_with(
             topic="test-topic",
             value=payload,
             key=b"12345"
@@ -191,7 +239,7 @@ class TestKafkaConnector:
         """Test send failure"""
         connector = KafkaConnector(basic_kafka_config)
         mock_producer = AsyncMock()
-        mock_producer.send_and_wait.side_effect = Exception("Send failed")
+        mock_producer.send.side_effect = Exception("Send failed")
         connector.producer = mock_producer
         
         payload = {"temperature": 25.5}
@@ -200,6 +248,85 @@ class TestKafkaConnector:
         
         assert result is False
     
+    @pytest.mark.asyncio
+    async def test_deliveries_are_reaped_in_background(self, basic_kafka_config):
+        """Test that delivery results are recorded after send returns"""
+        connector = KafkaConnector(basic_kafka_config)
+        errors = []
+        connector.on_delivery_error = errors.append
+        
+        loop = asyncio.get_running_loop()
+        delivered, rejected = loop.create_future(), loop.create_future()
+        
+        with patch('app.simulation.connectors.kafka_connector.AIOKafkaProducer') as mock_producer_class:
+            mock_producer = AsyncMock()
+            mock_producer.send.side_effect = [delivered, rejected]
+            mock_producer_class.return_value = mock_producer
+            await connector.connect()
+            
+            assert await connector.send({"n": 1}) is True
+            assert await connector.send({"n": 2}) is True
+            
+            delivered.set_result(None)
+            rejected.set_exception(RuntimeError("broker unavailable"))
+            await connector.disconnect()
+        
+        assert connector.successful_requests == 1
+        assert connector.failed_requests == 1
+        assert [str(e) for e in errors] == ["broker unavailable"]
+        mock_producer.flush.assert_called_once()
+        mock_producer.stop.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_failing_error_callback_does_not_stall_disconnect(self, basic_kafka_config):
+        """Test that deliveries keep being reaped after the error callback raises"""
+        connector = KafkaConnector(basic_kafka_config)
+        connector.on_delivery_error = MagicMock(side_effect=RuntimeError("callback bug"))
+        
+        loop = asyncio.get_running_loop()
+        rejected, delivered = loop.create_future(), loop.create_future()
+        
+        with patch('app.simulation.connectors.kafka_connector.AIOKafkaProducer') as mock_producer_class:
+            mock_producer = AsyncMock()
+            mock_producer.send.side_effect = [rejected, delivered]
+            mock_producer_class.return_value = mock_producer
+            await connector.connect()
+            
+            assert await connector.send({"n": 1}) is True
+            assert await connector.send({"n": 2}) is True
+            
+            rejected.set_exception(RuntimeError("broker unavailable"))
+            delivered.set_result(None)
+            await asyncio.wait_for(connector.disconnect(), 1.0)
+        
+        assert connector.failed_requests == 1
+        assert connector.successful_requests == 1
+        mock_producer.stop.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_send_bounds_inflight(self):
+        """Test that sends beyond max_inflight wait for an earlier send to finish"""
+        config = KafkaConfig(bootstrap_servers="localhost:9092", topic="test-topic", max_inflight=1)
+        connector = KafkaConnector(config)
+        release = asyncio.Event()
+        
+        async def blocking_send(**kwargs):
+            await release.wait()
+            return asyncio.get_running_loop().create_future()
+        
+        connector.producer = AsyncMock()
+        connector.producer.send.side_effect = blocking_send
+        
+        first = asyncio.create_task(connector.send({"n": 1}))
+        second = asyncio.create_task(connector.send({"n": 2}))
+        await asyncio.sleep(0)
+        
+        assert connector.producer.send.call_count == 1
+        
+        release.set()
+        assert await asyncio.gather(first, second) == [True, True]
+        assert connector.producer.send.call_count == 2
+    
     @pytest.mark.asyncio
     async def test_send_without_connection(self, basic_kafka_config):
         """Test send without established connection"""
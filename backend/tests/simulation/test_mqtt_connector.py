@@ -147,18 +147,9 @@ class TestMQTTConnector:
         assert result is False
         assert connector.connected is False
     
-    @patch('paho.mqtt.client.Client')
-    async def test_mqtt_send_success(self, mock_client_class):
+    @pytest.mark.asyncio
+    async def test_mqtt_send_success(self):
         """Test successful MQTT message sending"""
-        mock_client = Mock()
-        mock_client_class.return_value = mock_client
-        
-        # Mock publish result
-        mock_result = Mock()
-        mock_result.rc = 0  # MQTT_ERR_SUCCESS
-        mock_result.wait_for_publish = Mock()
-        mock_client.publish.return_value = mock_result
-        
         config = MQTTConfig(
             host="mqtt.example.com",
             port=1883,
@@ -168,6 +159,19 @@ class TestMQTTConnector:
         
         connector = MQTTConnector(config)
         connector.connected = True  # Simulate connected state
+        connector._loop = asyncio.get_running_loop()
+        
+        # Mock publish result; the broker acknowledgement arrives via on_publish
+        mock_result = Mock()
+        mock_result.rc = 0  # MQTT_ERR_SUCCESS
+        mock_result.mid = 7
+        
+        def publish(*args, **kwargs):
+            connector._on_publish(mock_client, None, mock_result.mid)
+            return mock_result
+        
+        mock_client = Mock()
+        mock_client.publish.side_effect = publish
         connector.client = mock_client
         
         payload = {
@@ -181,10 +185,87 @@ class TestMQTTConnector:
         assert result is True
         mock_client.publish.assert_called_once_with(
             "iot/sensors",
-            '{"device_id": "sensor-001", "temperature": 23.5, "timestamp": "2024-01-01T12:00:00Z"}',
+            b'{"device_id":"sensor-001","temperature":23.5,"timestamp":"2024-01-01T12:00:00Z"}',
+            qos=1
+        )
+        assert connector._pending_publishes == {}
+    
+    @pytest.mark.asyncio
+    async def test_mqtt_send_pre_encoded(self):
+        """Test that a payload from encode() is published without serializing it again"""
+        config = MQTTConfig(
+            host="mqtt.example.com",
+            port=1883,
+            topic="iot/sensors",
             qos=1
         )
-        mock_result.wait_for_publish.assert_called_once_with(timeout=5)
+        
+        connector = MQTTConnector(config)
+        connector.connected = True
+        connector._loop = asyncio.get_running_loop()
+        
+        mock_client = Mock()
+        
+        def publish(*args, **kwargs):
+            connector._on_publish(mock_client, None, 3)
+            return Mock(rc=0, mid=3)
+        
+        mock_client.publish.side_effect = publish
+        connector.client = mock_client
+        
+        payload = {"device_id": "sensor-001"}
+        encoded = await connector.encode(payload)
+        
+        with patch('app.simulation.connectors.mqtt_connector.dumps_payload') as mock_dumps:
+            assert await connector.send(payload, pre_encoded=encoded) is True
+        
+        mock_dumps.assert_not_called()
+        mock_client.publish.assert_called_once_with("iot/sensors", encoded, qos=1)
+        assert b'"timestamp"' in encoded
+    
+    @pytest.mark.asyncio
+    async def test_mqtt_send_timeout(self):
+        """Test that an unacknowledged publish times out without blocking"""
+        config = MQTTConfig(
+            host="mqtt.example.com",
+            port=1883,
+            topic="iot/sensors",
+            qos=1
+        )
+        
+        connector = MQTTConnector(config)
+        connector.connected = True
+        connector.client = Mock()
+        connector.client.publish.return_value = Mock(rc=0, mid=1)
+        
+        with patch('app.simulation.connectors.mqtt_connector.PUBLISH_TIMEOUT', 0.01):
+            result = await connector.send({"test": "data"})
+        
+        assert result is False
+        assert connector.connected is False
+        assert connector._pending_publishes == {}
+    
+    @pytest.mark.asyncio
+    async def test_mqtt_disconnect_fails_pending_send(self):
+        """Test that disconnecting makes a send awaiting its acknowledgement return False"""
+        config = MQTTConfig(
+            host="mqtt.example.com",
+            port=1883,
+            topic="iot/sensors",
+            qos=1
+        )
+        
+        connector = MQTTConnector(config)
+        connector.connected = True
+        connector.client = Mock()
+        connector.client.publish.return_value = Mock(rc=0, mid=1)
+        
+        send = asyncio.create_task(connector.send({"test": "data"}))
+        await asyncio.sleep(0)
+        await connector.disconnect()
+        
+        assert await send is False
+        assert connector._pending_publishes == {}
     
     @patch('paho.mqtt.client.Client')
     async def test_mqtt_send_not_connected(self, mock_client_class):
@@ -213,7 +294,6 @@ class TestMQTTConnector:
         # Mock publish failure
         mock_result = Mock()
         mock_result.rc = 1  # Error code
-        mock_result.wait_for_publish = Mock()
         mock_client.publish.return_value = mock_result
         
         config = MQTTConfig(
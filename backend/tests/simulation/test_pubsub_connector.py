@@ -0,0 +1,70 @@
+"""
+Tests for Pub/Sub connector
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.simulation.connectors.pubsub_connector import PubSubConnector
+from app.models.target import PubSubConfig
+
+
+@pytest.fixture
+def gcp_connector():
+    """GCP Pub/Sub connector with a mocked publisher client"""
+    pytest.importorskip("google.cloud.pubsub_v1")
+    config = PubSubConfig(
+        provider="gcp",
+        topic="telemetry",
+        credentials={"project_id": "test-project"}
+    )
+    connector = PubSubConnector(config)
+    connector.client = MagicMock()
+    connector.client.publish = AsyncMock()
+    connector.client.transport.close = AsyncMock()
+    connector.topic_path = "projects/test-project/topics/telemetry"
+    connector.connected = True
+    return connector
+
+
+class TestPubSubConnectorGCP:
+    """Test cases for GCP publish batching"""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_sends_share_one_publish(self, gcp_connector):
+        """Test that concurrent sends are coalesced into a single RPC"""
+        results = await asyncio.gather(*(gcp_connector.send({"n": n}) for n in range(5)))
+        
+        assert results == [True] * 5
+        gcp_connector.client.publish.assert_called_once()
+        assert len(gcp_connector.client.publish.call_args.kwargs['messages']) == 5
+    
+    @pytest.mark.asyncio
+    async def test_batch_flushes_at_max_messages(self, gcp_connector):
+        """Test that a full batch is published without waiting for the latency timer"""
+        with patch('app.simulation.connectors.pubsub_connector.GCP_BATCH_MAX_MESSAGES', 2), \
+             patch('app.simulation.connectors.pubsub_connector.GCP_BATCH_MAX_LATENCY', 60):
+            results = await asyncio.wait_for(
+                asyncio.gather(gcp_connector.send({"n": 1}), gcp_connector.send({"n": 2})),
+                timeout=1
+            )
+        
+        assert results == [True, True]
+    
+    @pytest.mark.asyncio
+    async def test_failed_publish_fails_every_send_in_batch(self, gcp_connector):
+        """Test that a publish error is reported to each waiting send"""
+        gcp_connector.client.publish.side_effect = Exception("unavailable")
+        
+        results = await asyncio.gather(gcp_connector.send({"n": 1}), gcp_connector.send({"n": 2}))
+        
+        assert results == [False, False]
+    
+    @pytest.mark.asyncio
+    async def test_disconnect_closes_transport(self, gcp_connector):
+        """Test that disconnect closes the gRPC transport"""
+        transport_close = gcp_connector.client.transport.close
+        
+        await gcp_connector.disconnect()
+        
+        transport_close.assert_called_once()
+        assert gcp_connector.client is None
@@ -0,0 +1,141 @@
+"""
+Tests for the resilient HTTP connector
+"""
+import asyncio
+import gzip
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.simulation.connectors.http_connector import close_shared_connector, get_shared_connector
+from app.simulation.connectors.resilient_http_connector import ResilientHTTPConnector
+from app.models.target import HTTPConfig
+
+
+def _mock_session(status: int = 200, method: str = "post"):
+    """Session mock whose requests return a response with the given status"""
+    session = MagicMock()
+    session.closed = False
+    response = MagicMock()
+    response.status = status
+    request = getattr(session, method)
+    request.return_value.__aenter__ = AsyncMock(return_value=response)
+    request.return_value.__aexit__ = AsyncMock(return_value=False)
+    return session
+
+
+class TestResilientHTTPConnector:
+    """Test cases for ResilientHTTPConnector"""
+    
+    @pytest.mark.asyncio
+    async def test_send_posts_pre_serialized_body(self):
+        """Test that the payload is posted as JSON bytes with request metadata"""
+        connector = ResilientHTTPConnector(HTTPConfig(url="https://api.example.com/ingest"))
+        connector.session = _mock_session()
+        
+        payload = {"temperature": 21.5}
+        result = await connector.send(payload)
+        
+        assert result is True
+        assert payload == {"temperature": 21.5}
+        kwargs = connector.session.post.call_args.kwargs
+        assert kwargs["headers"] == {"Content-Type": "application/json"}
+        body = json.loads(kwargs["data"])
+        assert body["temperature"] == 21.5
+        assert body["_request_id"] == "1"
+        assert "timestamp" in body
+        assert connector.get_stats()["successful_requests"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_server_error_keeps_shared_session_open(self):
+        """Test that a 5xx fails the send without closing the session other devices use"""
+        connector = ResilientHTTPConnector(HTTPConfig(url="https://api.example.com/ingest"))
+        session = connector.session = _mock_session(status=503)
+        session.close = AsyncMock()
+        
+        assert await connector.send({"temperature": 21.5}) is False
+        
+        assert connector.session is session
+        session.close.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_large_bodies_are_compressed(self):
+        """Test that bodies above the threshold are gzip-encoded and small ones are not"""
+        connector = ResilientHTTPConnector(HTTPConfig(url="https://api.example.com/ingest", compression="gzip"))
+        
+        with patch.object(ResilientHTTPConnector, '_test_connection', AsyncMock(return_value=True)):
+            assert await connector.connect() is True
+        await connector.disconnect()
+        await close_shared_connector()
+        connector.session = _mock_session()
+        
+        assert await connector.send({"readings": [21.5] * 500}) is True
+        kwargs = connector.session.post.call_args.kwargs
+        assert kwargs["headers"]["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(kwargs["data"]))["readings"] == [21.5] * 500
+        
+        assert await connector.send({"temperature": 21.5}) is True
+        kwargs = connector.session.post.call_args.kwargs
+        assert "Content-Encoding" not in kwargs["headers"]
+        assert json.loads(kwargs["data"])["temperature"] == 21.5
+    
+    @pytest.mark.asyncio
+    async def test_send_dispatches_configured_method(self):
+        """Test that the request goes through the session method for the configured verb"""
+        connector = ResilientHTTPConnector(HTTPConfig(url="https://api.example.com/ingest", method="put"))
+        connector.session = _mock_session(method="put")
+        
+        assert await connector.send({"temperature": 21.5}) is True
+        
+        connector.session.put.assert_called_once()
+        connector.session.post.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_error_response_body_not_read(self):
+        """Test that a failed response is reported without reading its body"""
+        connector = ResilientHTTPConnector(HTTPConfig(url="https://api.example.com/ingest"))
+        connector.session = _mock_session(status=404)
+        response = await connector.session.post.return_value.__aenter__()
+        response.text = AsyncMock(return_value="<html>not found</html>")
+        response.reason = "Not Found"
+        
+        assert await connector.send({"temperature": 21.5}) is False
+        
+        response.text.assert_not_called()
+        assert connector.get_stats()["failed_requests"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_sends_share_one_reconnect(self):
+        """Test that sends racing on a missing session trigger a single connect"""
+        connector = ResilientHTTPConnector(HTTPConfig(url="https://api.example.com/ingest"))
+        
+        async def connect():
+            await asyncio.sleep(0)
+            connector.session = _mock_session()
+            return True
+        
+        with patch.object(connector, 'connect', AsyncMock(side_effect=connect)) as mock_connect:
+            results = await asyncio.gather(*(connector.send({"n": n}) for n in range(5)))
+        
+        assert results == [True] * 5
+        mock_connect.assert_called_once()
+        assert connector._connecting is None
+    
+    @pytest.mark.asyncio
+    async def test_connectors_share_tcp_pool(self):
+        """Test that sessions of different connectors share one TCP connector"""
+        first = ResilientHTTPConnector(HTTPConfig(url="https://a.example.com"))
+        second = ResilientHTTPConnector(HTTPConfig(url="https://b.example.com"))
+        
+        with patch.object(ResilientHTTPConnector, '_test_connection', AsyncMock(return_value=True)):
+            assert await first.connect() is True
+            assert await second.connect() is True
+        
+        try:
+            assert first.session.connector is second.session.connector
+            assert first.session.connector is get_shared_connector()
+            
+            await first.disconnect()
+            assert not second.session.connector.closed
+        finally:
+            await second.disconnect()
+            await close_shared_connector()
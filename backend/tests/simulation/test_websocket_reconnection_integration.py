@@ -34,7 +34,7 @@ async def test_websocket_connector_has_reconnection_features(websocket_config):
     assert hasattr(connector, 'recovery_timeout')
     assert hasattr(connector, '_reconnect_task')
     assert hasattr(connector, '_should_reconnect')
-    assert hasattr(connector, '_connection_lock')
+    assert hasattr(connector, '_connect_future')
     
     # Test that all reconnection methods exist
     assert hasattr(connector, 'start_auto_reconnect')
@@ -0,0 +1,24 @@
+"""
+Test in-process caching utilities
+"""
+from unittest.mock import patch
+from app.utils.cache import VersionedLRUCache
+
+
+def test_hit_requires_matching_version():
+    """Test that a changed version rebuilds the value"""
+    cache = VersionedLRUCache(maxsize=8)
+    
+    assert cache.get_or_create("a", 1, lambda: "first") == "first"
+    assert cache.get_or_create("a", 1, lambda: "second") == "first"
+    assert cache.get_or_create("a", 2, lambda: "third") == "third"
+
+
+def test_entries_expire_after_ttl():
+    """Test that an entry is rebuilt once its TTL has passed, even with the same version"""
+    cache = VersionedLRUCache(maxsize=8, ttl=60.0)
+    
+    with patch('app.utils.cache.time.monotonic', side_effect=[100.0, 130.0, 161.0, 161.0]):
+        assert cache.get_or_create("a", 1, lambda: "first") == "first"
+        assert cache.get_or_create("a", 1, lambda: "second") == "first"
+        assert cache.get_or_create("a", 1, lambda: "third") == "third"